@@ -0,0 +1,711 @@
+#!/usr/bin/python
+'''Benchmarks for goodmovies.py, the results are written as JSON to STDOUT'''
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urlparse
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import goodmovies
+
+class SyntheticIMDBBackend:
+    """a fetch backend answering requests for imdb sites with generated
+       pages shaped like the imdb lists"""
+
+    """the number of movies the search result contains"""
+    __numberOfSearchResults = 10000
+
+    def get(self, url, headers, contentConsumer=None):
+        splitURL = urlparse.urlsplit(url)
+
+        if splitURL.path == '/chart/top':
+            rows = ['<tr><td class="posterColumn"><img src="/poster/%i.jpg"/></td><td class="titleColumn">%i. '
+                    '<a href="/title/tt%07i/">Movie %i</a><span class="secondaryInfo">(2000)</span></td></tr>' % (rank, rank, rank, rank)
+                    for rank in range(1, 251)]
+            page = '<html><body><table>' + ''.join(rows) + '</table></body></html>'
+        else:
+            parameters = urlparse.parse_qs(splitURL.query)
+            start = int(parameters['start'][0])
+            pageSize = min(int(parameters.get('count', ['50'])[0]), 50)
+            rows = ['<div class="lister-item"><img src="/poster/%i.jpg"/><span class="lister-item-header"><span>%i.</span>'
+                    '<a href="/title/tt%07i/">Movie %i</a></span><span class="genre">Sci-Fi</span></div>' % (rank, rank, rank, rank)
+                    for rank in range(start, min(start + pageSize, self.__numberOfSearchResults + 1))]
+            page = '<html><body>' + ''.join(rows) + '</body></html>'
+
+        if contentConsumer is not None:
+            contentConsumer(page)
+            page = None
+
+        return goodmovies.HTTPResponse(url, 200, {}, page)
+
+    def logStatistics(self):
+        pass
+
+    def close(self):
+        pass
+
+class GoodMoviesBenchmark:
+    """runs the benchmarks given on the command line"""
+
+    """the number of times each measurement is repeated, the fastest counts"""
+    __repetitions = 3
+
+    """the milliseconds a run finding no new movies should take at most"""
+    __startupTargetMilliseconds = 100
+
+    def execute(self):
+        """runs the benchmarks and prints their results as JSON"""
+
+        commandLineArguments = self.__parseCommandLineArguments()
+
+        if commandLineArguments.readfile != '' and commandLineArguments.membership == '':
+            # measures reading a file in a process of its own as well
+            self.__printJSON(self.__measureReader(commandLineArguments.reader,
+                                                  commandLineArguments.readfile))
+            return
+
+        if commandLineArguments.membership != '':
+            # measures looking up movies in a file in a process of its own
+            self.__printJSON(self.__measureMembership(commandLineArguments.membership,
+                                                      commandLineArguments.readfile))
+            return
+
+        if commandLineArguments.parsepage != '':
+            # measures a single parser run in a process of its own, so its
+            # peak memory is not influenced by the other measurements
+            self.__printJSON(self.__measureParser(commandLineArguments.parser,
+                                                  commandLineArguments.parsepage,
+                                                  *commandLineArguments.container.split('.')))
+            return
+
+        self.__repetitions = commandLineArguments.repetitions
+        self.__workDirectory = tempfile.mkdtemp(prefix='goodmovies-benchmark-')
+
+        try:
+            benchmarks = self.__benchmarks()
+            results = {}
+
+            for eachBenchmark in commandLineArguments.benchmark or sorted(benchmarks):
+                results[eachBenchmark] = benchmarks[eachBenchmark](commandLineArguments)
+
+            self.__printJSON(results)
+
+            if commandLineArguments.resultfile != '':
+                with io.open(commandLineArguments.resultfile, 'wb') as resultFile:
+                    resultFile.write(json.dumps(results, indent=2, sort_keys=True))
+        finally:
+            shutil.rmtree(self.__workDirectory)
+
+    def __benchmarks(self):
+        """returns the benchmarks by their name"""
+        return {'append': self.__benchmarkAppend,
+                'bloom': self.__benchmarkBloom,
+                'dedup': self.__benchmarkDedup,
+                'fuzzy': self.__benchmarkFuzzy,
+                'parallel': self.__benchmarkParallel,
+                'parser': self.__benchmarkParser,
+                'pipeline': self.__benchmarkPipeline,
+                'reader': self.__benchmarkReader,
+                'startup': self.__benchmarkStartup}
+
+    def __benchmarkFuzzy(self, commandLineArguments):
+        """measures building the index of a large synthetic list of ignored
+           movies and looking up a fetched list in it approximately"""
+
+        randomNumbers = random.Random(42)
+        words = [u''.join(randomNumbers.choice(u'abcdefghijklmnopqrstuvwxyz') for eachLetter in range(randomNumbers.randint(2, 9)))
+                 for eachWord in range(5000)]
+
+        ignoredMovies = set()
+
+        while len(ignoredMovies) < commandLineArguments.fuzzymovies:
+            ignoredMovies.add(u''.join(randomNumbers.choice(words) for eachWord in range(randomNumbers.randint(1, 4))))
+
+        # half of the fetched movies are ignored movies with a typo
+        fetchedMovies = []
+
+        for eachMovie in randomNumbers.sample(sorted(ignoredMovies), 125):
+            typoPosition = randomNumbers.randrange(len(eachMovie))
+            fetchedMovies.append(eachMovie[:typoPosition] + u'x' + eachMovie[typoPosition + 1:])
+
+        fetchedMovies.extend(u''.join(randomNumbers.choice(words) for eachWord in range(3)) for eachMovie in range(125))
+
+        startTime = time.time()
+        fuzzyMovieIndex = goodmovies.FuzzyMovieIndex(ignoredMovies, commandLineArguments.fuzzythreshold)
+        secondsToBuild = time.time() - startTime
+
+        startTime = time.time()
+        matchedMovies = len([eachMovie for eachMovie in fetchedMovies if eachMovie in fuzzyMovieIndex])
+        secondsToLookUp = time.time() - startTime
+
+        return {'ignoredMovies': len(ignoredMovies),
+                'fetchedMovies': len(fetchedMovies),
+                'matchedMovies': matchedMovies,
+                'similarityThreshold': commandLineArguments.fuzzythreshold,
+                'secondsToBuild': secondsToBuild,
+                'secondsToLookUp': secondsToLookUp,
+                'millisecondsPerMovie': 1000 * secondsToLookUp / len(fetchedMovies)}
+
+    def __benchmarkParallel(self, commandLineArguments):
+        """measures reading the exact and the fuzzily comparable movies of a
+           large file with a growing number of processes, one process reads
+           the file without starting others"""
+
+        logging.disable(logging.CRITICAL)
+
+        movieFilePath = self.__createMovieFile('parallel.txt', [u'A m\xf6vie with a rather long title, number %i' % eachNumber
+                                                                for eachNumber in range(commandLineArguments.maxlines)])
+        results = []
+
+        for eachComparison in ['exact', 'fuzzy']:
+            serialMovies = None
+
+            for eachNumberOfProcesses in [1, 2, 4, 8]:
+                fastestSeconds = None
+
+                for eachRepetition in range(self.__repetitions):
+                    runner = goodmovies.GoodMoviesRunner()
+                    compareWithMethod = {'exact': runner._GoodMoviesRunner__asExactString,
+                                         'fuzzy': runner._GoodMoviesRunner__asFuzzilyComparableString}[eachComparison]
+
+                    startTime = time.time()
+                    comparableMovies = runner._GoodMoviesRunner__readComparableMoviesInFile(
+                        movieFilePath, compareWithMethod, processes=eachNumberOfProcesses)
+                    seconds = time.time() - startTime
+
+                    if fastestSeconds is None or seconds < fastestSeconds:
+                        fastestSeconds = seconds
+
+                if serialMovies is None:
+                    serialMovies = comparableMovies
+
+                results.append({'comparison': eachComparison,
+                                'processes': eachNumberOfProcesses,
+                                'cpus': multiprocessing.cpu_count(),
+                                'seconds': fastestSeconds,
+                                'movies': len(comparableMovies),
+                                'sameAsSerial': comparableMovies == serialMovies})
+
+        return results
+
+    def __benchmarkReader(self, commandLineArguments):
+        """compares the peak memory of reading the movies of a large file as
+           a whole and of reading them into the set of comparable movies line
+           by line"""
+
+        movieFilePath = self.__createMovieFile('movies.txt', [u'A movie with a rather long title, number %i' % eachNumber
+                                                              for eachNumber in range(commandLineArguments.maxlines)])
+        results = []
+
+        for eachReader in ['whole', 'stream']:
+            measurement = json.loads(subprocess.check_output(
+                [sys.executable, __file__, '--reader=' + eachReader, '--readfile=' + movieFilePath]))
+            measurement['reader'] = eachReader
+            measurement['fileSizeKB'] = os.path.getsize(movieFilePath) // 1024
+            results.append(measurement)
+
+        return results
+
+    def __measureReader(self, reader, movieFilePath):
+        """reads the comparable movies in the file with the given reader,
+           returning the time needed and the peak memory of the process"""
+
+        logging.disable(logging.CRITICAL)
+
+        runner = goodmovies.GoodMoviesRunner()
+        memoryBeforeReading = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        startTime = time.time()
+
+        if reader == 'stream':
+            comparableMovies = runner._GoodMoviesRunner__readComparableMoviesInFile(
+                movieFilePath, runner._GoodMoviesRunner__asExactString)
+        else:
+            with io.open(movieFilePath, 'r', encoding='utf8') as movieFile:
+                comparableMovies = set(movieFile.read().rstrip().split(u'\n'))
+
+        return {'seconds': time.time() - startTime,
+                'movies': len(comparableMovies),
+                'peakMemoryIncreaseKB': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memoryBeforeReading}
+
+    def __benchmarkPipeline(self, commandLineArguments):
+        """measures complete runs of goodmovies.py replaying recorded sites,
+           together with the time of each stage, for a growing count of
+           movies fetched. Fetching includes parsing the sites"""
+
+        fixtureDirectoryPath = os.path.join(self.__workDirectory, 'fixtures')
+        fixtureDirectory = goodmovies.FixtureDirectory(fixtureDirectoryPath)
+        counts = [eachCount for eachCount in [50, 100, 250, 500, 1000, 2000, 5000] if eachCount <= commandLineArguments.maxcount]
+
+        # the sites needed for the largest count are recorded once
+        recordingScraper = goodmovies.IMDBScraper()
+        recordingScraper.setFetchBackend(goodmovies.RecordingFetchBackend(SyntheticIMDBBackend(), fixtureDirectory))
+        recordingScraper.loadTopMoviesByGenre('sci_fi', max(counts))
+
+        # the output file already contains every other movie fetched
+        outputFilePath = self.__createMovieFile('output.txt', [u'Movie %i' % eachNumber
+                                                               for eachNumber in range(0, 2 * commandLineArguments.outputlines, 2)])
+
+        results = []
+
+        for eachCount in counts:
+            fastestRun = None
+
+            for eachRepetition in range(self.__repetitions):
+                measurement = self.__measurePipelineRun(fixtureDirectoryPath, outputFilePath, eachCount)
+
+                if fastestRun is None or measurement['endToEndSeconds'] < fastestRun['endToEndSeconds']:
+                    fastestRun = measurement
+
+            results.append(fastestRun)
+
+        return results
+
+    def __measurePipelineRun(self, fixtureDirectoryPath, outputFilePath, count):
+        """measures a complete run on a copy of the output file, together
+           with the metrics of the run"""
+
+        runOutputFilePath = os.path.join(self.__workDirectory, 'run.txt')
+        shutil.copyfile(outputFilePath, runOutputFilePath)
+
+        # the run is started like from the command line
+        commandLine = sys.argv
+        sys.argv = ['goodmovies.py',
+                    '--list=imdb_sci_fi',
+                    '--count=%i' % count,
+                    '--replay=' + fixtureDirectoryPath,
+                    '--outputfile=' + runOutputFilePath,
+                    '--logfile=' + os.path.join(self.__workDirectory, 'goodmovies.log')]
+
+        try:
+            runner = goodmovies.GoodMoviesRunner()
+
+            startTime = time.time()
+            runner.execute()
+            endToEndSeconds = time.time() - startTime
+        finally:
+            sys.argv = commandLine
+
+        metrics = runner.getMetrics().asDictionary()
+
+        return {'count': count,
+                'endToEndSeconds': endToEndSeconds,
+                'stageSeconds': metrics['stageSeconds'],
+                'counters': metrics['counters']}
+
+    def __benchmarkAppend(self, commandLineArguments):
+        """measures appending growing numbers of movies to an output file,
+           written at once under the file lock with and without flushing them
+           to the disk, compared to writing them line by line"""
+
+        logging.disable(logging.CRITICAL)
+
+        results = []
+        numberOfMovies = 1000
+
+        while numberOfMovies <= commandLineArguments.maxlines:
+            movies = [u'A movie with a rather long title, number %i' % eachNumber for eachNumber in range(numberOfMovies)]
+
+            for eachWriter in ['lines', 'locked', 'fsync']:
+                seconds = min(self.__measureAppend(eachWriter, movies) for eachRepetition in range(self.__repetitions))
+
+                results.append({'writer': eachWriter,
+                                'movies': numberOfMovies,
+                                'seconds': seconds,
+                                'moviesPerSecond': numberOfMovies / seconds})
+
+            numberOfMovies *= 10
+
+        return results
+
+    def __measureAppend(self, writer, movies):
+        """appends the movies to an output file already read by the runner
+           and returns the seconds needed"""
+
+        outputFilePath = self.__createMovieFile('append.txt', [u'Movie %i' % eachNumber for eachNumber in range(1000)])
+
+        if writer == 'lines':
+            # the way movies were appended before the file was locked
+            startTime = time.time()
+
+            with io.open(outputFilePath, 'a', encoding='utf8') as fileToWriteTo:
+                for eachMovie in movies:
+                    fileToWriteTo.write(eachMovie)
+                    fileToWriteTo.write(u'\n')
+
+            return time.time() - startTime
+
+        runArguments = argparse.Namespace(outputfile=outputFilePath, index=False, bloom=False, processes=1,
+                                          fsync=writer == 'fsync')
+
+        runner = goodmovies.GoodMoviesRunner()
+        runner._GoodMoviesRunner__readMoviesAlreadyInOutputFile(runArguments)
+
+        startTime = time.time()
+        runner._GoodMoviesRunner__insertMoviesIntoFile(runArguments, movies)
+
+        return time.time() - startTime
+
+    def __benchmarkBloom(self, commandLineArguments):
+        """compares the time and the peak memory of looking up fetched movies
+           in a large output file through the set of its movies, through its
+           Bloom filter and through its index of hashes, when the filter and
+           the index are built and when they are used again"""
+
+        movieFilePath = self.__createMovieFile('filtered.txt', [u'A movie with a rather long title, number %i' % eachNumber
+                                                                for eachNumber in range(commandLineArguments.maxlines)])
+        results = []
+
+        for eachMembership in ['set', 'bloom', 'bloom', 'index', 'index']:
+            measurement = json.loads(subprocess.check_output(
+                [sys.executable, __file__, '--membership=' + eachMembership, '--readfile=' + movieFilePath]))
+            measurement['membership'] = eachMembership
+            measurement['fileSizeKB'] = os.path.getsize(movieFilePath) // 1024
+            results.append(measurement)
+
+        results[1]['membership'] = 'bloom (built)'
+        results[2]['filterSizeKB'] = os.path.getsize(movieFilePath + '.bloom') // 1024
+        results[3]['membership'] = 'index (built)'
+        results[4]['indexSizeKB'] = os.path.getsize(movieFilePath + '.idx') // 1024
+
+        return results
+
+    def __measureMembership(self, membership, movieFilePath):
+        """removes fetched movies, half of them contained in the file, either
+           through the set of its movies, through its Bloom filter or through
+           its index, returning the time needed and the peak memory of the
+           process"""
+
+        logging.disable(logging.CRITICAL)
+
+        fetchedMovies = [u'A movie with a rather long title, number %i' % eachNumber for eachNumber in range(0, 2000, 2)]
+        fetchedMovies.extend(u'Another movie, number %i' % eachNumber for eachNumber in range(1000))
+
+        runner = goodmovies.GoodMoviesRunner()
+        memoryBeforeReading = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        startTime = time.time()
+
+        if membership == 'bloom':
+            remainingMovies = runner._GoodMoviesRunner__removeMoviesContainedInFile(movieFilePath, fetchedMovies)
+        else:
+            moviesInFile = runner._GoodMoviesRunner__readComparableMoviesInFile(movieFilePath, runner._GoodMoviesRunner__asExactString,
+                                                                                membership == 'index')
+            remainingMovies = runner._GoodMoviesRunner__removeMoviesContainedIn(moviesInFile, fetchedMovies,
+                                                                                runner._GoodMoviesRunner__asExactString)
+
+        peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        return {'seconds': time.time() - startTime,
+                'remainingMovies': len(remainingMovies),
+                'peakMemoryKB': peakMemory,
+                'peakMemoryIncreaseKB': peakMemory - memoryBeforeReading}
+
+    def __benchmarkStartup(self, commandLineArguments):
+        """measures the time from starting the interpreter to its exit for
+           runs of goodmovies.py finding no new movies with a warm cache,
+           compared to an interpreter doing nothing"""
+
+        cacheDirectoryPath = os.path.join(self.__workDirectory, 'cache')
+        responseCache = goodmovies.HTTPResponseCache(cacheDirectoryPath)
+
+        # the cache is filled like by a previous run, whose movies are all
+        # contained in the output file already
+        cachingScraper = goodmovies.IMDBScraper()
+        cachingScraper.setFetchBackend(SyntheticIMDBBackend())
+        cachingScraper.setResponseCache(responseCache)
+        cachingScraper.setBaseURL('http://imdb.invalid')
+        movies = [eachRecord.title for eachRecord in cachingScraper.loadTopMoviesByGenre('sci_fi', 250)]
+
+        outputFilePath = self.__createMovieFile('startup.txt', movies)
+
+        goodMoviesCommandLine = [sys.executable,
+                                 os.path.join(os.path.dirname(os.path.abspath(__file__)), 'goodmovies.py'),
+                                 '--list=imdb_sci_fi',
+                                 '--count=250',
+                                 '--imdburl=http://imdb.invalid',
+                                 '--cachedir=' + cacheDirectoryPath,
+                                 '--outputfile=' + outputFilePath,
+                                 '--index',
+                                 '--logfile=' + os.path.join(self.__workDirectory, 'startup.log')]
+
+        results = {'interpreterMilliseconds': self.__measureStartToExit([sys.executable, '-c', 'pass']),
+                   'checkMilliseconds': self.__measureStartToExit(goodMoviesCommandLine + ['--check']),
+                   'runMilliseconds': self.__measureStartToExit(goodMoviesCommandLine),
+                   'targetMilliseconds': self.__startupTargetMilliseconds}
+
+        results['checkWithinTarget'] = results['checkMilliseconds'] < self.__startupTargetMilliseconds
+
+        return results
+
+    def __measureStartToExit(self, commandLine):
+        """returns the milliseconds of the fastest of the repeated executions
+           of the command line, which must exit successfully"""
+
+        fastestMilliseconds = None
+
+        with io.open(os.devnull, 'wb') as nullFile:
+            for eachRepetition in range(max(self.__repetitions, 5)):
+                startTime = time.time()
+                subprocess.check_call(commandLine, stdout=nullFile)
+                milliseconds = 1000 * (time.time() - startTime)
+
+                if fastestMilliseconds is None or milliseconds < fastestMilliseconds:
+                    fastestMilliseconds = milliseconds
+
+        return fastestMilliseconds
+
+    def __benchmarkDedup(self, commandLineArguments):
+        """measures reading an output file and an ignore file and removing
+           the movies contained in them from a fetched list, for files
+           growing from 1000 lines to the given maximum"""
+
+        # the runner logs every movie it keeps, which is not to be measured
+        logging.disable(logging.CRITICAL)
+
+        # half of the fetched movies are contained in the files
+        fetchedMovies = [u'Movie %i' % eachNumber for eachNumber in range(0, 2000, 2)]
+
+        results = []
+        numberOfLines = 1000
+
+        while numberOfLines <= commandLineArguments.maxlines:
+            outputFilePath = self.__createMovieFile('output.txt', [u'Movie %i' % eachNumber for eachNumber in range(numberOfLines)])
+            ignoreFilePath = self.__createMovieFile('ignore.txt', [u'MOVIE-%i' % eachNumber for eachNumber in range(numberOfLines)])
+
+            for eachFilePath, eachCompareMethod in [(outputFilePath, '_GoodMoviesRunner__asExactString'),
+                                                    (ignoreFilePath, '_GoodMoviesRunner__asFuzzilyComparableString')]:
+                fastestSeconds = None
+
+                for eachRepetition in range(self.__repetitions):
+                    # a new runner does not know the movies read before
+                    runner = goodmovies.GoodMoviesRunner()
+
+                    startTime = time.time()
+                    compareWithMethod = getattr(runner, eachCompareMethod)
+                    moviesInFile = runner._GoodMoviesRunner__readComparableMoviesInFile(eachFilePath, compareWithMethod)
+                    remainingMovies = runner._GoodMoviesRunner__removeMoviesContainedIn(
+                        moviesInFile, fetchedMovies, compareWithMethod)
+                    secondsNeeded = time.time() - startTime
+
+                    fastestSeconds = secondsNeeded if fastestSeconds is None else min(fastestSeconds, secondsNeeded)
+
+                results.append({'file': os.path.basename(eachFilePath),
+                                'lines': numberOfLines,
+                                'remainingMovies': len(remainingMovies),
+                                'seconds': fastestSeconds})
+
+            numberOfLines *= 10
+
+        logging.disable(logging.NOTSET)
+
+        return results
+
+    def __createMovieFile(self, fileName, movies):
+        """writes a file with a movie per line and returns its path"""
+
+        movieFilePath = os.path.join(self.__workDirectory, fileName)
+
+        with io.open(movieFilePath, 'w', encoding='utf8') as movieFile:
+            movieFile.write(u'\n'.join(movies) + u'\n')
+
+        return movieFilePath
+
+    def __benchmarkParser(self, commandLineArguments):
+        """compares parse time and peak memory of the parsers on saved sites
+           (e.g. the .html files of the response cache) or generated ones"""
+
+        if commandLineArguments.fixturedir != '':
+            pagePaths = [os.path.join(commandLineArguments.fixturedir, eachFileName)
+                         for eachFileName in sorted(os.listdir(commandLineArguments.fixturedir))
+                         if eachFileName.endswith('.html')]
+        else:
+            pagePaths = self.__createFixturePages()
+
+        results = []
+
+        for eachPagePath in pagePaths:
+            with io.open(eachPagePath, 'rb') as page:
+                if 'titleColumn' in page.read():
+                    container = 'td.titleColumn'
+                else:
+                    container = 'span.lister-item-header'
+
+            for eachParser in ['soup', 'stream']:
+                measurement = json.loads(subprocess.check_output(
+                    [sys.executable, __file__,
+                     '--parser=' + eachParser,
+                     '--parsepage=' + eachPagePath,
+                     '--container=' + container]))
+                measurement['page'] = os.path.basename(eachPagePath)
+                measurement['parser'] = eachParser
+                results.append(measurement)
+
+        return results
+
+    def __measureParser(self, parser, pagePath, containerTag, containerClass):
+        """parses the page with the given parser, returning the time needed
+           and the peak memory of the process"""
+
+        fastestSeconds = None
+
+        for eachRepetition in range(self.__repetitions):
+            startTime = time.time()
+
+            if parser == 'stream':
+                titleParser = goodmovies.StreamingTitleParser(containerTag, containerClass)
+
+                with io.open(pagePath, 'rb') as page:
+                    for eachChunk in iter(lambda: page.read(16 * 1024), b''):
+                        titleParser.feed(eachChunk)
+
+                titles = titleParser.close()
+            else:
+                with io.open(pagePath, 'rb') as page:
+                    pageAsString = page.read()
+
+                strainer = SoupStrainer(containerTag, attrs={'class': containerClass})
+                soup = BeautifulSoup(pageAsString, 'lxml', parse_only=strainer)
+                titles = [eachLine.find('a').text for eachLine in soup.findAll(containerTag, {'class': containerClass})]
+
+            secondsNeeded = time.time() - startTime
+            fastestSeconds = secondsNeeded if fastestSeconds is None else min(fastestSeconds, secondsNeeded)
+
+        return {'seconds': fastestSeconds,
+                'titles': len(titles),
+                'peakMemoryKB': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+    def __createFixturePages(self):
+        """writes sites shaped like the imdb lists and returns their paths"""
+
+        # every movie row is padded like on imdb, where most of the markup
+        # around the titles is of no interest for the parsers
+        padding = '<div class="lister-item-content">' + '<span class="ghost">|</span>' * 40 + '</div>'
+
+        top250Rows = ['<tr><td class="posterColumn">%s</td><td class="titleColumn">%i. <a href="/title/tt%07i/">Movie %i</a>'
+                      '<span class="secondaryInfo">(2000)</span></td></tr>' % (padding, rank, rank, rank)
+                      for rank in range(1, 251)]
+        searchRows = ['<div class="lister-item">%s<span class="lister-item-header"><span>%i.</span>'
+                      '<a href="/title/tt%07i/">Movie %i</a></span></div>' % (padding, rank, rank, rank)
+                      for rank in range(1, 51)]
+
+        pages = {'top250.html': '<html><body><table>' + ''.join(top250Rows) + '</table></body></html>',
+                 'search.html': '<html><body>' + ''.join(searchRows) + '</body></html>'}
+
+        pagePaths = []
+
+        for eachFileName, eachPage in sorted(pages.items()):
+            pagePath = os.path.join(self.__workDirectory, eachFileName)
+
+            with io.open(pagePath, 'wb') as pageFile:
+                pageFile.write(eachPage)
+
+            pagePaths.append(pagePath)
+
+        return pagePaths
+
+    def __printJSON(self, results):
+        """writes the results to STDOUT"""
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    def __parseCommandLineArguments(self):
+        """parses the command line arguments and ends the script on error"""
+
+        parser = argparse.ArgumentParser(
+            description='Benchmark goodmovies.py and print the results as JSON.')
+
+        parser.add_argument(
+            '-be','--benchmark',
+            help='the benchmark to run, may be given several times, all benchmarks run if not given',
+            choices=sorted(self.__benchmarks()),
+            action='append')
+
+        parser.add_argument(
+            '--fixturedir',
+            help='optionally specify a directory with saved .html sites to parse, generated sites are parsed otherwise',
+            default='')
+
+        parser.add_argument(
+            '--maxcount',
+            help='the largest count of movies the pipeline benchmark fetches',
+            type=int,
+            default=1000)
+
+        parser.add_argument(
+            '--outputlines',
+            help='the number of lines of the output file of the pipeline benchmark',
+            type=int,
+            default=100000)
+
+        parser.add_argument(
+            '--resultfile',
+            help='optionally specify a file the results are written to as JSON as well',
+            default='')
+
+        parser.add_argument(
+            '--maxlines',
+            help='the number of lines of the largest files the bloom, dedup, parallel and reader benchmarks read and the append benchmark writes',
+            type=int,
+            default=1000000)
+
+        parser.add_argument(
+            '--fuzzymovies',
+            help='the number of ignored movies the fuzzy benchmark looks up movies in',
+            type=int,
+            default=100000)
+
+        parser.add_argument(
+            '--fuzzythreshold',
+            help='the similarity threshold of the fuzzy benchmark',
+            type=float,
+            default=0.85)
+
+        parser.add_argument(
+            '--repetitions',
+            help='the number of times each measurement is repeated, the fastest counts',
+            type=int,
+            default=3)
+
+        parser.add_argument(
+            '--parser',
+            help=argparse.SUPPRESS,
+            default='soup')
+
+        parser.add_argument(
+            '--parsepage',
+            help=argparse.SUPPRESS,
+            default='')
+
+        parser.add_argument(
+            '--reader',
+            help=argparse.SUPPRESS,
+            default='stream')
+
+        parser.add_argument(
+            '--readfile',
+            help=argparse.SUPPRESS,
+            default='')
+
+        parser.add_argument(
+            '--membership',
+            help=argparse.SUPPRESS,
+            default='')
+
+        parser.add_argument(
+            '--container',
+            help=argparse.SUPPRESS,
+            default='span.lister-item-header')
+
+        return parser.parse_args()
+
+if __name__ == '__main__':
+    GoodMoviesBenchmark().execute()
@@ -2,276 +2,4169 @@
 """Fetches lists of movies from internetes sites and writes them to a file
    or STDOUT"""
 import argparse
+import array
+import bisect
+import collections
+import contextlib
+import copy
+import errno
+import fcntl
+import hashlib
 import io
-import urllib2
+import json
+import mmap
+import os
+import random
+import sys
+import time
 import logging
 import re
-from bs4 import BeautifulSoup, SoupStrainer
+import signal
+import stat
+import struct
+import threading
+import unicodedata
+import zlib
+import Queue
 
-class IMDBScraper:
+# the parsing and networking libraries take most of the start up time, so
+# they are imported only when a site is actually fetched or parsed
+
+"""the permissions removed from files created by the process"""
+fileCreationMask = os.umask(0)
+os.umask(fileCreationMask)
+
+def writeFileAtomically(path, *contents):
+    """writes the contents to a temporary file next to the given path and
+       renames it to the path, so readers never see a partially written
+       file and writers running at the same time never share a temporary
+       file, the last rename wins"""
+    import tempfile
+
+    directory, fileName = os.path.split(path)
+    fileDescriptor, temporaryPath = tempfile.mkstemp(prefix=fileName + '.', suffix='.tmp', dir=directory or '.')
+
+    try:
+        with os.fdopen(fileDescriptor, 'wb') as temporaryFile:
+            for eachContent in contents:
+                temporaryFile.write(eachContent)
+
+        # temporary files are only readable by their owner
+        os.chmod(temporaryPath, 0666 & ~fileCreationMask)
+        os.rename(temporaryPath, path)
+    except:
+        try:
+            os.unlink(temporaryPath)
+        except OSError:
+            pass
+        raise
+
+class RunMetrics:
+    """Collects where the time of a run goes and how much work it did. The
+       seconds of a stage are summed over all its executions, the counters
+       may be increased by several threads at the same time"""
+
+    """the stages of a run, fetching includes parsing the sites"""
+    stages = ['fetch', 'parse', 'read', 'dedup', 'write']
+
+    """the counters of a run"""
+    counters = ['pagesFetched', 'bytesFetched', 'fetchRetries', 'cacheHits', 'titlesParsed', 'dedupComparisons', 'moviesInserted']
+
+    """the stages measured for every source a list is read from"""
+    sourceStages = ['fetch', 'parse']
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__startTime = time.time()
+
+        self.__stageSeconds = dict((eachStage, 0.0) for eachStage in self.stages)
+        self.__counterValues = dict((eachCounter, 0) for eachCounter in self.counters)
+        self.__sourceSeconds = {}
+
+    def count(self, counter, amount=1):
+        """increases the counter by the given amount"""
+
+        with self.__lock:
+            self.__counterValues[counter] += amount
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """adds the seconds the with block takes to the given stage"""
+
+        startTime = time.time()
+
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__stageSeconds[stage] += time.time() - startTime
+
+    @contextlib.contextmanager
+    def measureSource(self, source, stage):
+        """adds the seconds the with block takes to the given stage of the
+           source, but not to the stage of the run"""
+
+        startTime = time.time()
+
+        try:
+            yield
+        finally:
+            with self.__lock:
+                sourceSeconds = self.__sourceSeconds.setdefault(
+                    source, dict((eachStage, 0.0) for eachStage in self.sourceStages))
+                sourceSeconds[stage] += time.time() - startTime
+
+    def forSource(self, source):
+        """returns metrics for the scraper of the given source, which count in
+           these metrics and also add the seconds of their stages to the
+           source"""
+        return SourceMetrics(self, source)
+
+    def asDictionary(self):
+        """returns the metrics collected so far"""
+
+        with self.__lock:
+            return {'startTime': self.__startTime,
+                    'totalSeconds': time.time() - self.__startTime,
+                    'stageSeconds': dict(self.__stageSeconds),
+                    'sourceSeconds': dict((eachSource, dict(eachSourceSeconds))
+                                          for eachSource, eachSourceSeconds in self.__sourceSeconds.items()),
+                    'counters': dict(self.__counterValues)}
+
+    def writeJSON(self, fileName):
+        """writes the metrics to the given file as JSON"""
+        writeFileAtomically(fileName, json.dumps(self.asDictionary(), indent=2, sort_keys=True) + '\n')
+
+    def writePrometheusTextfile(self, fileName):
+        """writes the metrics to the given file in the text format read by
+           the textfile collector of the Prometheus node exporter"""
+
+        metrics = self.asDictionary()
+
+        lines = ['# HELP goodmovies_stage_seconds Seconds the last run spent per stage.',
+                 '# TYPE goodmovies_stage_seconds gauge']
+        lines.extend('goodmovies_stage_seconds{stage="%s"} %f' % (eachStage, metrics['stageSeconds'][eachStage])
+                     for eachStage in self.stages)
+
+        for eachCounter in self.counters:
+            metricName = 'goodmovies_' + re.sub('([A-Z])', r'_\1', eachCounter).lower()
+            lines.append('# HELP %s Value of %s in the last run.' % (metricName, eachCounter))
+            lines.append('# TYPE %s gauge' % metricName)
+            lines.append('%s %i' % (metricName, metrics['counters'][eachCounter]))
+
+        if len(metrics['sourceSeconds']) > 0:
+            lines.append('# HELP goodmovies_source_seconds Seconds the last run spent per source and stage.')
+            lines.append('# TYPE goodmovies_source_seconds gauge')
+            lines.extend('goodmovies_source_seconds{source="%s",stage="%s"} %f' % (eachSource, eachStage, eachSourceSeconds[eachStage])
+                         for eachSource, eachSourceSeconds in sorted(metrics['sourceSeconds'].items())
+                         for eachStage in self.sourceStages)
+
+        lines.append('# HELP goodmovies_run_seconds Seconds the last run took.')
+        lines.append('# TYPE goodmovies_run_seconds gauge')
+        lines.append('goodmovies_run_seconds %f' % metrics['totalSeconds'])
+        lines.append('# HELP goodmovies_last_run_timestamp_seconds Time the last run started.')
+        lines.append('# TYPE goodmovies_last_run_timestamp_seconds gauge')
+        lines.append('goodmovies_last_run_timestamp_seconds %f' % metrics['startTime'])
+
+        # the node exporter never sees a partially written file
+        writeFileAtomically(fileName, '\n'.join(lines) + '\n')
+
+class SourceMetrics:
+    """The metrics of a run as seen by the scraper of one source, the stages
+       it measures are summed for the run and for the source"""
+
+    def __init__(self, runMetrics, source):
+        self.__runMetrics = runMetrics
+        self.__source = source
+
+    def count(self, counter, amount=1):
+        """increases the counter of the run by the given amount"""
+        self.__runMetrics.count(counter, amount)
+
+    @contextlib.contextmanager
+    def measure(self, stage):
+        """adds the seconds the with block takes to the given stage of the
+           run and of the source"""
+
+        with self.__runMetrics.measure(stage):
+            with self.__runMetrics.measureSource(self.__source, stage):
+                yield
+
+class HTTPError(Exception):
+    """raised if an internet site answers a request with an error status"""
+
+    def __init__(self, url, status):
+        Exception.__init__(self, 'Got HTTP status %i for URL "%s"' % (status, url))
+        self.url = url
+        self.status = status
+
+class CacheMissError(Exception):
+    """raised if a site is needed, which is not fresh in the cache, while
+       only the cache may be used"""
+
+    def __init__(self, url):
+        Exception.__init__(self, 'No fresh cached site for URL "%s"' % url)
+        self.url = url
+
+class HTTPResponse:
+    """the answer of an internet site to a request"""
+
+    def __init__(self, url, status, headers, content):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.content = content
+
+class HTTPSession:
+    """A fetch backend sending HTTP requests over persistent connections,
+       which are kept open between requests and may be used by several
+       threads one after another"""
+
+    """the number of seconds to wait for a connection or an answer"""
+    __timeout = 30
+
+    """the number of redirects followed for a single request"""
+    __maximumRedirects = 5
+
+    """the number of bytes read at once when the content is streamed"""
+    __chunkSize = 16 * 1024
+
+    __logger = None
+
+    def __init__(self):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__lock = threading.Lock()
+        self.__idleConnections = {}
+
+        self.requestsSent = 0
+        self.connectionsOpened = 0
+        self.bytesReceived = 0
+
+    def setTimeout(self, timeout):
+        """set the number of seconds to wait for a connection or an answer"""
+        self.__timeout = timeout
+
+    def get(self, url, headers, contentConsumer=None):
+        """sends a GET request with the given headers, follows redirects and
+           returns the answer with its content decompressed.
+           If a content consumer is given, the decompressed content of a
+           successful answer is passed to it piece by piece while it is
+           received, instead of being returned"""
+
+        import urlparse
+
+        for eachRedirect in range(self.__maximumRedirects + 1):
+            status, responseHeaders, content = self.__send(url, headers, contentConsumer)
+
+            if status in (301, 302, 303, 307, 308) and 'location' in responseHeaders:
+                url = urlparse.urljoin(url, responseHeaders['location'])
+                continue
+
+            return HTTPResponse(url, status, responseHeaders, content)
+
+        raise HTTPError(url, status)
+
+    def logStatistics(self):
+        """logs the requests sent, connections opened and bytes received"""
+
+        self.__logger.info('Sent %i requests over %i connections and received %i bytes',
+                           self.requestsSent,
+                           self.connectionsOpened,
+                           self.bytesReceived)
+
+    def close(self):
+        """closes all idle connections"""
+
+        with self.__lock:
+            for eachConnections in self.__idleConnections.values():
+                for eachConnection in eachConnections:
+                    eachConnection.close()
+
+            self.__idleConnections = {}
+
+    def __send(self, url, headers, contentConsumer):
+        """sends a single request and returns status, headers and content of
+           the answer"""
+
+        import httplib
+        import socket
+        import urlparse
+
+        splitURL = urlparse.urlsplit(url)
+        connectionKey = (splitURL.scheme, splitURL.netloc)
+
+        requestPath = splitURL.path or '/'
+        if splitURL.query:
+            requestPath += '?' + splitURL.query
+
+        requestHeaders = dict(headers)
+        requestHeaders['Accept-Encoding'] = 'gzip, deflate'
+
+        for eachAttempt in range(2):
+            connection, connectionWasUsedBefore = self.__acquireConnection(connectionKey)
+
+            try:
+                connection.request('GET', requestPath, headers=requestHeaders)
+                response = connection.getresponse()
+                break
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+
+                # the site may have closed an idle connection in the meantime,
+                # so the request is sent again once over a new connection
+                if not connectionWasUsedBefore or eachAttempt == 1:
+                    raise
+
+        responseHeaders = dict(response.getheaders())
+        contentEncoding = responseHeaders.get('content-encoding', '')
+
+        try:
+            if contentConsumer is not None and response.status == 200:
+                bytesReceived = self.__streamContent(response, contentEncoding, contentConsumer)
+                content = None
+            else:
+                rawContent = response.read()
+                bytesReceived = len(rawContent)
+                content = self.__decompress(rawContent, contentEncoding)
+        except:
+            connection.close()
+            raise
+
+        with self.__lock:
+            self.requestsSent += 1
+            self.bytesReceived += bytesReceived
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.__releaseConnection(connectionKey, connection)
+
+        return response.status, responseHeaders, content
+
+    def __streamContent(self, response, contentEncoding, contentConsumer):
+        """passes the decompressed content to the consumer while it is
+           received and returns the number of bytes received"""
+
+        if contentEncoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif contentEncoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        else:
+            decompressor = None
+
+        # some sites send deflate data without the zlib header, which shows
+        # at its start, so the data is kept until the first content results
+        rawContentBeforeOutput = '' if contentEncoding == 'deflate' else None
+
+        bytesReceived = 0
+
+        while True:
+            chunk = response.read(self.__chunkSize)
+
+            if not chunk:
+                break
+
+            bytesReceived += len(chunk)
+
+            if decompressor is not None:
+                rawChunk = chunk
+
+                try:
+                    chunk = decompressor.decompress(rawChunk)
+                except zlib.error:
+                    if rawContentBeforeOutput is None:
+                        raise
+
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                    chunk = decompressor.decompress(rawContentBeforeOutput + rawChunk)
+                    rawContentBeforeOutput = None
+                else:
+                    if rawContentBeforeOutput is not None:
+                        rawContentBeforeOutput = rawContentBeforeOutput + rawChunk if chunk == '' else None
+
+            contentConsumer(chunk)
+
+        if decompressor is not None:
+            contentConsumer(decompressor.flush())
+
+        return bytesReceived
+
+    def __acquireConnection(self, connectionKey):
+        """returns an idle connection to the given site or opens a new one,
+           together with the information, whether it was used before"""
+
+        import httplib
+
+        with self.__lock:
+            idleConnections = self.__idleConnections.get(connectionKey, [])
+
+            if len(idleConnections) > 0:
+                return idleConnections.pop(), True
+
+            self.connectionsOpened += 1
+
+        scheme, netloc = connectionKey
+
+        if scheme == 'https':
+            connection = httplib.HTTPSConnection(netloc, timeout=self.__timeout)
+        else:
+            connection = httplib.HTTPConnection(netloc, timeout=self.__timeout)
+
+        return connection, False
+
+    def __releaseConnection(self, connectionKey, connection):
+        """keeps the connection open for the next request to the same site"""
+
+        with self.__lock:
+            self.__idleConnections.setdefault(connectionKey, []).append(connection)
+
+    def __decompress(self, rawContent, contentEncoding):
+        """returns the content decompressed according to its encoding"""
+
+        if contentEncoding == 'gzip':
+            return zlib.decompress(rawContent, 16 + zlib.MAX_WBITS)
+
+        if contentEncoding == 'deflate':
+            try:
+                return zlib.decompress(rawContent)
+            except zlib.error:
+                # some sites send deflate data without the zlib header
+                return zlib.decompress(rawContent, -zlib.MAX_WBITS)
+
+        return rawContent
+
+class FixtureDirectory:
+    """Stores responses of internet sites in a directory as fixtures, so they
+       can be replayed later without a connection to the internet"""
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def store(self, url, language, response):
+        """stores the response to the request of the url in the language"""
+
+        key = self.__keyFor(url, language)
+
+        with io.open(os.path.join(self.__directory, key + '.html'), 'wb') as contentFile:
+            contentFile.write(response.content)
+
+        with io.open(os.path.join(self.__directory, key + '.json'), 'wb') as metaFile:
+            metaFile.write(json.dumps({'url': url,
+                                       'language': language,
+                                       'status': response.status,
+                                       'headers': response.headers},
+                                      indent=2, sort_keys=True))
+
+    def load(self, url, language):
+        """returns the response stored for the url in the language or None,
+           if none was stored"""
+
+        key = self.__keyFor(url, language)
+
+        try:
+            with io.open(os.path.join(self.__directory, key + '.json'), 'rb') as metaFile:
+                meta = json.loads(metaFile.read())
+            with io.open(os.path.join(self.__directory, key + '.html'), 'rb') as contentFile:
+                content = contentFile.read()
+        except IOError:
+            return None
+
+        return HTTPResponse(meta['url'], meta['status'], meta['headers'], content)
+
+    def recordings(self):
+        """returns url and language of all stored responses"""
+
+        recordings = []
+
+        for eachFileName in sorted(os.listdir(self.__directory)):
+            if eachFileName.endswith('.json'):
+                with io.open(os.path.join(self.__directory, eachFileName), 'rb') as metaFile:
+                    meta = json.loads(metaFile.read())
+
+                recordings.append((meta['url'], meta['language']))
+
+        return recordings
+
+    def __keyFor(self, url, language):
+        """returns the name the response for url and language is stored under"""
+        return hashlib.sha1(url + '\n' + language).hexdigest()
+
+class RecordingFetchBackend:
+    """A fetch backend fetching sites with another fetch backend and storing
+       the successful responses as fixtures"""
+
+    def __init__(self, fetchBackend, fixtureDirectory):
+        self.__fetchBackend = fetchBackend
+        self.__fixtureDirectory = fixtureDirectory
+
+    def get(self, url, headers, contentConsumer=None):
+        """fetches the url like the other fetch backend and stores the response"""
+
+        receivedContent = []
+
+        def consumeContent(content):
+            receivedContent.append(content)
+            contentConsumer(content)
+
+        response = self.__fetchBackend.get(url, headers, consumeContent if contentConsumer is not None else None)
+
+        if response.status == 200:
+            content = response.content if response.content is not None else ''.join(receivedContent)
+            self.__fixtureDirectory.store(url, headers.get('Accept-Language', ''),
+                                          HTTPResponse(response.url, response.status, response.headers, content))
+
+        return response
+
+    def logStatistics(self):
+        self.__fetchBackend.logStatistics()
+
+    def close(self):
+        self.__fetchBackend.close()
+
+class ReplayFetchBackend:
+    """A fetch backend answering requests with the responses stored as
+       fixtures, without a connection to the internet"""
+
+    __logger = None
+
+    def __init__(self, fixtureDirectory):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__fixtureDirectory = fixtureDirectory
+
+        self.requestsReplayed = 0
+
+    def get(self, url, headers, contentConsumer=None):
+        """returns the response stored for the url, or a response with status
+           404 if none was stored"""
+
+        response = self.__fixtureDirectory.load(url, headers.get('Accept-Language', ''))
+
+        if response is None:
+            self.__logger.warning('No response recorded for URL "%s"', url)
+            return HTTPResponse(url, 404, {}, '')
+
+        self.requestsReplayed += 1
+
+        if contentConsumer is not None and response.status == 200:
+            contentConsumer(response.content)
+            response.content = None
+
+        return response
+
+    def logStatistics(self):
+        self.__logger.info('Replayed %i recorded responses', self.requestsReplayed)
+
+    def close(self):
+        pass
+
+class FetchScheduler:
+    """A fetch backend passing requests on to another fetch backend at a
+       limited rate and with a limited number of requests at the same time.
+       Requests failing with a temporary error are sent again after a random
+       delay growing with every attempt, or after the delay the site asks for"""
+
+    """the statuses of answers to requests worth sending again"""
+    __temporaryErrorStatuses = (429, 500, 502, 503, 504)
+
+    """the number of requests sent per second on average, 0 for no limit"""
+    __requestsPerSecond = 0
+
+    """the number of requests which may be sent at once after a pause"""
+    __burst = 1
+
+    """the number of times a failed request is sent again"""
+    __maximumRetries = 3
+
+    """the number of seconds the delay before the first retry is drawn from,
+       doubling with every further retry"""
+    __backoff = 1.0
+
+    """the maximum number of seconds waited before a retry, if a site asks
+       to wait longer, its answer is returned instead"""
+    __maximumDelay = 60.0
+
+    __logger = None
+
+    def __init__(self, fetchBackend, maximumConcurrency=1):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__fetchBackend = fetchBackend
+        self.__metrics = RunMetrics()
+        self.__requestSlots = threading.BoundedSemaphore(max(1, maximumConcurrency))
+        self.__random = random.Random()
+
+        self.__lock = threading.Lock()
+        self.__tokens = float(self.__burst)
+        self.__tokensUpdated = time.time()
+        self.__pausedUntil = 0.0
+
+        self.requestsRetried = 0
+        self.secondsWaited = 0.0
+
+    def setRequestsPerSecond(self, requestsPerSecond, burst=1):
+        """set the number of requests sent per second on average and the
+           number of requests, which may be sent at once after a pause"""
+
+        with self.__lock:
+            self.__requestsPerSecond = max(0, requestsPerSecond)
+            self.__burst = max(1, burst)
+            self.__tokens = float(self.__burst)
+
+    def setMaximumRetries(self, maximumRetries):
+        """set the number of times a failed request is sent again"""
+        self.__maximumRetries = max(0, maximumRetries)
+
+    def setBackoff(self, backoff, maximumDelay=60.0):
+        """set the number of seconds the delay before the first retry is drawn
+           from and the maximum number of seconds waited before a retry"""
+        self.__backoff = backoff
+        self.__maximumDelay = maximumDelay
+
+    def setMetrics(self, metrics):
+        """set the metrics the retried requests are counted in"""
+        self.__metrics = metrics
+
+    def get(self, url, headers, contentConsumer=None):
+        """fetches the url like the other fetch backend, as soon as the rate
+           limit allows, and sends the request again on temporary errors"""
+
+        import httplib
+        import socket
+
+        for eachAttempt in range(self.__maximumRetries + 1):
+            contentPassed = [False]
+
+            def consumeContent(content):
+                contentPassed[0] = True
+                contentConsumer(content)
+
+            try:
+                with self.__requestSlot():
+                    response = self.__fetchBackend.get(url, headers, consumeContent if contentConsumer is not None else None)
+            except (httplib.HTTPException, socket.error) as e:
+                # content already passed on can not be taken back
+                if contentPassed[0] or eachAttempt == self.__maximumRetries:
+                    raise
+
+                delay = self.__backoffDelay(eachAttempt)
+                self.__logger.warning('Fetching URL "%s" failed (%s), retrying in %.1f seconds', url, e, delay)
+                self.__retryAfter(delay)
+                continue
+
+            if response.status not in self.__temporaryErrorStatuses or eachAttempt == self.__maximumRetries:
+                return response
+
+            requestedDelay = self.__requestedDelay(response)
+
+            if requestedDelay is None:
+                delay = self.__backoffDelay(eachAttempt)
+            elif requestedDelay <= self.__maximumDelay:
+                # the site asks all requests to wait, not only this one
+                delay = requestedDelay
+                self.__pause(delay)
+            else:
+                self.__logger.error('Got HTTP status %i for URL "%s" asking to wait %.0f seconds, giving up',
+                                    response.status, url, requestedDelay)
+                return response
+
+            self.__logger.warning('Got HTTP status %i for URL "%s", retrying in %.1f seconds', response.status, url, delay)
+            self.__retryAfter(delay)
+
+    def logStatistics(self):
+        """logs the requests retried and the time waited for the rate limit"""
+
+        self.__logger.info('Retried %i requests and waited %.1f seconds for the rate limit',
+                           self.requestsRetried,
+                           self.secondsWaited)
+        self.__fetchBackend.logStatistics()
+
+    def close(self):
+        self.__fetchBackend.close()
+
+    @contextlib.contextmanager
+    def __requestSlot(self):
+        """waits until another request may be sent and keeps the slot of the
+           request taken while the with block runs"""
+
+        with self.__requestSlots:
+            self.__waitForToken()
+            yield
+
+    def __waitForToken(self):
+        """waits until the site accepts requests again and the rate limit
+           allows another request"""
+
+        while True:
+            with self.__lock:
+                now = time.time()
+
+                if now < self.__pausedUntil:
+                    wait = self.__pausedUntil - now
+                elif self.__requestsPerSecond == 0:
+                    return
+                else:
+                    self.__tokens = min(float(self.__burst),
+                                        self.__tokens + (now - self.__tokensUpdated) * self.__requestsPerSecond)
+                    self.__tokensUpdated = now
+
+                    if self.__tokens >= 1:
+                        self.__tokens -= 1
+                        return
+
+                    wait = (1 - self.__tokens) / self.__requestsPerSecond
+
+                self.secondsWaited += wait
+
+            time.sleep(wait)
+
+    def __pause(self, seconds):
+        """lets no request be sent for the given number of seconds"""
+
+        with self.__lock:
+            self.__pausedUntil = max(self.__pausedUntil, time.time() + seconds)
+
+    def __retryAfter(self, delay):
+        """counts the retry and waits the given number of seconds"""
+
+        with self.__lock:
+            self.requestsRetried += 1
+
+        self.__metrics.count('fetchRetries')
+        time.sleep(delay)
+
+    def __backoffDelay(self, attempt):
+        """returns a random delay before retrying the given attempt, so
+           requests failing together are not sent again together"""
+        return self.__random.uniform(0, min(self.__maximumDelay, self.__backoff * 2 ** attempt))
+
+    def __requestedDelay(self, response):
+        """returns the number of seconds the site asks to wait by the header
+           Retry-After of its answer, None if it does not ask"""
+
+        retryAfter = response.headers.get('retry-after')
+
+        if retryAfter is None:
+            return None
+
+        try:
+            return max(0.0, float(retryAfter))
+        except ValueError:
+            pass
+
+        import email.utils
+
+        retryDate = email.utils.parsedate_tz(retryAfter)
+
+        if retryDate is None:
+            return None
+
+        return max(0.0, email.utils.mktime_tz(retryDate) - time.time())
+
+class CachedResponse:
+    """an HTTP response stored in the response cache"""
+
+    def __init__(self, key, content, fetchedAt, etag, lastModified, records=None, contentHash=None):
+        self.key = key
+        self.content = content
+        self.fetchedAt = fetchedAt
+        self.etag = etag
+        self.lastModified = lastModified
+        self.records = records
+        self.contentHash = contentHash
+
+class HTTPResponseCache:
+    """Stores HTTP responses on disk, so repeated runs do not need to
+       download sites again that did not change"""
+
+    """the number of seconds a cached response is used without asking the
+       internet site, whether it changed"""
+    __timeToLive = 3600
+
+    """the number of bytes the cache may occupy before the least recently
+       used responses are removed"""
+    __maximumSize = 50 * 1024 * 1024
+
+    __readOnly = False
+
+    __logger = None
+
+    def __init__(self, directory):
+        """uses the given directory, which is created accessible by the user
+           only, raises IOError or OSError if it belongs to another user,
+           since cached responses are trusted without checks"""
+
+        self.__logger = logging.getLogger('goodmovies')
+        self.__directory = directory
+        self.__lock = threading.Lock()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0700)
+
+        if os.stat(directory).st_uid != os.getuid():
+            raise IOError(errno.EACCES, 'Directory belongs to another user', directory)
+
+    def setTimeToLive(self, timeToLive):
+        """set the number of seconds a cached response is considered fresh"""
+        self.__timeToLive = timeToLive
+
+    def setMaximumSize(self, maximumSize):
+        """set the number of bytes the cache may occupy"""
+        self.__maximumSize = maximumSize
+
+    def setReadOnly(self, readOnly):
+        """set, whether responses are only read from the cache, nothing is
+           stored then and cached responses are not marked as used"""
+        self.__readOnly = readOnly
+
+    def load(self, url, language):
+        """returns the response cached for the given url and language or
+           None, if there is none"""
+
+        key = self.__keyFor(url, language)
+
+        try:
+            with io.open(self.__pathFor(key, '.meta'), 'r', encoding='utf8') as metaFile:
+                meta = json.load(metaFile)
+            with io.open(self.__pathFor(key, '.html'), 'rb') as contentFile:
+                content = contentFile.read()
+        except (IOError, ValueError):
+            return None
+
+        # the modification time of the content marks its last use
+        self.__touch(self.__pathFor(key, '.html'))
+
+        return CachedResponse(key, content, meta['fetchedAt'], meta['etag'], meta['lastModified'],
+                              meta.get('records'), meta.get('contentHash'))
+
+    def loadRecords(self, url, language):
+        """returns the movie records parsed from the fresh response cached for
+           the given url and language together with the hash of its content,
+           or None if there are none. The cached content is not read, so no
+           parser is needed"""
+
+        key = self.__keyFor(url, language)
+
+        try:
+            with io.open(self.__pathFor(key, '.meta'), 'r', encoding='utf8') as metaFile:
+                meta = json.load(metaFile)
+        except (IOError, ValueError):
+            return None
+
+        if meta.get('records') is None or time.time() - meta['fetchedAt'] >= self.__timeToLive:
+            return None
+
+        self.__touch(self.__pathFor(key, '.html'))
+
+        return [MovieRecord(*eachRecord) for eachRecord in meta['records']], meta['contentHash']
+
+    def isFresh(self, cachedResponse):
+        """returns, whether the cached response may be used without asking
+           the internet site again"""
+        return time.time() - cachedResponse.fetchedAt < self.__timeToLive
+
+    def store(self, url, language, content, etag, lastModified):
+        """stores the response for the given url and language"""
+
+        if self.__readOnly:
+            return
+
+        key = self.__keyFor(url, language)
+
+        with self.__lock:
+            writeFileAtomically(self.__pathFor(key, '.html'), content)
+            self.__writeMeta(key, url, language, time.time(), etag, lastModified)
+            self.__evictLeastRecentlyUsed()
+
+    def refresh(self, url, language, cachedResponse):
+        """marks a cached response as fresh again, after the internet site
+           told that it did not change"""
+
+        if self.__readOnly:
+            return
+
+        with self.__lock:
+            self.__writeMeta(cachedResponse.key, url, language, time.time(),
+                             cachedResponse.etag, cachedResponse.lastModified,
+                             cachedResponse.records, cachedResponse.contentHash)
+
+    def storeRecords(self, url, language, records, contentHash):
+        """stores the movie records parsed from the response cached for the
+           given url and language and the hash of its content, so they need
+           not be parsed again"""
+
+        if self.__readOnly:
+            return
+
+        key = self.__keyFor(url, language)
+
+        with self.__lock:
+            try:
+                with io.open(self.__pathFor(key, '.meta'), 'r', encoding='utf8') as metaFile:
+                    meta = json.load(metaFile)
+            except (IOError, ValueError):
+                # the response was removed from the cache in the meantime
+                return
+
+            self.__writeMeta(key, url, language, meta['fetchedAt'], meta['etag'], meta['lastModified'],
+                             records, contentHash)
+
+    def __writeMeta(self, key, url, language, fetchedAt, etag, lastModified, records=None, contentHash=None):
+        """writes the information needed to revalidate a cached response and
+           the movie records parsed from it, if known"""
+
+        meta = {'url': url,
+                'language': language,
+                'fetchedAt': fetchedAt,
+                'etag': etag,
+                'lastModified': lastModified}
+
+        if records is not None:
+            meta['records'] = records
+            meta['contentHash'] = contentHash
+
+        writeFileAtomically(self.__pathFor(key, '.meta'), json.dumps(meta))
+
+    def __evictLeastRecentlyUsed(self):
+        """removes the least recently used responses until the cache fits
+           into its maximum size"""
+
+        entries = []
+        totalSize = 0
+
+        for eachFileName in os.listdir(self.__directory):
+            if not eachFileName.endswith('.html'):
+                continue
+
+            try:
+                fileStatus = os.stat(os.path.join(self.__directory, eachFileName))
+            except OSError:
+                continue
+
+            entries.append((fileStatus.st_mtime, eachFileName[:-len('.html')], fileStatus.st_size))
+            totalSize += fileStatus.st_size
+
+        for lastUsed, key, size in sorted(entries):
+            if totalSize <= self.__maximumSize:
+                break
+
+            self.__logger.debug('Removing cached response %s to limit the cache size', key)
+
+            for eachExtension in ('.meta', '.html'):
+                try:
+                    os.remove(self.__pathFor(key, eachExtension))
+                except OSError:
+                    pass
+
+            totalSize -= size
+
+    def __touch(self, path):
+        """marks the given cache file as recently used"""
+
+        if self.__readOnly:
+            return
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def __keyFor(self, url, language):
+        """returns the name cached responses for url and language are stored under"""
+        return hashlib.sha1(url + '\n' + language).hexdigest()
+
+    def __pathFor(self, key, extension):
+        """returns the path of a file of the cache entry with the given key"""
+        return os.path.join(self.__directory, key + extension)
+
+class MovieRecord(collections.namedtuple('MovieRecord', ['rank', 'title', 'year', 'rating', 'id'])):
+    """A movie of a list with its rank, title, year, rating and imdb id
+       (e.g. tt0111161), the fields a site does not show are None"""
+
+    __slots__ = ()
+
+    # the patterns are compiled on first use, so runs answered from the
+    # cache do not pay for them at start up
+    __idPattern = r'/title/(tt\d+)'
+    __yearPattern = r'\((\d{4})'
+
+    @classmethod
+    def fromParsedTexts(cls, title, link, textAfterTitle):
+        """returns the record of a movie from its title, the link of the title
+           (e.g. "/title/tt0111161/") and the text following the title within
+           its element (e.g. " (1994)"), still without rank and rating"""
+
+        idMatch = re.search(cls.__idPattern, link or '')
+        yearMatch = re.search(cls.__yearPattern, textAfterTitle)
+
+        return cls(None,
+                   title,
+                   int(yearMatch.group(1)) if yearMatch is not None else None,
+                   None,
+                   idMatch.group(1) if idMatch is not None else None)
+
+    @staticmethod
+    def ratingOf(ratingText):
+        """returns the rating shown by the given text (e.g. "9.2" or "9,2"),
+           None if the text is no rating"""
+
+        try:
+            return float(ratingText.strip().replace(u',', u'.'))
+        except ValueError:
+            return None
+
+class TitleCollector:
+    """An lxml parser target collecting the movie records of an imdb list.
+       The title is the text of the first link within every element with a
+       given tag and class, the year follows it within the element and the
+       rating is the first strong text after the element"""
+
+    def __init__(self, containerTag, containerClass, maximumTitles=None):
+        self.__containerTag = containerTag
+        self.__containerClass = containerClass
+        self.__maximumTitles = maximumTitles
+
+        self.__records = []
+
+        # the depth of nested elements within the current container, within
+        # its first link and within the rating following it, 0 if outside
+        self.__depthInContainer = 0
+        self.__depthInLink = 0
+        self.__depthInRating = 0
+        self.__linkFound = False
+        self.__link = None
+        self.__linkTexts = []
+        self.__textsAfterLink = []
+        self.__ratingTexts = []
+
+        # whether a rating of the last record may still follow
+        self.__awaitingRating = False
+
+    def isComplete(self):
+        """returns, whether the maximum number of records was collected"""
+        return self.__maximumTitles is not None and len(self.__records) >= self.__maximumTitles \
+            and not self.__awaitingRating and self.__depthInRating == 0
+
+    def start(self, tag, attrib):
+        if self.__depthInContainer == 0:
+            if tag == self.__containerTag and self.__containerClass in attrib.get('class', '').split():
+                self.__awaitingRating = False
+
+                if self.isComplete():
+                    return
+
+                self.__depthInContainer = 1
+                self.__linkFound = False
+                self.__textsAfterLink = []
+            elif self.__depthInRating > 0:
+                self.__depthInRating += 1
+            elif tag == 'strong' and self.__awaitingRating:
+                self.__depthInRating = 1
+                self.__ratingTexts = []
+            return
+
+        self.__depthInContainer += 1
+
+        if self.__depthInLink > 0:
+            self.__depthInLink += 1
+        elif tag == 'a' and not self.__linkFound:
+            self.__depthInLink = 1
+            self.__linkFound = True
+            self.__link = attrib.get('href')
+            self.__linkTexts = []
+
+    def end(self, tag):
+        if self.__depthInContainer == 0:
+            if self.__depthInRating > 0:
+                self.__depthInRating -= 1
+
+                if self.__depthInRating == 0:
+                    self.__awaitingRating = False
+                    rating = MovieRecord.ratingOf(u''.join(self.__ratingTexts))
+
+                    if rating is not None:
+                        self.__records[-1] = self.__records[-1]._replace(rating=rating)
+            return
+
+        self.__depthInContainer -= 1
+
+        if self.__depthInLink > 0:
+            self.__depthInLink -= 1
+
+        if self.__depthInContainer == 0 and self.__linkFound:
+            self.__records.append(MovieRecord.fromParsedTexts(u''.join(self.__linkTexts),
+                                                              self.__link,
+                                                              u''.join(self.__textsAfterLink)))
+            self.__awaitingRating = True
+
+    def data(self, data):
+        if self.__depthInLink > 0:
+            self.__linkTexts.append(unicode(data))
+        elif self.__depthInContainer > 0:
+            if self.__linkFound:
+                self.__textsAfterLink.append(unicode(data))
+        elif self.__depthInRating > 0:
+            self.__ratingTexts.append(unicode(data))
+
+    def close(self):
+        return self.__records
+
+class StreamingTitleParser:
+    """Extracts the movie records from HTML fed piece by piece, so a site can
+       be parsed while it is still being received"""
+
+    def __init__(self, containerTag, containerClass, maximumTitles=None):
+        from lxml import etree
+
+        self.__titleCollector = TitleCollector(containerTag, containerClass, maximumTitles)
+        self.__parser = etree.HTMLParser(target=self.__titleCollector, encoding='utf-8')
+
+    def isComplete(self):
+        """returns, whether the maximum number of movies was found, so the
+           rest of the HTML does not need to be parsed"""
+        return self.__titleCollector.isComplete()
+
+    def feed(self, content):
+        """parses the next piece of the HTML"""
+        if content:
+            self.__parser.feed(content)
+
+    def close(self):
+        """finishes parsing and returns the movie records found"""
+        return self.__parser.close()
+
+class MovieListScraper:
+    """The interface of the scrapers reading movie lists from a site. The
+       runner finds the scraper of a list by the prefix of its name in the
+       ScraperRegistry and only calls the methods below, a site overrides
+       those it needs"""
+
+    """the names of the lists of the site, without the prefix of the site"""
+    listNames = []
+
+    @classmethod
+    def knowsList(cls, listName):
+        """returns whether the site has the list with the given name"""
+        return listName in cls.listNames
+
+    def hasList(self, listName):
+        """returns whether the list with the given name, which the site knows,
+           can be read with the options the scraper is configured with"""
+        return True
+
+    def configure(self, commandLineArguments):
+        """set the options given on the command line concerning the site"""
+        pass
+
+    def setLanguage(self, language):
+        """set the language for reading movie lists"""
+        pass
+
+    def setFetchBackend(self, fetchBackend):
+        """set the backend the sites are fetched with"""
+        pass
+
+    def setMetrics(self, metrics):
+        """set the metrics the work of the scraper is counted in"""
+        pass
+
+    def setResponseCache(self, responseCache):
+        """set the cache fetched sites are stored in"""
+        pass
+
+    def setCacheOnly(self, cacheOnly):
+        """set, whether sites are only taken from the cache"""
+        pass
+
+    def setKnownPages(self, knownPages):
+        """set the hashes of the content and the movie records of pages read
+           before by their url"""
+        pass
+
+    def getLoadedPages(self):
+        """returns the hashes of the content and the movie records of the
+           pages read by the last load by their url"""
+        return {}
+
+    def loadList(self, listName, count):
+        """reads the list with the given name and returns up to count
+           MovieRecords ranked from 1"""
+        raise NotImplementedError
+
+class IMDBScraper(MovieListScraper):
     """Reads movie lists from imdb.com"""
 
-    """the language to read movie lists in"""
-    __language = "en-US"
+    """the top 250 list and the genres of the top rated movies by genre"""
+    listNames = ['top250', 'adventure', 'action', 'animation', 'biography', 'comedy', 'crime', 'drama',
+                 'family', 'fantasy', 'film_noir', 'history', 'horror', 'music', 'musical', 'mystery',
+                 'romance', 'sci_fi', 'sport', 'thriller', 'war', 'western']
+
+    """the language to read movie lists in"""
+    __language = "en-US"
+
+    """the url the imdb sites are read from, may be changed to read from a mirror"""
+    __baseURL = "http://www.imdb.com"
+
+    """the number of movies requested for one page of a search result"""
+    __searchResultPageSize = 50
+
+    """the maximum number of search result pages fetched for one list, so a
+       site returning too few movies per page can not keep the run fetching"""
+    __maximumPages = 100
+
+    """the maximum number of sites fetched from imdb at the same time"""
+    __concurrency = 1
+
+    """the cache for sites fetched from imdb, None if sites are not cached"""
+    __responseCache = None
+
+    """the engine extracting the movie titles, "soup" to parse complete sites
+       with BeautifulSoup, "stream" to parse sites with lxml while they are
+       received"""
+    __parser = "soup"
+
+    """whether sites are only taken from the cache and never fetched"""
+    __cacheOnly = False
+
+    __logger = None
+
+    def __init__(self):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__fetchBackend = HTTPSession()
+        self.__metrics = RunMetrics()
+
+        self.__knownPages = {}
+        self.__loadedPages = {}
+
+    def configure(self, commandLineArguments):
+        """set the url, the concurrency, the maximum number of pages and the
+           parser given on the command line"""
+
+        self.setBaseURL(commandLineArguments.imdburl)
+        self.setConcurrency(commandLineArguments.concurrency)
+        self.setMaximumPages(commandLineArguments.maxpages)
+        self.setParser(commandLineArguments.parser)
+
+    def setLanguage(self, language):
+        """set the language for reading imdb movie lists"""
+        self.__language = language
+
+    def setBaseURL(self, baseURL):
+        """set the url the imdb sites are read from (e.g. http://www.imdb.com)"""
+        self.__baseURL = baseURL.rstrip('/')
+
+    def setConcurrency(self, concurrency):
+        """set the maximum number of sites fetched from imdb at the same time"""
+        self.__concurrency = max(1, concurrency)
+
+    def setMaximumPages(self, maximumPages):
+        """set the maximum number of search result pages fetched for one list"""
+        self.__maximumPages = max(1, maximumPages)
+
+    def setParser(self, parser):
+        """set the engine extracting the movie titles, either "soup" or "stream" """
+        self.__parser = parser
+
+    def setFetchBackend(self, fetchBackend):
+        """set the backend the sites are fetched with, e.g. a HTTPSession
+           shared with other scrapers or a ReplayFetchBackend"""
+        self.__fetchBackend = fetchBackend
+
+    def setMetrics(self, metrics):
+        """set the metrics the pages fetched and titles parsed are counted in"""
+        self.__metrics = metrics
+
+    def setResponseCache(self, responseCache):
+        """set the cache sites fetched from imdb are stored in"""
+        self.__responseCache = responseCache
+
+    def setCacheOnly(self, cacheOnly):
+        """set, whether sites are only taken from the cache, a CacheMissError
+           is raised for sites not fresh in the cache then"""
+        self.__cacheOnly = cacheOnly
+
+    def setKnownPages(self, knownPages):
+        """set the hashes of the content and the movie records of sites read
+           before by their url, the records are taken again instead of parsing
+           a site with the same content"""
+        self.__knownPages = knownPages
+
+    def getLoadedPages(self):
+        """returns the hashes of the content and the movie records of the
+           sites read by the last load by their url"""
+        return dict(self.__loadedPages)
+
+    def loadList(self, listName, count):
+        """reads the top 250 list or the top rated movies of the genre with
+           the given name and returns up to count MovieRecords"""
+
+        if listName == 'top250':
+            return self.loadTop250()[:count]
+
+        return self.loadTopMoviesByGenre(listName, count)[:count]
+
+    def loadTop250(self):
+        """reads the imdb top 250 move list and returns a list of MovieRecords"""
+        self.__loadedPages = {}
+        return self.__ranked(self.__loadMovieRecords(self.__baseURL + "/chart/top", 'td', 'titleColumn'))
+
+    def loadTopMoviesByGenre(self, imdbGenreKey, count):
+        """reads the imdb top rated movies by genre and returns a list of
+           MovieRecords"""
+        self.__loadedPages = {}
+        return self.__ranked(self.__loadTopMovieRecordsByGenre(imdbGenreKey, count))
+
+    def __ranked(self, records):
+        """returns the records with their rank within the list"""
+        return [eachRecord._replace(rank=eachRank) for eachRank, eachRecord in enumerate(records, 1)]
+
+    def __loadTopMovieRecordsByGenre(self, imdbGenreKey, count):
+        """reads the records of the imdb top rated movies by genre"""
+        movies = []
+
+        currentStart = 1
+        pagesFetched = 0
+
+        while len(movies) < count:
+            if pagesFetched == self.__maximumPages:
+                self.__logger.error('Fetched %i result pages for genre %s without getting %i movies, aborting',
+                                    pagesFetched, imdbGenreKey, count)
+                return movies
+
+            # all result pages needed for the remaining movies are planned up
+            # front, so they can be fetched at the same time. The last page
+            # only asks for the movies still missing
+            pages = self.__planGenrePages(imdbGenreKey, currentStart, count - len(movies),
+                                          self.__maximumPages - pagesFetched)
+
+            for (IMDBGenreURL, pageSize), pageRecords in zip(pages, self.__loadGenrePagesMovieRecords(pages)):
+                pagesFetched += 1
+
+                if len(pageRecords) == 0:
+                    self.__logger.error('Did not get results parsing result for URL "%s", aborting', IMDBGenreURL)
+                    return movies
+
+                movies.extend(pageRecords)
+                currentStart += len(pageRecords)
+
+                if len(pageRecords) < pageSize:
+                    # the offsets of the following pages were planned for full
+                    # pages, so they are planned again from the current start
+                    break
+
+        return movies
+
+    def __planGenrePages(self, imdbGenreKey, start, numberOfMovies, maximumPages):
+        """returns the urls and sizes of at most the given number of search
+           result pages holding the given number of movies from the given rank"""
+
+        pages = []
+
+        while numberOfMovies > 0 and len(pages) < maximumPages:
+            pageSize = min(numberOfMovies, self.__searchResultPageSize)
+            pages.append((self.__genreURL(imdbGenreKey, start, pageSize), pageSize))
+
+            start += pageSize
+            numberOfMovies -= pageSize
+
+        return pages
+
+    def __genreURL(self, imdbGenreKey, start, count):
+        """returns the url of the imdb search result page for the given genre
+           showing the given number of movies from the given rank"""
+        return self.__baseURL + "/search/title?genres=" + imdbGenreKey + "&start=" + str(start) + "&count=" + str(count) + "&sort=user_rating,desc&title_type=feature&num_votes=25000,&view=simple"
+
+    def __loadGenrePagesMovieRecords(self, pages):
+        """fetches the given search result pages with at most the configured
+           number of requests at the same time and yields their movie records
+           in the order of the pages"""
+
+        if self.__concurrency == 1 or len(pages) < 2:
+            for eachURL, eachPageSize in pages:
+                yield self.__loadGenrePageMovieRecords(eachURL, eachPageSize)
+            return
+
+        pagesToFetch = Queue.Queue()
+        for eachIndex, eachPage in enumerate(pages):
+            pagesToFetch.put((eachIndex, eachPage))
+
+        results = [None] * len(pages)
+        resultsFetched = [threading.Event() for eachPage in pages]
+
+        def fetchWorker():
+            while True:
+                try:
+                    index, (url, pageSize) = pagesToFetch.get_nowait()
+                except Queue.Empty:
+                    return
+
+                try:
+                    results[index] = (True, self.__loadGenrePageMovieRecords(url, pageSize))
+                except Exception as e:
+                    results[index] = (False, e)
+
+                resultsFetched[index].set()
+
+        for eachWorker in range(min(self.__concurrency, len(pages))):
+            workerThread = threading.Thread(target=fetchWorker)
+            workerThread.daemon = True
+            workerThread.start()
+
+        try:
+            for eachIndex in range(len(pages)):
+                resultsFetched[eachIndex].wait()
+                succeeded, pageRecords = results[eachIndex]
+
+                if not succeeded:
+                    raise pageRecords
+
+                yield pageRecords
+        finally:
+            # if the caller stops early, the sites not yet requested are dropped
+            while not pagesToFetch.empty():
+                try:
+                    pagesToFetch.get_nowait()
+                except Queue.Empty:
+                    break
+
+    def __loadGenrePageMovieRecords(self, url, pageSize):
+        """reads at most the given number of movie records of a single search
+           result page"""
+        return self.__loadMovieRecords(url, 'span', 'lister-item-header', pageSize)
+
+    def __loadMovieRecords(self, url, containerTag, containerClass, maximumTitles=None):
+        """fetches the site and returns the records of the movies, whose
+           titles are the texts of the first links within the elements with
+           the given tag and class, parsing stops after the given maximum
+           number of titles"""
+
+        if self.__responseCache is not None:
+            cachedRecords = self.__responseCache.loadRecords(url, self.__language)
+
+            if cachedRecords is not None:
+                self.__logger.debug('Using movies parsed from cached response for URL "%s"', url)
+                self.__metrics.count('cacheHits')
+                self.__loadedPages[url] = (cachedRecords[1], cachedRecords[0])
+                return cachedRecords[0]
+
+        contentHash = hashlib.sha1()
+
+        if self.__parser == "stream":
+            # the site is parsed while it is fetched, so parsing is measured
+            # as part of fetching only
+            titleParser = StreamingTitleParser(containerTag, containerClass, maximumTitles)
+
+            def hashAndParseContent(content):
+                contentHash.update(content)
+
+                if not titleParser.isComplete():
+                    titleParser.feed(content)
+
+            self.__fetchIMDBSiteContent(url, hashAndParseContent)
+            movies = titleParser.close()
+            self.__metrics.count('titlesParsed', len(movies))
+        else:
+            IMDBResponseAsString = self.__fetchIMDBSiteContent(url)
+            contentHash.update(IMDBResponseAsString)
+            knownPage = self.__knownPages.get(url)
+
+            if knownPage is not None and knownPage[0] == contentHash.hexdigest():
+                self.__logger.debug('Site for URL "%s" did not change, using movies parsed before', url)
+                movies = knownPage[1]
+            else:
+                movies = self.__parseMovieRecords(IMDBResponseAsString, containerTag, containerClass, maximumTitles)
+                self.__metrics.count('titlesParsed', len(movies))
+
+        # a check reads the cache without writing to it
+        if self.__responseCache is not None and not self.__cacheOnly:
+            self.__responseCache.storeRecords(url, self.__language, movies, contentHash.hexdigest())
+
+        self.__loadedPages[url] = (contentHash.hexdigest(), movies)
+
+        return movies
+
+    def __parseMovieRecords(self, IMDBResponseAsString, containerTag, containerClass, maximumTitles=None):
+        """returns the records of at most the given number of movies of the
+           complete site like the TitleCollector of the streaming parser"""
+
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        def isMovieElement(tag, attrs):
+            if tag == 'strong':
+                return True
+
+            classes = attrs.get('class') or []
+            if not isinstance(classes, list):
+                classes = classes.split()
+
+            return tag == containerTag and containerClass in classes
+
+        with self.__metrics.measure('parse'):
+            # the ratings are strong texts following the elements of the
+            # titles, so both are kept in the order of the site
+            soup = BeautifulSoup(IMDBResponseAsString, 'lxml', parse_only=SoupStrainer(isMovieElement))
+
+            movies = []
+            awaitingRating = False
+
+            for eachElement in soup.contents:
+                if getattr(eachElement, 'name', None) is None:
+                    continue
+
+                if eachElement.name == 'strong' and eachElement.name != containerTag:
+                    if awaitingRating:
+                        awaitingRating = False
+                        rating = MovieRecord.ratingOf(eachElement.text)
+
+                        if rating is not None:
+                            movies[-1] = movies[-1]._replace(rating=rating)
+                    continue
+
+                awaitingRating = False
+
+                if maximumTitles is not None and len(movies) >= maximumTitles:
+                    break
+
+                movieLink = eachElement.find('a')
+
+                if movieLink is None:
+                    continue
+
+                # the year follows the title within the element
+                elementStrings = list(eachElement.strings)
+                linkStringIDs = set(id(eachString) for eachString in movieLink.strings)
+                stringsBeforeEnd = [eachIndex for eachIndex, eachString in enumerate(elementStrings)
+                                    if id(eachString) in linkStringIDs]
+                textAfterTitle = u''.join(elementStrings[stringsBeforeEnd[-1] + 1 if stringsBeforeEnd else 0:])
+
+                movies.append(MovieRecord.fromParsedTexts(movieLink.text, movieLink.get('href'), textAfterTitle))
+                awaitingRating = True
+
+        return movies
+
+    def __fetchIMDBSiteContent(self, url, contentConsumer=None):
+        """reads the content of an IMDB site and returns the HTML as string.
+           If a content consumer is given, the HTML is passed to it while it
+           is received instead"""
+
+        cachedResponse = None
+
+        if self.__responseCache is not None:
+            cachedResponse = self.__responseCache.load(url, self.__language)
+
+            if cachedResponse is not None and self.__responseCache.isFresh(cachedResponse):
+                self.__logger.debug('Using cached response for URL "%s"', url)
+                self.__metrics.count('cacheHits')
+                return self.__passContent(cachedResponse.content, contentConsumer)
+
+        if self.__cacheOnly:
+            raise CacheMissError(url)
+
+        # upon sending a request from IMDB with header 'Accept-Language'
+        # IMDB will return the site and the move titles in this language
+        requestHeaders = {'Accept-Language': self.__language,
+                          'User-Agent': 'Mozilla/5.0'}
+
+        if cachedResponse is not None:
+            # IMDB answers with status 304 if the cached response is still valid
+            if cachedResponse.etag is not None:
+                requestHeaders['If-None-Match'] = cachedResponse.etag
+            if cachedResponse.lastModified is not None:
+                requestHeaders['If-Modified-Since'] = cachedResponse.lastModified
+
+        receivedContent = []
+        bytesStreamed = [0]
+
+        if contentConsumer is not None:
+            # the content is kept for the cache, while it is passed on
+            def consumeContent(content):
+                bytesStreamed[0] += len(content)
+
+                if self.__responseCache is not None:
+                    receivedContent.append(content)
+
+                contentConsumer(content)
+
+            IMDBResponse = self.__fetchBackend.get(url, requestHeaders, consumeContent)
+        else:
+            IMDBResponse = self.__fetchBackend.get(url, requestHeaders)
+
+        if IMDBResponse.status == 304 and cachedResponse is not None:
+            self.__logger.debug('Cached response for URL "%s" is still valid', url)
+            self.__metrics.count('cacheHits')
+            self.__responseCache.refresh(url, self.__language, cachedResponse)
+            return self.__passContent(cachedResponse.content, contentConsumer)
+
+        if IMDBResponse.status != 200:
+            raise HTTPError(url, IMDBResponse.status)
+
+        if IMDBResponse.content is None:
+            IMDBResponseAsString = ''.join(receivedContent)
+            self.__metrics.count('bytesFetched', bytesStreamed[0])
+        else:
+            IMDBResponseAsString = IMDBResponse.content
+            self.__metrics.count('bytesFetched', len(IMDBResponseAsString))
+
+        self.__metrics.count('pagesFetched')
+
+        if self.__responseCache is not None:
+            self.__responseCache.store(url, self.__language, IMDBResponseAsString,
+                                       IMDBResponse.headers.get('etag'),
+                                       IMDBResponse.headers.get('last-modified'))
+
+        return IMDBResponse.content
+
+    def __passContent(self, content, contentConsumer):
+        """passes the content to the consumer, if one is given, otherwise
+           returns it"""
+
+        if contentConsumer is None:
+            return content
+
+        contentConsumer(content)
+
+class MovieFileSidecar:
+    """The base of the files kept next to a movie file. As long as the movie
+       file only grows, they are brought up to date by reading just the lines
+       appended since they were last updated"""
+
+    """the number of bytes at the start and at the end of the indexed part
+       of the movie file, which are compared to notice edits in place"""
+    __checkedBytes = 4096
+
+    def __init__(self, movieFilePath):
+        self.__movieFilePath = movieFilePath
+        self.__readOnly = False
+
+    def setReadOnly(self, readOnly):
+        """set, whether the sidecar file is only read, a sidecar file which is
+           missing or out of date is then brought up to date in memory only"""
+        self.__readOnly = readOnly
+
+    def isReadOnly(self):
+        """returns, whether the sidecar file is only read"""
+        return self.__readOnly
+
+    def onlyGrewSince(self, header, movieFileStatus):
+        """returns, whether the part of the movie file described by the
+           header of the sidecar file is unchanged"""
+
+        if movieFileStatus.st_size < header['indexedSize']:
+            return False
+
+        if movieFileStatus.st_size == header['fileSize']:
+            # a file written without growing was edited in place, possibly
+            # between the parts the checksums cover
+            return movieFileStatus.st_mtime == header['modified']
+
+        return self.checksumsOf(header['indexedSize']) == header['checksums']
+
+    def checksumsOf(self, indexedSize):
+        """returns checksums of the start and the end of the indexed part of
+           the movie file"""
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            startOfFile = movieFile.read(min(self.__checkedBytes, indexedSize))
+            movieFile.seek(max(0, indexedSize - self.__checkedBytes))
+            endOfFile = movieFile.read(indexedSize - movieFile.tell())
+
+        return [hashlib.sha1(startOfFile).hexdigest(), hashlib.sha1(endOfFile).hexdigest()]
+
+    def headerFor(self, indexedSize, movieFileStatus, headerSize, **fields):
+        """returns the header of a sidecar file describing the movie file up
+           to the given size with the given additional fields, padded to the
+           given size, so it can be overwritten in place"""
+
+        fields.update({'indexedSize': indexedSize,
+                       'fileSize': movieFileStatus.st_size,
+                       'modified': movieFileStatus.st_mtime,
+                       'checksums': self.checksumsOf(indexedSize)})
+
+        return json.dumps(fields).ljust(headerSize - 1) + '\n'
+
+def arrayTypeOfSize(size):
+    """returns the type code of the integer arrays whose items take the
+       given number of bytes or None, if there is none on the platform"""
+
+    for eachType in 'lLqQ':
+        try:
+            if array.array(eachType).itemsize == size:
+                return eachType
+        except ValueError:
+            pass
+
+    return None
+
+class MovieKeySet:
+    """A set of movies holding only a hash of every movie, the form the
+       MovieFileIndex stores them in. Movies with the same hash are taken as
+       the same movie, which for hashes of 64 bits is unlikely even among
+       millions of movies. The hashes of an index are kept as the sorted
+       array they are read in and looked up by bisection, only hashes added
+       later are kept in a set"""
+
+    """the number of bytes of a hash, on every platform"""
+    keySize = 8
+
+    """the type of the array items the hashes are packed in or None, if no
+       array type holds 64 bits and the hashes are kept in a list instead"""
+    keyType = arrayTypeOfSize(keySize)
+
+    def __init__(self, sortedKeys=None, keys=()):
+        self.__sortedKeys = sortedKeys if sortedKeys is not None else self.keyArray()
+        self.__keys = set()
+        self.__addKeys(keys)
+
+    @classmethod
+    def keyArray(cls, keys=()):
+        """returns the given hashes packed in an array"""
+
+        if cls.keyType is None:
+            return list(keys)
+
+        return array.array(cls.keyType, keys)
+
+    @classmethod
+    def keysOf(cls, encodedMovies):
+        """returns the hashes of the given UTF-8 encoded movies packed in an
+           array"""
+        return cls.unpackKeys(''.join(hashlib.md5(eachMovie).digest()[:cls.keySize] for eachMovie in encodedMovies))
+
+    @classmethod
+    def unpackKeys(cls, packedKeys):
+        """returns the hashes stored in the given bytes in an array"""
+
+        if cls.keyType is None:
+            return list(struct.unpack('=%iq' % (len(packedKeys) // cls.keySize), packedKeys))
+
+        keys = array.array(cls.keyType)
+        keys.fromstring(packedKeys)
+
+        return keys
+
+    @classmethod
+    def packKeys(cls, keys):
+        """returns the bytes the given array of hashes is stored in"""
+
+        if cls.keyType is None:
+            return struct.pack('=%iq' % len(keys), *keys)
+
+        return keys.tostring()
+
+    def __contains__(self, movie):
+        return self.__containsKey(self.keysOf([movie.encode('utf8')])[0])
+
+    def __len__(self):
+        return len(self.__sortedKeys) + len(self.__keys)
+
+    def update(self, movies):
+        """adds the given movies to the set"""
+        self.__addKeys(self.keysOf(eachMovie.encode('utf8') for eachMovie in movies))
+
+    def __addKeys(self, keys):
+        """adds the hashes not contained yet to the set of added hashes"""
+        self.__keys.update(eachKey for eachKey in keys if not self.__containsKey(eachKey))
+
+    def __containsKey(self, key):
+        """returns, whether the hash is among the sorted or the added hashes"""
+
+        if key in self.__keys:
+            return True
+
+        index = bisect.bisect_left(self.__sortedKeys, key)
+
+        return index < len(self.__sortedKeys) and self.__sortedKeys[index] == key
+
+class MovieFileIndex(MovieFileSidecar):
+    """Keeps the hashes of the movies of a movie file in a sidecar index file
+       next to it, so the movies in the file can be looked up without
+       reading it. As long as the movie file only grows, the index is
+       brought up to date by reading just the lines appended since it was
+       last updated. The last movie of the file and the lines following it
+       are not indexed, but read by every run, since they are read with
+       trailing white space removed"""
+
+    """the number of bytes reserved for the header of the index file"""
+    __headerSize = 512
+
+    """the share of the sorted hashes the hashes appended unsorted may reach,
+       before the index is written sorted again"""
+    __maximumUnsortedShare = 0.125
+
+    """the number of hashes that may always be appended unsorted"""
+    __minimumKeysToSort = 4096
+
+    """the number of bytes of the movie file read at once"""
+    __readBlockSize = 1024 * 1024
+
+    __logger = None
+
+    def __init__(self, movieFilePath):
+        MovieFileSidecar.__init__(self, movieFilePath)
+
+        self.__logger = logging.getLogger('goodmovies')
+        self.__movieFilePath = movieFilePath
+        self.__indexFilePath = movieFilePath + '.idx'
+
+    def readMovieKeys(self):
+        """returns a MovieKeySet of the movies contained in the movie file
+           like they would be read from it, raises IOError or OSError if it
+           is not readable"""
+
+        movieFileStatus = os.stat(self.__movieFilePath)
+        header, indexedKeys = self.__readIndex()
+
+        if indexedKeys is not None and self.onlyGrewSince(header, movieFileStatus):
+            appendedKeys, lastLines, indexedSize = self.__readLinesFrom(header['indexedSize'])
+
+            self.__logger.info('Index of file "%s" contains %i movies, read %i bytes appended since',
+                               self.__movieFilePath,
+                               len(indexedKeys),
+                               movieFileStatus.st_size - header['indexedSize'])
+
+            sortedKeys = indexedKeys[:header['sortedKeys']]
+            unsortedKeys = indexedKeys[header['sortedKeys']:]
+            unsortedKeys.extend(appendedKeys)
+
+            if len(unsortedKeys) > max(self.__minimumKeysToSort, len(sortedKeys) * self.__maximumUnsortedShare):
+                self.__logger.info('Sorting index of file "%s"', self.__movieFilePath)
+                sortedKeys = self.__writeIndex(sortedKeys + unsortedKeys, indexedSize, movieFileStatus)
+                unsortedKeys = []
+            elif len(appendedKeys) > 0 or header['fileSize'] != movieFileStatus.st_size \
+                    or header['modified'] != movieFileStatus.st_mtime:
+                self.__appendToIndex(header, appendedKeys, indexedSize, movieFileStatus)
+        else:
+            self.__logger.info('Building index of file "%s"', self.__movieFilePath)
+
+            indexedKeys, lastLines, indexedSize = self.__readLinesFrom(0)
+            sortedKeys = self.__writeIndex(indexedKeys, indexedSize, movieFileStatus)
+            unsortedKeys = []
+
+        movieKeys = MovieKeySet(sortedKeys, unsortedKeys)
+        movieKeys.update(self.__asReadFromFile(lastLines))
+
+        return movieKeys
+
+    def __readLinesFrom(self, offset):
+        """reads the movie file from the given offset block by block and
+           returns the hashes of the lines before the last line that is not
+           blank, the lines from there on and the offset of the first of them"""
+
+        keys = MovieKeySet.keyArray()
+        indexedSize = offset
+
+        # the last line which is not blank and the lines following it are
+        # held back, until a line which is not blank follows them
+        heldLines = []
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            movieFile.seek(offset)
+            pendingBytes = ''
+
+            for eachBlock in iter(lambda: movieFile.read(self.__readBlockSize), ''):
+                content = pendingBytes + eachBlock
+
+                # a "\r" ending the block may be followed by "\n" in the next
+                if content.endswith('\r'):
+                    completeLines, pendingBytes = self.__splitLines(content[:-1])
+                    pendingBytes += '\r'
+                else:
+                    completeLines, pendingBytes = self.__splitLines(content)
+
+                indexedSize += self.__holdBackLines(completeLines, heldLines, keys)
+
+        completeLines, incompleteLine = self.__splitLines(pendingBytes)
+        indexedSize += self.__holdBackLines(completeLines, heldLines, keys)
+
+        return (keys,
+                [eachLine.decode('utf8') for eachLine, eachLineEnd in heldLines] + [incompleteLine.decode('utf8')],
+                indexedSize)
+
+    def __splitLines(self, content):
+        """returns the complete lines of the content together with their line
+           ends and the incomplete line following them. Like reading the file
+           in text mode, line ends of "\r\n", "\r" and "\n" are recognized"""
+
+        # the split keeps the line ends at odd positions
+        linesAndEnds = re.split('(\r\n|\r|\n)', content)
+
+        return zip(linesAndEnds[0:-1:2], linesAndEnds[1::2]), linesAndEnds[-1]
+
+    def __holdBackLines(self, lines, heldLines, keys):
+        """adds the hashes of the held back lines followed by a line which is
+           not blank to the keys and holds back the lines from the last such
+           line on instead, returns the number of bytes of the lines hashed"""
+
+        lastNotBlank = None
+
+        for eachIndex in range(len(lines) - 1, -1, -1):
+            if not self.__isBlank(lines[eachIndex][0]):
+                lastNotBlank = eachIndex
+                break
+
+        if lastNotBlank is None:
+            heldLines.extend(lines)
+            return 0
+
+        linesToHash = heldLines + lines[:lastNotBlank]
+        heldLines[:] = lines[lastNotBlank:]
+
+        keys.extend(MovieKeySet.keysOf(eachLine for eachLine, eachLineEnd in linesToHash))
+
+        return sum(len(eachLine) + len(eachLineEnd) for eachLine, eachLineEnd in linesToHash)
+
+    def __isBlank(self, line):
+        """returns, whether the UTF-8 encoded line consists of white space only"""
+
+        strippedLine = line.strip()
+
+        # only lines starting with other than printable ASCII characters
+        # need decoding to tell
+        if strippedLine == '':
+            return True
+
+        if ' ' < strippedLine[0] < '\x80':
+            return False
+
+        return line.decode('utf8').strip() == u''
+
+    def __readIndex(self):
+        """returns the header of the index file and the hashes stored in it,
+           None for both, if there is no usable index"""
+
+        try:
+            with io.open(self.__indexFilePath, 'rb') as indexFile:
+                # runs updating the index in place hold it locked exclusively
+                fcntl.flock(indexFile.fileno(), fcntl.LOCK_SH)
+
+                header = self.__readHeader(indexFile)
+
+                if header is None:
+                    return None, None
+
+                packedKeys = indexFile.read(header['keys'] * MovieKeySet.keySize)
+        except IOError:
+            return None, None
+
+        if len(packedKeys) != header['keys'] * MovieKeySet.keySize:
+            return None, None
+
+        return header, MovieKeySet.unpackKeys(packedKeys)
+
+    def __readHeader(self, indexFile):
+        """returns the header read from the start of the open index file or
+           None, if it is not usable"""
+
+        indexFile.seek(0)
+
+        try:
+            header = json.loads(indexFile.read(self.__headerSize))
+        except ValueError:
+            return None
+
+        # indexes of other machines or of earlier versions are built again
+        if header.get('keySize') != MovieKeySet.keySize or header.get('byteOrder') != sys.byteorder \
+                or 'sortedKeys' not in header:
+            return None
+
+        return header
+
+    def __headerFor(self, numberOfKeys, numberOfSortedKeys, indexedSize, movieFileStatus):
+        """returns the header of the index file holding the given number of
+           hashes, starting with the given number of sorted hashes"""
+
+        return self.headerFor(indexedSize, movieFileStatus, self.__headerSize,
+                              keys=numberOfKeys,
+                              sortedKeys=numberOfSortedKeys,
+                              keySize=MovieKeySet.keySize,
+                              byteOrder=sys.byteorder)
+
+    def __writeIndex(self, keys, indexedSize, movieFileStatus):
+        """writes a new index file containing the given hashes sorted and
+           returns them, an index which can not be written is built again by
+           the next run"""
+
+        sortedKeys = MovieKeySet.keyArray(sorted(set(keys)))
+
+        if self.isReadOnly():
+            return sortedKeys
+
+        try:
+            writeFileAtomically(self.__indexFilePath,
+                                self.__headerFor(len(sortedKeys), len(sortedKeys), indexedSize, movieFileStatus),
+                                MovieKeySet.packKeys(sortedKeys))
+        except (IOError, OSError) as e:
+            self.__logger.warning('Could not write index of file "%s": %s', self.__movieFilePath, e)
+
+        return sortedKeys
+
+    def __appendToIndex(self, header, keys, indexedSize, movieFileStatus):
+        """appends the given hashes to the index file and updates its header,
+           unless another run changed the index since it was read"""
+
+        if self.isReadOnly():
+            return
+
+        try:
+            with io.open(self.__indexFilePath, 'r+b') as indexFile:
+                fcntl.flock(indexFile.fileno(), fcntl.LOCK_EX)
+
+                # an index sorted by another run replaces the file, and its
+                # hashes must not be overwritten with those read from the old
+                # one, the next run brings it up to date instead
+                if self.__readHeader(indexFile) != header:
+                    self.__logger.info('Index of file "%s" was changed by another run', self.__movieFilePath)
+                    return
+
+                indexFile.seek(self.__headerSize + header['keys'] * MovieKeySet.keySize)
+                indexFile.write(MovieKeySet.packKeys(keys))
+
+                # the header is updated last, so an interrupted update at worst
+                # leaves hashes not counted by the header, which are overwritten
+                indexFile.seek(0)
+                indexFile.write(self.__headerFor(header['keys'] + len(keys), header['sortedKeys'],
+                                                 indexedSize, movieFileStatus))
+        except (IOError, OSError) as e:
+            self.__logger.warning('Could not update index of file "%s": %s', self.__movieFilePath, e)
+
+    def __asReadFromFile(self, lines):
+        """returns the lines like they are returned by reading the whole
+           movie file with trailing white space removed and splitting it"""
+
+        while len(lines) > 1 and lines[-1].strip() == u'':
+            lines.pop()
+
+        lines[-1] = lines[-1].rstrip()
+
+        return lines
+
+class MovieFileBloomFilter(MovieFileSidecar):
+    """Keeps a Bloom filter of the movies of a movie file in a sidecar file
+       next to it. It tells for sure, that a movie is not contained in the
+       movie file, without holding the movies in memory, while a movie it
+       may contain has to be looked up in the movie file itself"""
+
+    """the number of bytes reserved for the header of the filter file"""
+    __headerSize = 256
+
+    """the number of bits per movie, which together with the number of
+       hashes makes about one of hundred movies not contained look contained"""
+    __bitsPerMovie = 10
+
+    """the number of bits set per movie"""
+    __numberOfHashes = 7
+
+    """the number of movies a new filter has at least room for"""
+    __minimumCapacity = 1024
+
+    """the number of bytes of the movie file decoded at once"""
+    __readBlockSize = 1024 * 1024
+
+    __logger = None
+
+    def __init__(self, movieFilePath):
+        MovieFileSidecar.__init__(self, movieFilePath)
+
+        self.__logger = logging.getLogger('goodmovies')
+        self.__movieFilePath = movieFilePath
+        self.__filterFilePath = movieFilePath + '.bloom'
+
+        self.__bits = None
+        self.__capacity = 0
+        self.__numberOfMovies = 0
+
+    def update(self):
+        """brings the filter up to date with the movie file, raises IOError
+           or OSError if it is not readable"""
+
+        movieFileStatus = os.stat(self.__movieFilePath)
+        header = self.__readHeader()
+
+        if header is not None and self.onlyGrewSince(header, movieFileStatus):
+            self.__bits = self.__readBits()
+            self.__capacity = header['capacity']
+            self.__numberOfMovies = header['movies']
+
+            indexedSize, incompleteLine = self.__addLinesFrom(header['indexedSize'])
+
+            if self.__numberOfMovies > self.__capacity:
+                self.__logger.info('Filter of file "%s" is full, building it again', self.__movieFilePath)
+                indexedSize, incompleteLine = self.__build()
+                self.__write(indexedSize, os.stat(self.__movieFilePath))
+            elif indexedSize != header['indexedSize'] or header['fileSize'] != movieFileStatus.st_size \
+                    or header['modified'] != movieFileStatus.st_mtime:
+                self.__write(indexedSize, movieFileStatus)
+
+            self.__logger.info('Filter of file "%s" contains %i movies, read %i bytes appended since',
+                               self.__movieFilePath,
+                               self.__numberOfMovies,
+                               movieFileStatus.st_size - header['indexedSize'])
+        else:
+            self.__logger.info('Building filter of file "%s"', self.__movieFilePath)
+
+            indexedSize, incompleteLine = self.__build()
+            self.__write(indexedSize, movieFileStatus)
+
+        # the incomplete last line may still grow, so it is not stored, and a
+        # file without movies is read as a single empty movie
+        self.__addLines(incompleteLine + u'\n')
+        self.__addMovies([u''])
+
+    def __contains__(self, movie):
+        """returns, whether the movie may be contained in the movie file"""
+
+        for eachPosition in self.__positionsOf(movie):
+            if not self.__bits[eachPosition >> 3] & (1 << (eachPosition & 7)):
+                return False
+
+        return True
+
+    def __build(self):
+        """creates a new filter with room for twice the lines of the movie
+           file and adds them, returns the offset after the last complete
+           line and the incomplete last line"""
+
+        numberOfLines = 0
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            for eachBlock in iter(lambda: movieFile.read(self.__readBlockSize), ''):
+                numberOfLines += eachBlock.count('\n') + eachBlock.count('\r')
+
+        self.__capacity = max(self.__minimumCapacity, 2 * numberOfLines)
+        self.__bits = bytearray((self.__capacity * self.__bitsPerMovie + 7) // 8)
+        self.__numberOfMovies = 0
+
+        return self.__addLinesFrom(0)
+
+    def __addLinesFrom(self, offset):
+        """adds the complete lines of the movie file from the given offset,
+           returns the offset after the last complete line and the
+           incomplete last line"""
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            movieFile.seek(offset)
+            pendingBytes = ''
+
+            for eachBlock in iter(lambda: movieFile.read(self.__readBlockSize), ''):
+                content = pendingBytes + eachBlock
+                endOfCompleteLines = content.rfind('\n') + 1
+
+                self.__addLines(content[:endOfCompleteLines].decode('utf8'))
+
+                offset += endOfCompleteLines
+                pendingBytes = content[endOfCompleteLines:]
+
+        return offset, pendingBytes.decode('utf8')
+
+    def __addLines(self, lines):
+        """adds the movies of the given complete lines"""
+
+        # like reading the file in text mode, line ends of "\r\n" and "\r"
+        # are read as "\n"
+        if u'\r' in lines:
+            lines = lines.replace(u'\r\n', u'\n').replace(u'\r', u'\n')
+
+        self.__addMovies(lines.split(u'\n')[:-1])
+
+    def __addMovies(self, movies):
+        """adds the movies, with their trailing white space removed as well,
+           like it is from the last movie read from the movie file"""
+
+        bits = self.__bits
+
+        for eachMovie in movies:
+            for eachPosition in self.__positionsOf(eachMovie):
+                bits[eachPosition >> 3] |= 1 << (eachPosition & 7)
+
+            strippedMovie = eachMovie.rstrip()
+
+            if strippedMovie != eachMovie:
+                for eachPosition in self.__positionsOf(strippedMovie):
+                    bits[eachPosition >> 3] |= 1 << (eachPosition & 7)
+
+        self.__numberOfMovies += len(movies)
+
+    def __positionsOf(self, movie):
+        """returns the bits of the movie, derived from two halves of a single
+           hash of it"""
+
+        firstHash, secondHash = struct.unpack('<QQ', hashlib.md5(movie.encode('utf8')).digest())
+        numberOfBits = len(self.__bits) * 8
+
+        return [(firstHash + eachHash * secondHash) % numberOfBits for eachHash in range(self.__numberOfHashes)]
+
+    def __readHeader(self):
+        """returns the header of the filter file or None, if there is no
+           usable filter"""
+
+        try:
+            with io.open(self.__filterFilePath, 'rb') as filterFile:
+                return json.loads(filterFile.read(self.__headerSize))
+        except (IOError, ValueError):
+            return None
+
+    def __readBits(self):
+        """returns the bits stored in the filter file"""
+
+        with io.open(self.__filterFilePath, 'rb') as filterFile:
+            filterFile.seek(self.__headerSize)
+            return bytearray(filterFile.read())
+
+    def __write(self, indexedSize, movieFileStatus):
+        """writes the filter of the movie file up to the given size"""
+
+        if self.isReadOnly():
+            return
+
+        try:
+            writeFileAtomically(self.__filterFilePath,
+                                self.headerFor(indexedSize, movieFileStatus, self.__headerSize,
+                                               capacity=self.__capacity,
+                                               movies=self.__numberOfMovies),
+                                self.__bits)
+        except (IOError, OSError) as e:
+            # the filter in memory is still up to date, the next run builds it again
+            self.__logger.warning('Could not write filter of file "%s": %s', self.__movieFilePath, e)
+
+class FuzzyKeyNormalizer:
+    """Converts movies into their fuzzily comparable form by decomposing
+       accented characters, removing everything but letters and digits and
+       converting to lower case. The most recently converted movies are
+       remembered, while whole lists are converted in a single pass"""
+
+    """the characters removed from the movies"""
+    __nonAlphanumericCharacters = re.compile(r'[\W_]+', re.UNICODE)
+
+    """the characters removed from movies joined by new lines"""
+    __nonAlphanumericCharactersOrNewLines = re.compile(r'[^\w\n]+|_+', re.UNICODE)
+
+    """the number of movies converted in a single pass"""
+    __batchSize = 10000
+
+    __logger = None
+
+    def __init__(self, maximumSize=100000):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__maximumSize = maximumSize
+        self.__comparableMovies = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.convertedInBatches = 0
+
+    def normalize(self, movie):
+        """returns the fuzzily comparable form of the movie"""
+
+        try:
+            comparableMovie = self.__comparableMovies.pop(movie)
+            self.hits += 1
+        except KeyError:
+            comparableMovie = self.__normalizeUncached(movie)
+            self.misses += 1
+
+            if len(self.__comparableMovies) >= self.__maximumSize:
+                self.__comparableMovies.popitem(last=False)
+
+        # the movie is remembered as the most recently converted one
+        self.__comparableMovies[movie] = comparableMovie
+
+        return comparableMovie
+
+    def normalizeAll(self, movies):
+        """yields the fuzzily comparable forms of all the movies, converting
+           batches of them at once instead of remembering them"""
+
+        batch = []
+
+        for eachMovie in movies:
+            batch.append(eachMovie)
+
+            if len(batch) == self.__batchSize:
+                for eachComparableMovie in self.__normalizeBatch(batch):
+                    yield eachComparableMovie
+
+                batch = []
+
+        for eachComparableMovie in self.__normalizeBatch(batch):
+            yield eachComparableMovie
+
+    def logStatistics(self):
+        """logs how often converted movies were remembered"""
+
+        self.__logger.debug('Fuzzily comparable movies: %i remembered, %i converted one by one, %i converted in batches',
+                            self.hits,
+                            self.misses,
+                            self.convertedInBatches)
+
+    def __normalizeBatch(self, movies):
+        """returns the fuzzily comparable forms of the movies, converted by
+           joining them with new lines"""
+
+        if len(movies) == 0:
+            return []
+
+        joinedMovies = u'\n'.join(unicode(eachMovie) for eachMovie in movies)
+
+        if joinedMovies.count(u'\n') != len(movies) - 1:
+            # movies containing new lines are converted one by one
+            return [self.__normalizeUncached(eachMovie) for eachMovie in movies]
+
+        self.convertedInBatches += len(movies)
+
+        decomposedMovies = unicodedata.normalize('NFKD', joinedMovies)
+        return self.__nonAlphanumericCharactersOrNewLines.sub(u'', decomposedMovies).lower().split(u'\n')
+
+    def __normalizeUncached(self, movie):
+        """returns the fuzzily comparable form of a single movie"""
+
+        # accents are decomposed into characters of their own, which are no
+        # letters and are removed together with spaces and signs
+        decomposedMovie = unicodedata.normalize('NFKD', unicode(movie))
+        return self.__nonAlphanumericCharacters.sub(u'', decomposedMovie).lower()
+
+class FuzzyMovieIndex:
+    """Finds movies approximately matching a given movie among many movies,
+       both in their fuzzily comparable form. Movies match if their edit
+       distance relative to the longer one is small enough. To avoid comparing
+       each movie with every other, only movies sharing enough trigrams are
+       compared"""
+
+    """the number of characters of the grams the movies are indexed by"""
+    __gramSize = 3
+
+    __logger = None
+
+    def __init__(self, comparableMovies, similarityThreshold):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__similarityThreshold = similarityThreshold
+
+        self.__exactMovies = comparableMovies
+        self.__movies = list(comparableMovies)
+        self.__moviesByGram = {}
+        self.__moviesByLength = {}
+
+        for movieNumber, eachMovie in enumerate(self.__movies):
+            for eachGram in self.__gramsOf(eachMovie):
+                self.__moviesByGram.setdefault(eachGram, []).append(movieNumber)
+
+            self.__moviesByLength.setdefault(len(eachMovie), []).append(movieNumber)
+
+    def __contains__(self, comparableMovie):
+        """returns, whether a movie approximately matching the given one is
+           contained"""
+
+        if comparableMovie in self.__exactMovies:
+            return True
+
+        # a movie of length n matches, if its distance d satisfies
+        # d <= (1 - threshold) * (n + d)
+        maximumDistance = self.__distanceAllowedFor(len(comparableMovie) / self.__similarityThreshold)
+
+        if maximumDistance == 0:
+            return False
+
+        for eachCandidate in self.__candidatesFor(comparableMovie, maximumDistance):
+            distanceAllowed = self.__distanceAllowedFor(max(len(comparableMovie), len(eachCandidate)))
+
+            if abs(len(comparableMovie) - len(eachCandidate)) > distanceAllowed:
+                continue
+
+            if self.__isWithinDistance(comparableMovie, eachCandidate, distanceAllowed):
+                self.__logger.debug('Movie "%s" approximately matches "%s"', comparableMovie, eachCandidate)
+                return True
+
+        return False
+
+    def __candidatesFor(self, comparableMovie, maximumDistance):
+        """returns the movies which may be within the given distance"""
+
+        grams = self.__gramsOf(comparableMovie)
+
+        # every edit changes at most three trigrams, so a matching movie
+        # shares at least this many trigrams and therefore at least one of
+        # the least common trigrams of the movie, except for the others
+        sharedGramsRequired = len(grams) - self.__gramSize * maximumDistance
+
+        if sharedGramsRequired <= 0:
+            movieNumbers = set()
+
+            for eachLength in range(len(comparableMovie) - maximumDistance, len(comparableMovie) + maximumDistance + 1):
+                movieNumbers.update(self.__moviesByLength.get(eachLength, ()))
+        else:
+            gramsByFrequency = sorted(grams, key=lambda eachGram: len(self.__moviesByGram.get(eachGram, ())))
+            movieNumbers = set()
+
+            for eachGram in gramsByFrequency[:len(grams) - sharedGramsRequired + 1]:
+                movieNumbers.update(self.__moviesByGram.get(eachGram, ()))
+
+        return [self.__movies[eachMovieNumber] for eachMovieNumber in movieNumbers]
+
+    def __distanceAllowedFor(self, length):
+        """returns the edit distance allowed for a movie of the given length"""
+        return int((1 - self.__similarityThreshold) * length + 1e-9)
+
+    def __gramsOf(self, comparableMovie):
+        """returns the distinct trigrams of the movie padded at both ends"""
+
+        paddedMovie = u'\0\0' + comparableMovie + u'\0\0'
+
+        return set(paddedMovie[eachStart:eachStart + self.__gramSize]
+                   for eachStart in range(len(paddedMovie) - self.__gramSize + 1))
+
+    def __isWithinDistance(self, firstMovie, secondMovie, maximumDistance):
+        """returns, whether the Levenshtein distance of the movies is at most
+           the given one, stopping as soon as it is exceeded"""
+
+        previousRow = range(len(secondMovie) + 1)
+
+        for firstIndex, firstCharacter in enumerate(firstMovie, 1):
+            currentRow = [firstIndex]
+
+            for secondIndex, secondCharacter in enumerate(secondMovie, 1):
+                currentRow.append(min(previousRow[secondIndex] + 1,
+                                      currentRow[secondIndex - 1] + 1,
+                                      previousRow[secondIndex - 1] + (firstCharacter != secondCharacter)))
+
+            if min(currentRow) > maximumDistance:
+                return False
+
+            previousRow = currentRow
+
+        return previousRow[-1] <= maximumDistance
+
+class ParallelMovieFileReader:
+    """Reads the comparable movies of a large movie file with several
+       processes. The file is split into byte ranges at line ends, each
+       process converts the movies of a range and returns their distinct
+       comparable forms, which are combined into a single set"""
+
+    """the number of bytes at the end of the file searched at once for
+       the last character not being white space"""
+    __tailSize = 64 * 1024
+
+    def __init__(self, movieFilePath, processes):
+        self.__movieFilePath = movieFilePath
+        self.__processes = processes
+
+    def readComparableMovies(self, comparison):
+        """returns the set of the comparable forms of the movies in the
+           file like they would be read from it, either "exact" or "fuzzy"
+           ones. Raises IOError or OSError if the file is not readable"""
+
+        import multiprocessing
+
+        endOfMovies = self.__endOfMovies()
+
+        if endOfMovies == 0:
+            # a file without movies is read as a single empty movie
+            return set(readComparableMoviesInRange(self.__movieFilePath, 0, 0, comparison).split(u'\n'))
+
+        ranges = self.__rangesUpTo(endOfMovies)
+        pool = multiprocessing.Pool(min(self.__processes, len(ranges)))
+
+        try:
+            joinedComparableMovies = pool.map(readComparableMoviesInRangeOf, [(self.__movieFilePath, eachStart, eachEnd, comparison)
+                                                                              for eachStart, eachEnd in ranges])
+        finally:
+            pool.close()
+            pool.join()
+
+        comparableMovies = set()
+
+        for eachJoinedComparableMovies in joinedComparableMovies:
+            comparableMovies.update(eachJoinedComparableMovies.split(u'\n'))
+
+        return comparableMovies
+
+    def __endOfMovies(self):
+        """returns the offset after the last character of the file, which is
+           not white space, like removed when reading the whole file"""
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            tailEnd = os.fstat(movieFile.fileno()).st_size
+
+            while tailEnd > 0:
+                readStart = max(0, tailEnd - self.__tailSize)
+                movieFile.seek(readStart)
+                tail = movieFile.read(tailEnd - readStart)
+
+                # the tail is decoded from the start of a character, the bytes
+                # of a character cut are searched with the next tail
+                tailStart = 0
+                while readStart > 0 and 0x80 <= ord(tail[tailStart]) < 0xc0:
+                    tailStart += 1
+
+                strippedTail = tail[tailStart:].decode('utf8').rstrip()
+
+                if strippedTail != u'':
+                    return readStart + tailStart + len(strippedTail.encode('utf8'))
+
+                tailEnd = readStart + tailStart
+
+        return 0
+
+    def __rangesUpTo(self, endOfMovies):
+        """returns the byte ranges of about the same size the file is split
+           into, which end after a line end or at the end of the movies"""
+
+        ranges = []
+        rangeStart = 0
+
+        with io.open(self.__movieFilePath, 'rb') as movieFile:
+            for eachRange in range(1, self.__processes):
+                movieFile.seek(max(rangeStart, endOfMovies * eachRange // self.__processes))
+                movieFile.readline()
+                rangeEnd = movieFile.tell()
+
+                if rangeEnd >= endOfMovies:
+                    break
+
+                if rangeEnd > rangeStart:
+                    ranges.append((rangeStart, rangeEnd))
+                    rangeStart = rangeEnd
+
+        ranges.append((rangeStart, endOfMovies))
+
+        return ranges
+
+def readComparableMoviesInRange(movieFilePath, start, end, comparison):
+    """returns the distinct "exact" or "fuzzy" comparable forms of the
+       movies in the byte range of the movie file joined by new lines. The
+       range starts at a line start and ends after a line end or at the end
+       of the movies"""
+
+    with io.open(movieFilePath, 'rb') as movieFile:
+        movieFile.seek(start)
+        content = movieFile.read(end - start).decode('utf8')
+
+    # like reading the file in text mode, line ends of "\r\n" and "\r" are
+    # read as "\n"
+    if u'\r' in content:
+        content = content.replace(u'\r\n', u'\n').replace(u'\r', u'\n')
+
+    if content.endswith(u'\n'):
+        content = content[:-1]
+
+    movies = content.split(u'\n')
+
+    if comparison == 'fuzzy':
+        comparableMovies = set(FuzzyKeyNormalizer().normalizeAll(movies))
+    else:
+        comparableMovies = set(movies)
+
+    return u'\n'.join(comparableMovies)
+
+def readComparableMoviesInRangeOf(arguments):
+    """calls readComparableMoviesInRange with the given tuple of arguments,
+       as a process pool passes a single argument"""
+    return readComparableMoviesInRange(*arguments)
+
+class ListSnapshots:
+    """Stores the movies of the lists fetched by the last run together with
+       the hashes of the content of the sites they were read from, in a file
+       per list, language and output file"""
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def load(self, listName, language, outputFileName):
+        """returns the snapshot stored for the list in the language written
+           to the output file or None, if none was stored"""
+
+        try:
+            with io.open(self.__pathFor(listName, language, outputFileName), 'r', encoding='utf8') as snapshotFile:
+                return json.load(snapshotFile)
+        except (IOError, ValueError):
+            return None
+
+    def store(self, listName, language, outputFileName, snapshot):
+        """stores the snapshot of the list in the language written to the
+           output file"""
+
+        writeFileAtomically(self.__pathFor(listName, language, outputFileName), json.dumps(snapshot, sort_keys=True))
+
+    def __pathFor(self, listName, language, outputFileName):
+        """returns the path of the snapshot of the list in the language
+           written to the output file, which is named by a hash of its path"""
+
+        outputFileKey = hashlib.sha1(outputFileName.encode('utf8')).hexdigest()[:12]
+
+        return os.path.join(self.__directory, listName + '.' + language + '.' + outputFileKey + '.json')
+
+class MovieRecordFile:
+    """Writes the movie records of lists to a file and reads them back, as
+       JSON lines, as CSV or in a columnar JSON format holding the values of
+       each field in a single list, which is the smallest and read fastest"""
+
+    """the formats the records may be written in"""
+    formats = ['jsonl', 'csv', 'columnar']
+
+    """the fields written for every movie"""
+    fields = ['list', 'language'] + list(MovieRecord._fields)
+
+    def __init__(self, path, fileFormat='jsonl'):
+        self.__path = path
+        self.__format = fileFormat
+
+    def write(self, listsRecords):
+        """replaces the file by the records of the given lists, given as
+           tuples of list, language and records"""
+
+        rows = [(listName, language) + tuple(eachRecord)
+                for listName, language, records in listsRecords
+                for eachRecord in records]
+
+        if self.__format == 'jsonl':
+            content = ''.join(json.dumps(collections.OrderedDict(zip(self.fields, eachRow))) + '\n'
+                              for eachRow in rows)
+        elif self.__format == 'csv':
+            import csv
+
+            csvContent = io.BytesIO()
+            csvWriter = csv.writer(csvContent)
+            csvWriter.writerow(self.fields)
+
+            for eachRow in rows:
+                csvWriter.writerow(['' if eachValue is None else unicode(eachValue).encode('utf8') for eachValue in eachRow])
+
+            content = csvContent.getvalue()
+        else:
+            content = json.dumps(collections.OrderedDict((eachField, [eachRow[eachIndex] for eachRow in rows])
+                                                         for eachIndex, eachField in enumerate(self.fields))) + '\n'
+
+        writeFileAtomically(self.__path, content)
+
+    def read(self):
+        """returns a tuple of list, language and MovieRecord for every movie
+           in the file"""
+
+        with io.open(self.__path, 'rb') as recordFile:
+            if self.__format == 'jsonl':
+                rows = [[eachObject.get(eachField) for eachField in self.fields]
+                        for eachObject in (json.loads(eachLine) for eachLine in recordFile if eachLine.strip())]
+            elif self.__format == 'csv':
+                import csv
+
+                csvRows = csv.reader(recordFile)
+                next(csvRows)
+                rows = [self.__typedRow([eachValue.decode('utf8') for eachValue in eachRow]) for eachRow in csvRows]
+            else:
+                columns = json.load(recordFile)
+                rows = zip(*[columns[eachField] for eachField in self.fields])
+
+        return [(eachRow[0], eachRow[1], MovieRecord(*eachRow[2:])) for eachRow in rows]
+
+    def __typedRow(self, row):
+        """returns the values of a row of the CSV file with the types of the
+           fields, empty values are None"""
+
+        listName, language, rank, title, year, rating, imdbID = [eachValue if eachValue != u'' else None
+                                                                 for eachValue in row]
+
+        return [listName,
+                language,
+                int(rank) if rank is not None else None,
+                title or u'',
+                int(year) if year is not None else None,
+                float(rating) if rating is not None else None,
+                imdbID]
+
+class RecordFileScraper(MovieListScraper):
+    """Reads movie lists from record files in a local directory, e.g. lists
+       exported by another run or kept by hand. The list "<name>" is read
+       from the file <name>.jsonl, <name>.csv or <name>.columnar, taking the
+       records in the language of the scraper and those without a language
+       in the order of their rank"""
+
+    """the directory the record files are read from"""
+    __directory = '.'
+
+    """the language of the records read"""
+    __language = "en-US"
+
+    __logger = None
+
+    def __init__(self):
+        self.__logger = logging.getLogger('goodmovies')
+        self.__metrics = RunMetrics()
+
+        self.__knownPages = {}
+        self.__loadedPages = {}
+
+    @classmethod
+    def knowsList(cls, listName):
+        """returns whether the name may be the name of a record file"""
+        return re.match(r'^\w[\w-]*$', listName) is not None
+
+    def configure(self, commandLineArguments):
+        """set the directory given on the command line"""
+        self.setDirectory(commandLineArguments.sourcedir)
+
+    def setDirectory(self, directory):
+        """set the directory the record files are read from"""
+        self.__directory = directory
+
+    def setLanguage(self, language):
+        """set the language of the records read"""
+        self.__language = language
+
+    def setMetrics(self, metrics):
+        """set the metrics the titles read are counted in"""
+        self.__metrics = metrics
+
+    def setKnownPages(self, knownPages):
+        """set the hashes of the content and the movie records of files read
+           before by their path, the records are taken again instead of
+           reading a file with the same content"""
+        self.__knownPages = knownPages
+
+    def getLoadedPages(self):
+        """returns the hashes of the content and the movie records of the
+           file read by the last load by its path"""
+        return dict(self.__loadedPages)
+
+    def __recordFileOf(self, listName):
+        """returns the path and the format of the record file of the list or
+           None, if there is none"""
+
+        for eachFormat in MovieRecordFile.formats:
+            path = os.path.join(self.__directory, listName + '.' + eachFormat)
+
+            if os.path.isfile(path):
+                return path, eachFormat
+
+        return None
+
+    def hasList(self, listName):
+        """returns whether the directory contains a record file of the list"""
+        return self.__recordFileOf(listName) is not None
+
+    def loadList(self, listName, count):
+        """reads the record file of the list and returns up to count
+           MovieRecords"""
+
+        self.__loadedPages = {}
+
+        recordFile = self.__recordFileOf(listName)
+
+        if recordFile is None:
+            self.__logger.error('No record file for list %s in directory %s', listName, self.__directory)
+            return []
+
+        path, recordFormat = recordFile
+
+        with io.open(path, 'rb') as recordFile:
+            contentHash = hashlib.sha1(recordFile.read()).hexdigest()
+
+        knownPage = self.__knownPages.get(path)
+
+        if knownPage is not None and knownPage[0] == contentHash:
+            self.__logger.debug('Record file "%s" did not change, taking its known records', path)
+            records = knownPage[1]
+        else:
+            with self.__metrics.measure('parse'):
+                records = [eachRecord
+                           for eachListName, eachLanguage, eachRecord in MovieRecordFile(path, recordFormat).read()
+                           if eachLanguage in (None, self.__language)]
+
+                # records without a rank follow the ranked ones in file order
+                records.sort(key=lambda eachRecord: eachRecord.rank if eachRecord.rank is not None else sys.maxint)
+                records = [eachRecord._replace(rank=eachRank) for eachRank, eachRecord in enumerate(records, 1)]
+
+            self.__metrics.count('titlesParsed', len(records))
+
+        self.__loadedPages[path] = (contentHash, records)
+
+        return records[:count]
+
+class ScraperRegistry:
+    """Knows the scrapers of the sites movie lists are read from by the
+       prefix of the list names, e.g. "imdb" for the list "imdb_top250", so a
+       site is added by registering its MovieListScraper"""
+
+    def __init__(self):
+        self.__scraperClasses = collections.OrderedDict()
+
+    def register(self, source, scraperClass):
+        """registers the scraper class reading the lists "<source>_<name>" """
+        self.__scraperClasses[source] = scraperClass
+
+    def sourceOf(self, listName):
+        """returns the source of the list with the given name or None, if no
+           registered scraper knows the list"""
+
+        source, separator, sourceListName = listName.partition('_')
+        scraperClass = self.__scraperClasses.get(source)
+
+        if separator == '' or scraperClass is None or not scraperClass.knowsList(sourceListName):
+            return None
+
+        return source
+
+    def createScraper(self, listName):
+        """returns a new scraper for the list with the given name"""
+        return self.__scraperClasses[listName.partition('_')[0]]()
+
+    def siteListNameOf(self, listName):
+        """returns the name the list with the given name has within its site,
+           e.g. "top250" for "imdb_top250" """
+        return listName.partition('_')[2]
+
+    def describeLists(self):
+        """returns the names of the lists of all registered scrapers for
+           help texts"""
+
+        return ', '.join(', '.join(source + '_' + eachName for eachName in scraperClass.listNames)
+                         if len(scraperClass.listNames) > 0 else source + '_<name>'
+                         for source, scraperClass in self.__scraperClasses.items())
+
+"""the scrapers of the sites movie lists can be read from"""
+scraperRegistry = ScraperRegistry()
+scraperRegistry.register('imdb', IMDBScraper)
+scraperRegistry.register('file', RecordFileScraper)
+
+class GoodMoviesRunner:
+    """the main class of the script"""
+
+    """the number of bytes of a movie file decoded at once"""
+    __readBlockSize = 1024 * 1024
+
+    """the number of bytes a movie file must have to be read by several
+       processes, smaller files are read faster than the processes start"""
+    __minimumSizeToReadInParallel = 4 * 1024 * 1024
+
+    """the extension of the file next to the output file keeping the imdb
+       ids of the movies written to it"""
+    __idFileExtension = '.ids'
+
+    """the exit status of a check, if no movies would be added"""
+    checkUnchanged = 0
+
+    """the exit status of a check, if movies would be added"""
+    checkChanged = 1
+
+    """the exit status of a check, if a site is not fresh in the cache"""
+    checkUnknown = 2
+
+    __logger = None
+
+    def __init__(self):
+        self.__logger = logging.getLogger('goodmovies')
+
+        # a run may execute several jobs, which share the scrapers, the
+        # movies fetched and the movies read from files
+        self.__fetchBackend = None
+        self.__responseCache = None
+        self.__scrapers = {}
+        self.__fetchedMovies = {}
+        self.__fetchedRecords = {}
+        self.__fetchedPages = {}
+        self.__comparableMoviesInFiles = {}
+        self.__fuzzyIndexesOfFiles = {}
+        self.__fileStatusesRead = {}
+        self.__fuzzyKeyNormalizer = FuzzyKeyNormalizer()
+        self.__metrics = RunMetrics()
+
+        # the exit status of a run with option --check
+        self.__checkStatus = self.checkUnchanged
+
+        # the lists fetched last, which a daemon answers queries from, and
+        # when lists and files were last used, so idle ones can be evicted
+        self.__currentLists = {}
+        self.__listsLastUsed = {}
+        self.__filesLastUsed = {}
+        self.__scrapersLastUsed = {}
+        self.__stopping = False
+
+    def execute(self):
+        """executes the scripts
+           * parses the command lines arguments
+           * reads the movies from the internet accordingly
+           * reads the movies already contained in the output file, if any
+           * determines the missing movies and appends them to the ouptut file
+           Returns the exit status of the script, which tells the result of
+           a check with option --check
+        """
+
+        commandLineArguments = self.__parseCommandLineArguments()
+
+        self.__initLogging(commandLineArguments)
+
+        self.__logger.info('GoodMovies started')
+
+        if commandLineArguments.profile != '':
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+            try:
+                self.__executeJobsOrServe(commandLineArguments)
+            finally:
+                profiler.disable()
+                profiler.dump_stats(commandLineArguments.profile)
+                self.__logger.info('Wrote profile of the run to file %s', commandLineArguments.profile)
+        else:
+            self.__executeJobsOrServe(commandLineArguments)
+
+        self.__logger.info('GoodMovies finished')
+
+        if commandLineArguments.check:
+            return self.__checkStatus
+
+        return 0
+
+    def getMetrics(self):
+        """returns the metrics of the run"""
+        return self.__metrics
+
+    def __executeJobsOrServe(self, commandLineArguments):
+        """executes all jobs once or, with option --daemon, regularly"""
+
+        if commandLineArguments.daemon:
+            self.__serve(commandLineArguments)
+        else:
+            self.__executeJobs(commandLineArguments)
+
+    def __executeJobs(self, commandLineArguments):
+        """executes all jobs and reports how long they took"""
+
+        self.__syncJobs(commandLineArguments, self.__readJobs(commandLineArguments))
+        self.__finishRun(commandLineArguments)
+
+    def __finishRun(self, commandLineArguments):
+        """closes the connections and reports the statistics of the run"""
+
+        if self.__fetchBackend is not None:
+            self.__fetchBackend.logStatistics()
+            self.__fetchBackend.close()
+
+        self.__fuzzyKeyNormalizer.logStatistics()
+
+        self.__reportMetrics(commandLineArguments)
+
+    def __syncJobs(self, commandLineArguments, jobs):
+        """executes the given jobs, logs how long they took and returns the
+           jobs with the number of movies written and the seconds they took"""
+
+        jobSummaries = []
+
+        # lists are fetched again by every sync, the sites themselves may
+        # still be taken from the cache
+        self.__fetchedMovies = {}
+        self.__fetchedRecords = {}
+        self.__fetchedPages = {}
+
+        if commandLineArguments.deltafile != '' and not commandLineArguments.check:
+            io.open(commandLineArguments.deltafile, 'wb').close()
+
+        for eachJob in jobs:
+            jobStartTime = time.time()
+
+            try:
+                moviesInserted = self.__executeJob(eachJob)
+            except CacheMissError as e:
+                # only raised while checking, the remaining jobs cannot
+                # change the result anymore then
+                self.__logger.info('%s, cannot check whether movies would be added', e)
+                self.__checkStatus = self.checkUnknown
+                break
+
+            jobSummaries.append((eachJob, moviesInserted, time.time() - jobStartTime))
+
+        self.__logJobSummaries(jobSummaries)
+
+        if commandLineArguments.exportfile != '' and not commandLineArguments.check:
+            self.__exportRecords(commandLineArguments, [eachJob for eachJob, moviesInserted, secondsNeeded in jobSummaries])
+
+        return jobSummaries
+
+    def __exportRecords(self, commandLineArguments, jobs):
+        """writes the records of the lists fetched for the given jobs to the
+           export file, every list once"""
+
+        listsRecords = []
+
+        for eachJob in jobs:
+            fetchKey = (eachJob.list, eachJob.language)
+
+            if fetchKey in self.__fetchedRecords and fetchKey not in [eachList[:2] for eachList in listsRecords]:
+                listsRecords.append(fetchKey + (self.__fetchedRecords[fetchKey],))
+
+        with self.__metrics.measure('write'):
+            MovieRecordFile(commandLineArguments.exportfile, commandLineArguments.exportformat).write(listsRecords)
+
+        self.__logger.info('Exported %i movies of %i lists to file %s',
+                           sum(len(eachList[2]) for eachList in listsRecords),
+                           len(listsRecords),
+                           commandLineArguments.exportfile)
+
+    def __serve(self, commandLineArguments):
+        """keeps running as daemon until it is stopped, executes the jobs
+           every refresh interval and answers the requests of other tools on
+           the unix socket, while the scrapers and the movies read from files
+           are kept in memory"""
+
+        import socket
+
+        socketPath = commandLineArguments.socket
+
+        self.__removeStaleSocket(socketPath)
+
+        serverSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        serverSocket.bind(socketPath)
+        serverSocket.listen(5)
+
+        def stop(signalNumber, frame):
+            self.__stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.__logger.info('Daemon listening on socket %s', socketPath)
+
+        nextSyncTime = time.time()
+
+        try:
+            while not self.__stopping:
+                if commandLineArguments.refresh > 0 and time.time() >= nextSyncTime:
+                    self.__answerRequest(commandLineArguments, {'command': 'sync'})
+                    nextSyncTime = time.time() + commandLineArguments.refresh
+
+                self.__evictIdleState(commandLineArguments.idletime)
+
+                # requests are answered one after another, so they never
+                # see the state of a sync in progress
+                serverSocket.settimeout(1.0)
+
+                try:
+                    connection, address = serverSocket.accept()
+                except socket.timeout:
+                    continue
+                except socket.error as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    raise
+
+                try:
+                    self.__answerConnection(commandLineArguments, connection)
+                finally:
+                    connection.close()
+        finally:
+            serverSocket.close()
+            os.unlink(socketPath)
+
+            self.__logger.info('Daemon stopped')
+            self.__finishRun(commandLineArguments)
+
+    def __removeStaleSocket(self, socketPath):
+        """removes a socket left behind by a daemon which was killed, ends
+           the script if something else exists at the path or a daemon
+           still answers on the socket"""
+
+        import socket
+
+        try:
+            pathStatus = os.lstat(socketPath)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                return
+            raise
+
+        if not stat.S_ISSOCK(pathStatus.st_mode):
+            raise SystemExit('%s exists and is no socket, not replacing it' % socketPath)
+
+        probeSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            probeSocket.connect(socketPath)
+        except socket.error as e:
+            if e.errno != errno.ECONNREFUSED:
+                raise SystemExit('Could not check whether a daemon answers on %s: %s' % (socketPath, e))
+
+            self.__logger.info('Removing socket %s left behind by a daemon', socketPath)
+            os.unlink(socketPath)
+            return
+        finally:
+            probeSocket.close()
+
+        raise SystemExit('Another daemon answers on %s' % socketPath)
+
+    def __answerConnection(self, commandLineArguments, connection):
+        """reads a request as JSON object in a line from the connection and
+           writes the answer as JSON object in a line"""
+
+        import socket
+
+        connection.settimeout(commandLineArguments.timeout)
+        connectionFile = connection.makefile('rwb')
+
+        try:
+            requestLine = connectionFile.readline()
+
+            # e.g. another daemon checking whether this one is running
+            if requestLine == '':
+                return
+
+            try:
+                request = json.loads(requestLine)
+            except ValueError:
+                request = None
+
+            if isinstance(request, dict):
+                answer = self.__answerRequest(commandLineArguments, request)
+            else:
+                answer = {'status': 'error', 'message': 'expected a JSON object in a line'}
+
+            connectionFile.write(json.dumps(answer, sort_keys=True) + '\n')
+            connectionFile.flush()
+        except socket.error as e:
+            self.__logger.warning('Could not answer request: %s', e)
+        finally:
+            try:
+                connectionFile.close()
+            except socket.error:
+                # the answer could not be sent, which was logged above
+                pass
+
+    def __answerRequest(self, commandLineArguments, request):
+        """executes the request of another tool and returns the answer
+           * {"command": "sync"} executes the jobs, optionally only those for
+             the "list" and "language" given
+           * {"command": "list", "list": ..., "language": ...} returns the
+             movies of the list as fetched last, fetching it if needed
+           * {"command": "status"} returns the lists, files and scrapers in
+             memory and the metrics since the daemon started
+           * {"command": "stop"} stops the daemon
+        """
+
+        command = request.get('command')
+
+        try:
+            if command == 'sync':
+                jobs = [eachJob for eachJob in self.__readJobs(commandLineArguments)
+                        if request.get('list', eachJob.list) == eachJob.list
+                        and request.get('language', eachJob.language) == eachJob.language]
+
+                jobSummaries = self.__syncJobs(commandLineArguments, jobs)
+                self.__reportMetrics(commandLineArguments)
+
+                return {'status': 'ok',
+                        'jobs': [{'list': eachJob.list,
+                                  'language': eachJob.language,
+                                  'outputfile': eachJob.outputfile,
+                                  'moviesAdded': moviesInserted,
+                                  'seconds': secondsNeeded}
+                                 for eachJob, moviesInserted, secondsNeeded in jobSummaries]}
+
+            if command == 'list':
+                job = copy.copy(commandLineArguments)
+                job.list = request.get('list', 'imdb_top250')
+                job.language = request.get('language', 'en-US')
+
+                if not self.__isKnownList(job.list) or not self.__listExists(job):
+                    return {'status': 'error', 'message': 'unknown list "%s"' % job.list}
+
+                fetchKey = (job.list, job.language)
+
+                if fetchKey not in self.__currentLists:
+                    self.__fetchMoviesFromInternetSite(job)
+
+                self.__listsLastUsed[fetchKey] = time.time()
+
+                return {'status': 'ok',
+                        'movies': [eachRecord.title for eachRecord in self.__currentLists[fetchKey]],
+                        'records': [eachRecord._asdict() for eachRecord in self.__currentLists[fetchKey]]}
+
+            if command == 'status':
+                return {'status': 'ok',
+                        'lists': sorted(list(eachKey) for eachKey in self.__currentLists),
+                        'files': sorted(set(eachFileName for eachFileName, eachMethodName in self.__comparableMoviesInFiles)),
+                        'scrapers': sorted(list(eachKey) for eachKey in self.__scrapers),
+                        'metrics': self.__metrics.asDictionary()}
+
+            if command == 'stop':
+                self.__stopping = True
+                return {'status': 'ok'}
+        except Exception as e:
+            self.__logger.exception('Could not execute request %s', json.dumps(request))
+            return {'status': 'error', 'message': str(e)}
+
+        return {'status': 'error', 'message': 'unknown command "%s"' % command}
+
+    def __evictIdleState(self, idleSeconds):
+        """forgets the lists, the scrapers they were read with and the movies
+           read from files not used for the given number of seconds, so the
+           memory of a daemon stays bounded by the lists and files it is
+           actually used for"""
+
+        idleSince = time.time() - idleSeconds
+
+        for eachFetchKey, lastUsed in self.__listsLastUsed.items():
+            if lastUsed < idleSince:
+                self.__logger.info('Evicting idle list %s (%s)', *eachFetchKey)
+                del self.__listsLastUsed[eachFetchKey]
+                self.__currentLists.pop(eachFetchKey, None)
+                self.__fetchedMovies.pop(eachFetchKey, None)
+                self.__fetchedRecords.pop(eachFetchKey, None)
+                self.__fetchedPages.pop(eachFetchKey, None)
+
+        # the scrapers keep the pages and records they read last
+        for eachScraperKey, lastUsed in self.__scrapersLastUsed.items():
+            if lastUsed < idleSince:
+                self.__logger.info('Evicting idle scraper of list %s (%s)', *eachScraperKey)
+                del self.__scrapersLastUsed[eachScraperKey]
+                self.__scrapers.pop(eachScraperKey, None)
+
+        for eachFileName, lastUsed in self.__filesLastUsed.items():
+            if lastUsed < idleSince:
+                self.__logger.info('Evicting movies read from idle file %s', eachFileName)
+                del self.__filesLastUsed[eachFileName]
+                self.__forgetMoviesInFile(eachFileName)
+                self.__fileStatusesRead.pop(eachFileName, None)
+
+    def __reportMetrics(self, commandLineArguments):
+        """logs the metrics of the run and writes them to the files given in
+           the command line arguments"""
+
+        self.__logger.info('Metrics of the run: %s', json.dumps(self.__metrics.asDictionary(), sort_keys=True))
+
+        if commandLineArguments.metricsfile != '':
+            self.__metrics.writeJSON(commandLineArguments.metricsfile)
+
+        if commandLineArguments.prometheusfile != '':
+            self.__metrics.writePrometheusTextfile(commandLineArguments.prometheusfile)
+
+    def __executeJob(self, commandLineArguments):
+        """fetches a single list in a single language and writes the movies
+           missing in the output file, returns the number of movies written"""
+
+        moviesThatShouldBeInFile = self.__readMoviesThatShouldBeInFile(commandLineArguments)
+
+        if len(moviesThatShouldBeInFile) > 0:
+            moviesToInsertIntoFile = self.__removeMoviesAlreadyInOutputFile(commandLineArguments, moviesThatShouldBeInFile)
+        else:
+            moviesToInsertIntoFile = []
+
+        # the ids are kept next to the output file, movies written to STDOUT
+        # are never left out by their id
+        if commandLineArguments.dedupbyid and commandLineArguments.outputfile != '' and len(moviesToInsertIntoFile) > 0:
+            moviesToInsertIntoFile = self.__removeMoviesWithKnownIDs(commandLineArguments, moviesToInsertIntoFile)
+
+        if commandLineArguments.check:
+            self.__logger.info('Check: %i movies would be added to %s',
+                               len(moviesToInsertIntoFile),
+                               commandLineArguments.outputfile or 'STDOUT')
+
+            if len(moviesToInsertIntoFile) > 0:
+                self.__checkStatus = self.checkChanged
+
+            return len(moviesToInsertIntoFile)
+
+        if commandLineArguments.outputfile != '':
+            moviesToInsertIntoFile = self.__insertMoviesIntoFile(commandLineArguments, moviesToInsertIntoFile)
+        else:
+            self.__outputMoviesToSTDOUT(moviesToInsertIntoFile)
+
+        self.__metrics.count('moviesInserted', len(moviesToInsertIntoFile))
+
+        if commandLineArguments.snapshotdir != '':
+            self.__storeSnapshot(commandLineArguments)
+
+        return len(moviesToInsertIntoFile)
+
+    def __readJobs(self, commandLineArguments):
+        """returns the command line arguments of every job to execute, a job
+           is given for every list and language, or by a line of the job file"""
+
+        jobs = []
+
+        if commandLineArguments.jobfile != '':
+            jobFile = io.open(commandLineArguments.jobfile, 'r', encoding='utf8')
+
+            for lineNumber, eachLine in enumerate(jobFile, 1):
+                jobFields = eachLine.split('#')[0].split()
+
+                if len(jobFields) == 0:
+                    continue
+
+                if len(jobFields) not in (2, 3) or not self.__isKnownList(jobFields[0]):
+                    raise SystemExit('%s:%i: expected "<list> <language> [<outputfile>]" with a known list, got "%s"'
+                                     % (commandLineArguments.jobfile, lineNumber, eachLine.strip()))
+
+                job = copy.copy(commandLineArguments)
+                job.list = str(jobFields[0])
+                job.language = str(jobFields[1])
+                job.outputfile = jobFields[2] if len(jobFields) == 3 else ''
+                jobs.append(job)
+
+            jobFile.close()
+        else:
+            for eachList in commandLineArguments.list or ["imdb_top250"]:
+                for eachLanguage in commandLineArguments.language or ["en-US"]:
+                    job = copy.copy(commandLineArguments)
+                    job.list = eachList
+                    job.language = eachLanguage
+                    jobs.append(job)
+
+        return jobs
+
+    def __logJobSummaries(self, jobSummaries):
+        """logs the number of movies written and the time needed per job"""
+
+        for eachJob, moviesInserted, secondsNeeded in jobSummaries:
+            self.__logger.info('Job %s (%s) -> %s: added %i movies in %.3f seconds',
+                               eachJob.list,
+                               eachJob.language,
+                               eachJob.outputfile or 'STDOUT',
+                               moviesInserted,
+                               secondsNeeded)
+
+    def __initLogging(self, commandLineArguments):
+        """configures the logging"""
+
+        logging.basicConfig(filename=commandLineArguments.logfile,
+                            filemode='a',
+                            level=0,
+                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def __outputMoviesToSTDOUT(self, moviesToPrint):
+        """writes the given movies to STDOUT"""
+
+        with self.__metrics.measure('write'):
+            for eachMovieToPrint in moviesToPrint:
+                print(eachMovieToPrint.encode('utf8'))
+
+    def __insertMoviesIntoFile(self,
+                               commandLineArguments,
+                               moviesToInsertIntoFile):
+        """appends the given movies to the output file specified in the
+           command line arguments and returns the movies appended. The file is
+           locked while appending, so movies appended by other runs since the
+           file was read are noticed and not appended again"""
+
+        outputFileName = commandLineArguments.outputfile
+
+        with io.open(outputFileName, 'ab') as fileToWriteTo:
+            with self.__metrics.measure('write'):
+                fcntl.flock(fileToWriteTo.fileno(), fcntl.LOCK_EX)
+
+            try:
+                if len(moviesToInsertIntoFile) > 0 and self.__changedSinceRead(outputFileName):
+                    self.__logger.info('File %s changed since it was read, reading it again', outputFileName)
+
+                    self.__forgetMoviesInFile(outputFileName)
+                    moviesToInsertIntoFile = self.__removeMoviesAlreadyInOutputFile(commandLineArguments,
+                                                                                    moviesToInsertIntoFile)
+
+                if commandLineArguments.dedupbyid and len(moviesToInsertIntoFile) > 0:
+                    # other runs may have written the ids since they were read
+                    moviesToInsertIntoFile = self.__removeMoviesWithKnownIDs(commandLineArguments, moviesToInsertIntoFile)
+
+                with self.__metrics.measure('write'):
+                    # the movies are written at once, so other runs never
+                    # see only a part of them
+                    fileToWriteTo.write(u''.join(eachMovie + u'\n' for eachMovie in moviesToInsertIntoFile).encode('utf8'))
+                    fileToWriteTo.flush()
+
+                    if commandLineArguments.fsync:
+                        os.fsync(fileToWriteTo.fileno())
+
+                    if commandLineArguments.dedupbyid:
+                        self.__appendIDsOfMovies(commandLineArguments, moviesToInsertIntoFile)
+
+                self.__fileStatusesRead[outputFileName] = self.__statusOfFile(outputFileName)
+            finally:
+                fcntl.flock(fileToWriteTo.fileno(), fcntl.LOCK_UN)
+
+        for (eachFileName, eachMethodName), (compareWithMethod, comparableMovies) in self.__comparableMoviesInFiles.items():
+            if eachFileName == commandLineArguments.outputfile:
+                comparableMovies.update(self.__asComparableStrings(moviesToInsertIntoFile, compareWithMethod))
+
+        self.__logger.info('Have added %i movies to file %s',
+                           len(moviesToInsertIntoFile),
+                           commandLineArguments.outputfile)
+
+        return moviesToInsertIntoFile
+
+    def __changedSinceRead(self, fileName):
+        """returns, whether the file was written since its movies were read"""
+
+        statusRead = self.__fileStatusesRead.get(fileName)
+        currentStatus = self.__statusOfFile(fileName)
+
+        # a file which did not exist is created empty for appending
+        if statusRead is None and currentStatus is not None and currentStatus[0] == 0:
+            return False
+
+        return currentStatus != statusRead
+
+    def __statusOfFile(self, fileName):
+        """returns size and modification time of the file, which change
+           when it is written, or None if it does not exist"""
+
+        try:
+            fileStatus = os.stat(fileName)
+        except OSError:
+            return None
+
+        return fileStatus.st_size, fileStatus.st_mtime
+
+    def __forgetMoviesInFile(self, fileName):
+        """forgets the movies read from the file, so it is read again"""
+
+        for eachFileKey in self.__comparableMoviesInFiles.keys():
+            if eachFileKey[0] == fileName:
+                del self.__comparableMoviesInFiles[eachFileKey]
+
+        for eachIndexKey in self.__fuzzyIndexesOfFiles.keys():
+            if eachIndexKey[0] == fileName:
+                del self.__fuzzyIndexesOfFiles[eachIndexKey]
+
+    def __removeMoviesContainedIn(self,
+                                  comparableMoviesToRemove,
+                                  moviesToRemoveFrom,
+                                  compareWithMethod):
+        """finds the movies whose comparable form is not contained in the
+           given set and returns them as list"""
+
+        resultingMovies = []
+
+        with self.__metrics.measure('dedup'):
+            for eachMovieToCheck in moviesToRemoveFrom:
+                if not compareWithMethod(eachMovieToCheck) in comparableMoviesToRemove:
+                    self.__logger.info('Movie "%s" is not in file and will be added', eachMovieToCheck)
+                    resultingMovies.append(eachMovieToCheck)
+
+        self.__metrics.count('dedupComparisons', len(moviesToRemoveFrom))
+
+        if len(resultingMovies) == 0:
+            self.__logger.info('No new movies fetched, file will remain unchanged')
+
+        return resultingMovies
+
+    def __asFuzzilyComparableString(self, inputString):
+        """returns a fuzzily comparable string by removing all spaces, signs
+           (e.g. all non numbers and non characters), removing the accents
+           of characters and converting everything to lower case"""
+        return self.__fuzzyKeyNormalizer.normalize(inputString)
+
+    def __asComparableStrings(self, inputStrings, compareWithMethod):
+        """returns the comparable strings of all input strings like the given
+           compare method, converting them in batches where possible"""
+
+        if compareWithMethod == self.__asFuzzilyComparableString:
+            return self.__fuzzyKeyNormalizer.normalizeAll(inputStrings)
+
+        if compareWithMethod == self.__asExactString:
+            return inputStrings
+
+        return (compareWithMethod(eachInputString) for eachInputString in inputStrings)
+
+    def __asExactString(self, inputString):
+        """returns exactly the string given as inputString"""
+        return inputString
+
+    def __readMoviesThatShouldBeInFile(self,
+                                       commandLineArguments):
+        """fetches the movies from the internet site (e.g. imdb.com) according
+           to the given command line arguments and removes the ignored movies.
+           If snapshots of the lists are kept, only the movies which entered
+           the list since the last run remain"""
+
+        if commandLineArguments.snapshotdir != '':
+            moviesFetchedFromInternet = self.__fetchMoviesEnteredSinceLastRun(commandLineArguments)
+        else:
+            moviesFetchedFromInternet = self.__fetchMoviesFromInternetSite(commandLineArguments)
+
+        if len(moviesFetchedFromInternet) == 0:
+            return []
+
+        moviesThatShouldBeInFile = self.__removeIgnoredMovies(commandLineArguments, moviesFetchedFromInternet)
+
+        return moviesThatShouldBeInFile
+
+    def __fetchMoviesEnteredSinceLastRun(self, commandLineArguments):
+        """fetches the movie list from the internet site, writes the changes
+           since the snapshot of the last run and returns the movies which
+           entered the list since, none if its sites did not change. If the
+           last run wrote to another file, all movies are returned"""
+
+        snapshot = ListSnapshots(commandLineArguments.snapshotdir).load(commandLineArguments.list,
+                                                                        commandLineArguments.language,
+                                                                        commandLineArguments.outputfile)
+
+        if snapshot is not None:
+            # pages of snapshots holding only titles are parsed again
+            knownPages = dict((eachURL, (eachPage['contentHash'], [MovieRecord(*eachRecord) for eachRecord in eachPage['records']]))
+                              for eachURL, eachPage in snapshot['pages'].items() if 'records' in eachPage)
+            previousMovies = snapshot['movies']
+        else:
+            knownPages = {}
+            previousMovies = []
+
+        moviesFetched = self.__fetchMoviesFromInternetSite(commandLineArguments, knownPages)
+        changes = self.__changesBetween(previousMovies, moviesFetched)
+
+        # the movies which did not enter the list were checked by the last
+        # run, as long as it wrote the same number of movies to the same file
+        # and left out the same movies
+        snapshotIsComparable = snapshot is not None \
+            and snapshot['count'] == commandLineArguments.count \
+            and snapshot['outputfile'] == commandLineArguments.outputfile \
+            and snapshot.get('dedup') == self.__dedupSettingsOf(commandLineArguments)
+
+        changes['unchanged'] = snapshotIsComparable and snapshot['contentHash'] == self.__contentHashOf(commandLineArguments)
+
+        if changes['unchanged']:
+            self.__logger.info('Sites of list %s (%s) did not change since the last run',
+                               commandLineArguments.list,
+                               commandLineArguments.language)
+            moviesToCheck = []
+        elif snapshotIsComparable:
+            moviesToCheck = [eachChange['title'] for eachChange in changes['entered']]
+        else:
+            moviesToCheck = moviesFetched
+
+        self.__logger.info('List %s (%s) changed since the last run: %i movies entered, %i left, %i moved',
+                           commandLineArguments.list,
+                           commandLineArguments.language,
+                           len(changes['entered']),
+                           len(changes['left']),
+                           len(changes['moved']))
+
+        if commandLineArguments.deltafile != '' and not commandLineArguments.check:
+            changes.update({'list': commandLineArguments.list,
+                            'language': commandLineArguments.language,
+                            'outputfile': commandLineArguments.outputfile})
+
+            with io.open(commandLineArguments.deltafile, 'ab') as deltaFile:
+                deltaFile.write(json.dumps(changes, sort_keys=True) + '\n')
+
+        return moviesToCheck
+
+    def __changesBetween(self, previousMovies, currentMovies):
+        """returns the movies which entered and left the list with their rank
+           and the movies which moved within it with their previous and
+           current rank"""
+
+        previousRanks = {}
+        for eachRank, eachMovie in enumerate(previousMovies, 1):
+            previousRanks.setdefault(eachMovie, eachRank)
+
+        currentRanks = {}
+        for eachRank, eachMovie in enumerate(currentMovies, 1):
+            currentRanks.setdefault(eachMovie, eachRank)
+
+        return {'entered': [{'rank': eachRank, 'title': eachMovie}
+                            for eachRank, eachMovie in enumerate(currentMovies, 1)
+                            if currentRanks[eachMovie] == eachRank and eachMovie not in previousRanks],
+                'left': [{'rank': eachRank, 'title': eachMovie}
+                         for eachRank, eachMovie in enumerate(previousMovies, 1)
+                         if previousRanks[eachMovie] == eachRank and eachMovie not in currentRanks],
+                'moved': [{'title': eachMovie, 'from': previousRanks[eachMovie], 'to': eachRank}
+                          for eachRank, eachMovie in enumerate(currentMovies, 1)
+                          if currentRanks[eachMovie] == eachRank and previousRanks.get(eachMovie, eachRank) != eachRank]}
+
+    def __contentHashOf(self, commandLineArguments):
+        """returns a hash of the content of all sites the list of the command
+           line arguments was read from"""
+
+        fetchedPages = self.__fetchedPages.get((commandLineArguments.list, commandLineArguments.language), {})
+
+        return hashlib.sha1(''.join(eachURL + ' ' + fetchedPages[eachURL][0] + '\n'
+                                    for eachURL in sorted(fetchedPages))).hexdigest()
+
+    def __storeSnapshot(self, commandLineArguments):
+        """stores the movies of the list of the command line arguments and
+           the sites they were read from for the next run"""
+
+        if commandLineArguments.check:
+            return
+
+        fetchKey = (commandLineArguments.list, commandLineArguments.language)
+        fetchedPages = self.__fetchedPages.get(fetchKey, {})
+
+        snapshot = {'count': commandLineArguments.count,
+                    'outputfile': commandLineArguments.outputfile,
+                    'dedup': self.__dedupSettingsOf(commandLineArguments, asRead=True),
+                    'contentHash': self.__contentHashOf(commandLineArguments),
+                    'pages': dict((eachURL, {'contentHash': eachContentHash, 'records': eachRecords})
+                                  for eachURL, (eachContentHash, eachRecords) in fetchedPages.items()),
+                    'movies': self.__fetchedMovies.get(fetchKey, [])}
+
+        ListSnapshots(commandLineArguments.snapshotdir).store(commandLineArguments.list,
+                                                              commandLineArguments.language,
+                                                              commandLineArguments.outputfile,
+                                                              snapshot)
+
+    def __dedupSettingsOf(self, commandLineArguments, asRead=False):
+        """returns the settings deciding which movies are left out of the
+           output file, including size and modification time of the ignore
+           file, as stored in a snapshot. If asRead is set, the ignore file
+           is described like it was when its movies were read"""
+
+        if commandLineArguments.ignorefile == '':
+            ignoreFileStatus = None
+        elif asRead and commandLineArguments.ignorefile in self.__fileStatusesRead:
+            ignoreFileStatus = self.__fileStatusesRead[commandLineArguments.ignorefile]
+        else:
+            ignoreFileStatus = self.__statusOfFile(commandLineArguments.ignorefile)
+
+        return {'ignorefile': commandLineArguments.ignorefile,
+                'ignorefileStatus': list(ignoreFileStatus) if ignoreFileStatus is not None else None,
+                'ignorefuzzy': commandLineArguments.ignorefuzzy,
+                'fuzzythreshold': commandLineArguments.fuzzythreshold,
+                'dedupbyid': commandLineArguments.dedupbyid}
+
+    def __fetchMoviesFromInternetSite(self, commandLineArguments, knownPages=None):
+        """Fetches the movie list from the internet sites of its sources, the
+           titles of known pages with unchanged content are not parsed again"""
+        self.__logger.info('Fetching movies from list %s',commandLineArguments.list)
 
-    __logger = None
+        fetchKey = (commandLineArguments.list, commandLineArguments.language)
 
-    def __init__(self):
-        self.__logger = logging.getLogger('goodmovies')
+        if fetchKey in self.__fetchedMovies:
+            self.__logger.info('List %s was already fetched in language %s', *fetchKey)
+            return self.__fetchedMovies[fetchKey]
 
-    def setLanguage(self, language):
-        """set the language for reading imdb movie lists"""
-        self.__language = language
+        sourceLists = self.__sourceListsOf(commandLineArguments.list)
+        scrapers = [self.__scraperFor(commandLineArguments, eachSourceList) for eachSourceList in sourceLists]
 
-    def loadTop250(self):
-        """reads the imdb top 250 move list and returns a list"""
-        IMDBResponseAsString = self.__fetchIMDBSiteContent("http://www.imdb.com/chart/top")
+        for eachScraper in scrapers:
+            eachScraper.setKnownPages(knownPages or {})
 
-        strainer = SoupStrainer('td', attrs={'class': 'titleColumn'})
-        soup = BeautifulSoup(IMDBResponseAsString, 'lxml', parse_only=strainer)
-        movieTitleLines = soup.findAll('td', {'class': 'titleColumn'})
+        with self.__metrics.measure('fetch'):
+            sourcesRecords = self.__loadSourceLists(commandLineArguments, sourceLists, scrapers)
 
-        movies = []
+        if len(sourcesRecords) == 1:
+            recordsOnInternetSites = sourcesRecords[0]
+        else:
+            recordsOnInternetSites = self.__mergedByRank(sourcesRecords)
 
-        for eachMovieLine in movieTitleLines:
-            movieLink = eachMovieLine.find('a')
-            movies.append(movieLink.text)
+        recordsOnInternetSites = recordsOnInternetSites[:commandLineArguments.count]
+        moviesOnInternetSites = [eachRecord.title for eachRecord in recordsOnInternetSites]
 
-        return movies
+        self.__logger.info('Fetched %i movies from internet',len(moviesOnInternetSites))
 
-    def loadTopMoviesByGenre(self, imdbGenreKey, count):
-        """reads the imdb top rated movies by genre and returns a list"""
-        movies = []
+        loadedPages = {}
+        for eachScraper in scrapers:
+            loadedPages.update(eachScraper.getLoadedPages())
 
-        currentStart = 1
+        self.__fetchedRecords[fetchKey] = recordsOnInternetSites
+        self.__fetchedMovies[fetchKey] = moviesOnInternetSites
+        self.__fetchedPages[fetchKey] = loadedPages
+        self.__currentLists[fetchKey] = recordsOnInternetSites
+        self.__listsLastUsed[fetchKey] = time.time()
 
-        while True:
-            IMDBGenreURL = "http://www.imdb.com/search/title?genres=" + imdbGenreKey + "&start=" + str(currentStart) + "&sort=user_rating,desc&title_type=feature&num_votes=25000,&view=simple"
+        return moviesOnInternetSites
 
-            IMDBResponseAsString = self.__fetchIMDBSiteContent(IMDBGenreURL)
+    def __isKnownList(self, listName):
+        """returns whether every source of the list with the given name is
+           known to a registered scraper"""
+        return all(scraperRegistry.sourceOf(eachSourceList) is not None
+                   for eachSourceList in self.__sourceListsOf(listName))
 
-            strainer = SoupStrainer('span', attrs={'class': 'lister-item-header'})
-            soup = BeautifulSoup(IMDBResponseAsString, 'lxml', parse_only=strainer)
-            movieTitleLines = soup.findAll('span', {'class': 'lister-item-header'})
+    def __listExists(self, commandLineArguments):
+        """returns whether every source of the list of the command line
+           arguments can be read, e.g. whether the record files of lists
+           "file_<name>" exist. The scrapers asked are not kept"""
 
-            if len(movieTitleLines) == 0:
-                self.__logger.error('Did not get results parsing result for URL "%s", aborting', IMDBGenreURL)
-                break
+        for eachSourceList in self.__sourceListsOf(commandLineArguments.list):
+            scraper = scraperRegistry.createScraper(eachSourceList)
+            scraper.configure(commandLineArguments)
 
-            for eachMovieLine in movieTitleLines:
-                movieLink = eachMovieLine.find('a')
-                movies.append(movieLink.text)
-                currentStart += 1
+            if not scraper.hasList(scraperRegistry.siteListNameOf(eachSourceList)):
+                return False
 
-            if len(movies) >= count:
-                break
+        return True
 
-        return movies
+    def __sourceListsOf(self, listName):
+        """returns the lists of the sources a list is aggregated from, e.g.
+           "imdb_sci_fi" and "file_favorites" for "imdb_sci_fi+file_favorites",
+           a list given twice is read once"""
 
-    def __fetchIMDBSiteContent(self, url):
-        """reads the content of an IMDB site and returns the HTML as string"""
+        sourceLists = []
 
-        IMDBRequest = urllib2.Request(url)
+        for eachSourceList in listName.split('+'):
+            if eachSourceList not in sourceLists:
+                sourceLists.append(eachSourceList)
 
-        # upon sending a request from IMDB with header 'Accept-Language'
-        # IMDB will return the site and the move titles in this language
-	IMDBRequest.add_header('Accept-Language', self.__language)
-	IMDBRequest.add_header('User-Agent', 'Mozilla/5.0')
+        return sourceLists
 
-        IMDBResponse = urllib2.build_opener().open(IMDBRequest)
-        IMDBResponseAsString = IMDBResponse.read()
+    def __loadSourceLists(self, commandLineArguments, sourceLists, scrapers):
+        """reads the lists of all sources at the same time and returns their
+           records in the order of the sources, the sites are still fetched
+           within the limits of the shared fetch backend"""
 
-        return IMDBResponseAsString
+        results = [None] * len(sourceLists)
 
-class GoodMoviesRunner:
-    """the main class of the script"""
+        def loadSourceList(index):
+            try:
+                results[index] = (True, self.__loadSourceList(commandLineArguments, sourceLists[index], scrapers[index]))
+            except Exception as e:
+                results[index] = (False, e)
 
-    __logger = None
+        sourceThreads = [threading.Thread(target=loadSourceList, args=(eachIndex,))
+                         for eachIndex in range(1, len(sourceLists))]
 
-    def __init__(self):
-        self.__logger = logging.getLogger('goodmovies')
+        for eachThread in sourceThreads:
+            eachThread.daemon = True
+            eachThread.start()
 
-    def execute(self):
-        """executes the scripts
-           * parses the command lines arguments
-           * reads the movies from the internet accordingly
-           * reads the movies already contained in the output file, if any
-           * determines the missing movies and appends them to the ouptut file
-        """
+        loadSourceList(0)
 
-        commandLineArguments = self.__parseCommandLineArguments()
+        for eachThread in sourceThreads:
+            eachThread.join()
 
-        self.__initLogging(commandLineArguments)
+        for succeeded, sourceRecords in results:
+            if not succeeded:
+                raise sourceRecords
 
-        self.__logger.info('GoodMovies started')
+        return [sourceRecords for succeeded, sourceRecords in results]
 
-        moviesThatShouldBeInFile = self.__readMoviesThatShouldBeInFile(commandLineArguments)
-        moviesAlreadyInFile = self.__readMoviesAlreadyInOutputFile(commandLineArguments)
-        moviesToInsertIntoFile = self.__removeMoviesContainedIn(moviesAlreadyInFile, moviesThatShouldBeInFile, self.__asExactString)
+    def __loadSourceList(self, commandLineArguments, sourceList, scraper):
+        """reads the list of a single source with its scraper, measuring the
+           time it takes for the source"""
 
-        if commandLineArguments.outputfile != '':
-            self.__insertMoviesIntoFile(commandLineArguments, moviesToInsertIntoFile)
-        else:
-            self.__outputMoviesToSTDOUT(moviesToInsertIntoFile)
+        startTime = time.time()
 
-        self.__logger.info('GoodMovies finished')
+        with self.__metrics.measureSource(sourceList, 'fetch'):
+            sourceRecords = scraper.loadList(scraperRegistry.siteListNameOf(sourceList), commandLineArguments.count)
 
-    def __initLogging(self, commandLineArguments):
-        """configures the logging"""
+        self.__logger.info('Fetched %i movies from source %s in %.3f seconds',
+                           len(sourceRecords), sourceList, time.time() - startTime)
 
-        logging.basicConfig(filename=commandLineArguments.logfile,
-                            filemode='a',
-                            level=0,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        return sourceRecords
 
-    def __outputMoviesToSTDOUT(self, moviesToPrint):
-        """writes the given movies to STDOUT"""
+    def __mergedByRank(self, sourcesRecords):
+        """merges the records of several sources by their rank, movies of the
+           same rank follow the order of the sources. A movie in several
+           sources is kept at its best rank only, records are the same movie
+           if their imdb ids or their titles are equal"""
 
-        for eachMovieToPrint in moviesToPrint:
-            print(eachMovieToPrint.encode('utf8'))
+        rankedRecords = sorted((eachRecord.rank, eachSourceIndex, eachPosition, eachRecord)
+                               for eachSourceIndex, eachSourceRecords in enumerate(sourcesRecords)
+                               for eachPosition, eachRecord in enumerate(eachSourceRecords))
 
-    def __insertMoviesIntoFile(self,
-                               commandLineArguments,
-                               moviesToInsertIntoFile):
-        """appends the given movies to the output file specified in the
-           command line arguments"""
+        mergedRecords = []
+        idsMerged = set()
+        titlesMerged = set()
 
-        fileToWriteTo = io.open(commandLineArguments.outputfile,'a',encoding="utf8")
+        for rank, sourceIndex, position, eachRecord in rankedRecords:
+            if (eachRecord.id is not None and eachRecord.id in idsMerged) or eachRecord.title in titlesMerged:
+                self.__logger.debug('Movie "%s" is already in the list at a better rank', eachRecord.title)
+                continue
 
-        for eachMovieToInsert in moviesToInsertIntoFile:
-            fileToWriteTo.write(eachMovieToInsert)
-            fileToWriteTo.write(u"\n")
+            if eachRecord.id is not None:
+                idsMerged.add(eachRecord.id)
 
-        fileToWriteTo.close()
+            titlesMerged.add(eachRecord.title)
+            mergedRecords.append(eachRecord._replace(rank=len(mergedRecords) + 1))
 
-        self.__logger.info('Have added %i movies to file %s',
-                           len(moviesToInsertIntoFile),
-                           commandLineArguments.outputfile)
+        return mergedRecords
 
-    def __removeMoviesContainedIn(self,
-                                  moviesToRemove,
-                                  moviesToRemoveFrom,
-                                  compareWithMethod):
-        """finds the movies that are not already contained in the list
-           and returns them as list"""
+    def __scraperFor(self, commandLineArguments, sourceList):
+        """returns the scraper for the list of a source in the language of
+           the command line arguments, creating it on first use"""
 
-        resultingMovies = []
-        comparableMoviesToRemove = map(compareWithMethod, moviesToRemove)
+        scraperKey = (sourceList, commandLineArguments.language)
+        self.__scrapersLastUsed[scraperKey] = time.time()
 
-        for eachMovieToCheck in moviesToRemoveFrom:
-            if not compareWithMethod(eachMovieToCheck) in comparableMoviesToRemove:
-                self.__logger.info('Movie "%s" is not in file and will be added', eachMovieToCheck)
-                resultingMovies.append(eachMovieToCheck)
+        if scraperKey in self.__scrapers:
+            return self.__scrapers[scraperKey]
 
-        if len(resultingMovies) == 0:
-            self.__logger.info('No new movies fetched, file will remain unchanged')
+        if self.__fetchBackend is None:
+            self.__fetchBackend = self.__createFetchBackend(commandLineArguments)
 
-        return resultingMovies
+        scraper = scraperRegistry.createScraper(sourceList)
+        scraper.setFetchBackend(self.__fetchBackend)
+        scraper.setMetrics(self.__metrics.forSource(sourceList))
+        scraper.setLanguage(commandLineArguments.language)
+        scraper.setCacheOnly(commandLineArguments.check)
+        scraper.configure(commandLineArguments)
 
-    def __asFuzzilyComparableString(self, inputString):
-        """returns a fuzzily comparable string by removing all spaces, signs
-           (e.g. all non numbers and non characters)
-           and converting everything to lower case"""
-        nonAlphanumericCharsRemoved = re.sub('[^a-zA-Z0-9]+', '', inputString)
-        return nonAlphanumericCharsRemoved.lower()
+        # recorded and replayed sites are never taken from the cache
+        if not commandLineArguments.nocache and commandLineArguments.record == '' and commandLineArguments.replay == '':
+            if self.__responseCache is None:
+                try:
+                    self.__responseCache = HTTPResponseCache(commandLineArguments.cachedir)
+                except (IOError, OSError) as e:
+                    raise SystemExit('Could not use cache directory %s: %s' % (commandLineArguments.cachedir, e))
 
-    def __asExactString(self, inputString):
-        """returns exactly the string given as inputString"""
-        return inputString
+                self.__responseCache.setTimeToLive(commandLineArguments.cachettl)
+                self.__responseCache.setMaximumSize(commandLineArguments.cachesize * 1024 * 1024)
+                self.__responseCache.setReadOnly(commandLineArguments.check)
 
-    def __readMoviesThatShouldBeInFile(self,
-                                       commandLineArguments):
-        """fetches the movies from the internet site (e.g. imdb.com) according
-           to the given command line arguments and removes the ignored movies"""
+            scraper.setResponseCache(self.__responseCache)
 
-        moviesFetchedFromInternet = self.__fetchMoviesFromInternetSite(commandLineArguments)
-        moviesThatShouldBeInFile = self.__removeIgnoredMovies(commandLineArguments, moviesFetchedFromInternet)
+        self.__scrapers[scraperKey] = scraper
 
-        return moviesThatShouldBeInFile
+        return scraper
 
-    def __fetchMoviesFromInternetSite(self, commandLineArguments):
-        """Fetches the movie list from the internet site"""
-        self.__logger.info('Fetching movies from list %s',commandLineArguments.list)
+    def __createFetchBackend(self, commandLineArguments):
+        """returns the backend the sites are fetched with, shared by all
+           scrapers of the run"""
 
-        theIMDBScraper = IMDBScraper()
-        theIMDBScraper.setLanguage(commandLineArguments.language)
+        if commandLineArguments.replay != '':
+            return ReplayFetchBackend(FixtureDirectory(commandLineArguments.replay))
 
-        if commandLineArguments.list == 'imdb_top250':
-            moviesOnIMDBSite = theIMDBScraper.loadTop250()
-        elif commandLineArguments.list.startswith('imdb_'):
-            moviesOnIMDBSite = theIMDBScraper.loadTopMoviesByGenre(
-                imdbGenreKey = commandLineArguments.list[5:],
-                count = commandLineArguments.count)
-        else:
-            self.__logger.info('List "%s" is unknown, no movies fetched',commandLineArguments.list)
-            moviesOnIMDBSite = []
+        httpSession = HTTPSession()
+        httpSession.setTimeout(commandLineArguments.timeout)
 
-        moviesOnIMDBSite = moviesOnIMDBSite[:commandLineArguments.count]
+        # all scrapers share the scheduler, so its limits hold for the run
+        fetchScheduler = FetchScheduler(httpSession, commandLineArguments.concurrency)
+        fetchScheduler.setRequestsPerSecond(commandLineArguments.ratelimit, commandLineArguments.concurrency)
+        fetchScheduler.setMaximumRetries(commandLineArguments.retries)
+        fetchScheduler.setBackoff(commandLineArguments.backoff, commandLineArguments.maxretrydelay)
+        fetchScheduler.setMetrics(self.__metrics)
 
-        self.__logger.info('Fetched %i movies from internet',len(moviesOnIMDBSite))
+        if commandLineArguments.record != '':
+            return RecordingFetchBackend(fetchScheduler, FixtureDirectory(commandLineArguments.record))
 
-        return moviesOnIMDBSite
+        return fetchScheduler
 
     def __removeIgnoredMovies(self, commandLineArguments, moviesToRemoveFrom):
         """reads the movies to ignore, if any, and returns the remaining movies
            as list"""
 
         if commandLineArguments.ignorefile != '':
-            moviesToIgnore = self.__readMoviesInFile(commandLineArguments.ignorefile)
-
             if commandLineArguments.ignorefuzzy:
-                remainingMovies = self.__removeMoviesContainedIn(
-                  moviesToIgnore, moviesToRemoveFrom, self.__asFuzzilyComparableString)
+                compareWithMethod = self.__asFuzzilyComparableString
             else:
-                remainingMovies = self.__removeMoviesContainedIn(
-                  moviesToIgnore, moviesToRemoveFrom, self.__asExactString)
+                compareWithMethod = self.__asExactString
+
+            if commandLineArguments.bloom and not commandLineArguments.ignorefuzzy:
+                return self.__removeMoviesContainedInFile(commandLineArguments.ignorefile, moviesToRemoveFrom,
+                                                          commandLineArguments.check)
+
+            moviesToIgnore = self.__readComparableMoviesInFile(commandLineArguments.ignorefile,
+                                                               compareWithMethod,
+                                                               processes=commandLineArguments.processes)
+
+            if commandLineArguments.ignorefuzzy and commandLineArguments.fuzzythreshold < 1:
+                moviesToIgnore = self.__fuzzyIndexOfFile(commandLineArguments.ignorefile,
+                                                         moviesToIgnore,
+                                                         commandLineArguments.fuzzythreshold)
+
+            remainingMovies = self.__removeMoviesContainedIn(moviesToIgnore, moviesToRemoveFrom, compareWithMethod)
         else:
             remainingMovies = moviesToRemoveFrom
 
         return remainingMovies
 
+    def __fuzzyIndexOfFile(self, fileName, comparableMoviesInFile, threshold):
+        """returns the FuzzyMovieIndex of the comparable movies read from the
+           file for the given threshold, which is kept for the next jobs
+           using the file, as long as it does not change"""
+
+        indexKey = (fileName, threshold)
+        fileStatus = self.__fileStatusesRead.get(fileName)
+
+        if indexKey in self.__fuzzyIndexesOfFiles and self.__fuzzyIndexesOfFiles[indexKey][0] == fileStatus:
+            return self.__fuzzyIndexesOfFiles[indexKey][1]
+
+        with self.__metrics.measure('dedup'):
+            fuzzyIndex = FuzzyMovieIndex(comparableMoviesInFile, threshold)
+
+        self.__logger.info('Indexed %i movies of file "%s" for approximate matching', len(comparableMoviesInFile), fileName)
+
+        self.__fuzzyIndexesOfFiles[indexKey] = (fileStatus, fuzzyIndex)
+
+        return fuzzyIndex
+
+    def __removeMoviesWithKnownIDs(self, commandLineArguments, moviesToRemoveFrom):
+        """returns the movies whose imdb id is not among the ids of the movies
+           written to the output file before, which are kept in a file next
+           to it. Movies without id are kept"""
+
+        idsOfMovies = self.__idsOfFetchedMovies(commandLineArguments)
+        knownIDs = set()
+
+        with self.__metrics.measure('read'):
+            try:
+                with io.open(commandLineArguments.outputfile + self.__idFileExtension, 'r', encoding='utf8') as idFile:
+                    knownIDs.update(eachLine.strip() for eachLine in idFile)
+            except IOError:
+                pass
+
+        with self.__metrics.measure('dedup'):
+            remainingMovies = [eachMovie for eachMovie in moviesToRemoveFrom if idsOfMovies.get(eachMovie) not in knownIDs]
+
+        self.__metrics.count('dedupComparisons', len(moviesToRemoveFrom))
+
+        self.__logger.info('%i movies were written to file %s before by their imdb id',
+                           len(moviesToRemoveFrom) - len(remainingMovies),
+                           commandLineArguments.outputfile)
+
+        return remainingMovies
+
+    def __appendIDsOfMovies(self, commandLineArguments, movies):
+        """appends the imdb ids of the movies written to the output file to
+           the file of ids next to it"""
+
+        idsOfMovies = self.__idsOfFetchedMovies(commandLineArguments)
+        newIDs = [idsOfMovies[eachMovie] for eachMovie in movies if idsOfMovies.get(eachMovie) is not None]
+
+        with io.open(commandLineArguments.outputfile + self.__idFileExtension, 'ab') as idFile:
+            idFile.write(''.join(eachID + '\n' for eachID in newIDs))
+
+    def __idsOfFetchedMovies(self, commandLineArguments):
+        """returns the imdb ids of the movies of the list of the command line
+           arguments by their title"""
+
+        records = self.__fetchedRecords.get((commandLineArguments.list, commandLineArguments.language), [])
+
+        # the first of several movies with the same title counts
+        return dict((eachRecord.title, eachRecord.id) for eachRecord in reversed(records))
+
+    def __removeMoviesAlreadyInOutputFile(self, commandLineArguments, moviesToRemoveFrom):
+        """returns the movies not contained in the output file specified in
+           the command line arguments. With option --bloom only the movies its
+           Bloom filter may contain are looked up in the file"""
+
+        if commandLineArguments.bloom and commandLineArguments.outputfile != '':
+            return self.__removeMoviesContainedInFile(commandLineArguments.outputfile, moviesToRemoveFrom,
+                                                      commandLineArguments.check)
+
+        moviesAlreadyInFile = self.__readMoviesAlreadyInOutputFile(commandLineArguments)
+
+        return self.__removeMoviesContainedIn(moviesAlreadyInFile, moviesToRemoveFrom, self.__asExactString)
+
+    def __removeMoviesContainedInFile(self, fileName, moviesToRemoveFrom, readOnly=False):
+        """returns the movies not exactly contained in the given file, using
+           the Bloom filter kept next to it to look up only the movies it may
+           contain, without holding the movies of the file in memory. If
+           readOnly is set, the filter file is not written"""
+
+        self.__fileStatusesRead[fileName] = self.__statusOfFile(fileName)
+
+        try:
+            with self.__metrics.measure('read'):
+                bloomFilter = MovieFileBloomFilter(fileName)
+                bloomFilter.setReadOnly(readOnly)
+                bloomFilter.update()
+        except (IOError, OSError) as e:
+            if e.errno == errno.ENOENT and not os.path.exists(fileName):
+                self.__logger.warning('Could not read file %s, maybe file does not exist', fileName)
+                return self.__removeMoviesContainedIn(set(), moviesToRemoveFrom, self.__asExactString)
+
+            self.__logger.warning('Could not use the filter of file "%s", looking up all movies in it: %s', fileName, e)
+            bloomFilter = None
+        except Exception as e:
+            self.__logger.warning('Could not use the filter of file "%s", looking up all movies in it: %s', fileName, e)
+            bloomFilter = None
+
+        with self.__metrics.measure('dedup'):
+            if bloomFilter is None:
+                moviesPossiblyInFile = set(moviesToRemoveFrom)
+            else:
+                moviesPossiblyInFile = set(eachMovie for eachMovie in moviesToRemoveFrom if eachMovie in bloomFilter)
+
+        moviesInFile = set()
+
+        if len(moviesPossiblyInFile) > 0:
+            with self.__metrics.measure('read'):
+                for eachMovieInFile in self.__iterateMoviesInFile(fileName):
+                    if eachMovieInFile in moviesPossiblyInFile:
+                        moviesInFile.add(eachMovieInFile)
+
+        self.__logger.info('File "%s" may contain %i of %i movies by its filter and contains %i',
+                           fileName,
+                           len(moviesPossiblyInFile),
+                           len(moviesToRemoveFrom),
+                           len(moviesInFile))
+
+        return self.__removeMoviesContainedIn(moviesInFile, moviesToRemoveFrom, self.__asExactString)
+
     def __readMoviesAlreadyInOutputFile(self,
                                         commandLineArguments):
         """Reads the movies already contained in the output file specified
-           in the command line arguments"""
+           in the command line arguments and returns them as set"""
 
         self.__logger.info('Reading file %s',commandLineArguments.outputfile)
 
         if commandLineArguments.outputfile != '':
-            moviesAlreadyInFile = self.__readMoviesInFile(commandLineArguments.outputfile)
+            moviesAlreadyInFile = self.__readComparableMoviesInFile(commandLineArguments.outputfile,
+                                                                    self.__asExactString,
+                                                                    commandLineArguments.index,
+                                                                    commandLineArguments.processes,
+                                                                    commandLineArguments.check)
 
-            self.__logger.info('Output file "%s" already contains %i movies',
+            self.__logger.info('Output file "%s" already contains %i distinct movies',
                                 commandLineArguments.outputfile,
                                 len(moviesAlreadyInFile))
         else:
             self.__logger.info('No outputfile specified - writing movies to STDOUT')
-            moviesAlreadyInFile = []
+            moviesAlreadyInFile = set()
 
         return moviesAlreadyInFile
 
-    def __readMoviesInFile(self, fileName):
+    def __readComparableMoviesInFile(self, fileName, compareWithMethod, useIndex=False, processes=1, readOnly=False):
         """
-        Reads the movies contained in the given file and returns a list.
-        If the file is not readable an empty list is returned
+        Reads the movies contained in the given file and returns the set of
+        their comparable forms, the movies are not held in memory at once.
+        If the file is not readable an empty set is returned.
+        If useIndex is set, the hashes of the movies are read from a sidecar
+        index file, which is brought up to date with the lines appended to
+        the file, unless readOnly is set. Otherwise, or if the index is not
+        usable, large files are read by the given number of processes
         """
 
+        fileKey = (fileName, compareWithMethod.__name__)
+        self.__filesLastUsed[fileName] = time.time()
+
+        if fileKey in self.__comparableMoviesInFiles:
+            # other tools may write to the file while a daemon keeps running
+            if not self.__changedSinceRead(fileName):
+                return self.__comparableMoviesInFiles[fileKey][1]
+
+            self.__logger.info('File %s changed since it was read, reading it again', fileName)
+            self.__forgetMoviesInFile(fileName)
+
+        # the status is taken before reading, so changes while reading are
+        # noticed before writing to the file
+        self.__fileStatusesRead[fileName] = self.__statusOfFile(fileName)
+
         try:
             self.__logger.warning('Reading movies in file "%s"', fileName)
 
-            fileToRead = io.open(fileName, 'r', encoding="utf8")
-            fileContentAsString = fileToRead.read()
-            fileToRead.close()
+            with self.__metrics.measure('read'):
+                comparison = self.__parallelComparisonFor(compareWithMethod)
+
+                comparableMoviesInFile = None
 
-            moviesInFile = fileContentAsString.rstrip().split("\n")
+                if useIndex and compareWithMethod == self.__asExactString:
+                    comparableMoviesInFile = self.__readMovieKeysThroughIndex(fileName, readOnly)
 
-            self.__logger.warning('Read %i movies from file "%s"', len(moviesInFile), fileName)
+                if comparableMoviesInFile is None and processes > 1 and comparison is not None \
+                        and os.path.getsize(fileName) >= self.__minimumSizeToReadInParallel:
+                    self.__logger.info('Reading file "%s" with %i processes', fileName, processes)
+                    comparableMoviesInFile = ParallelMovieFileReader(fileName, processes).readComparableMovies(comparison)
+                elif comparableMoviesInFile is None:
+                    moviesInFile = self.__iterateMoviesInFile(fileName)
+                    comparableMoviesInFile = set(self.__asComparableStrings(moviesInFile, compareWithMethod))
+
+            self.__logger.warning('Read %i distinct movies from file "%s"', len(comparableMoviesInFile), fileName)
 
         except Exception as e:
             self.__logger.warning('Could not read file %s, maybe file does not exist',
                                    fileName)
-            moviesInFile = []
+            comparableMoviesInFile = set()
+
+        self.__comparableMoviesInFiles[fileKey] = (compareWithMethod, comparableMoviesInFile)
+
+        return comparableMoviesInFile
+
+    def __readMovieKeysThroughIndex(self, fileName, readOnly=False):
+        """returns the MovieKeySet of the movies in the file read through its
+           index, None if the index could not be read, so the file is read
+           directly. A missing file raises an IOError or OSError. If readOnly
+           is set, the index file is not written"""
 
-        return moviesInFile
+        try:
+            index = MovieFileIndex(fileName)
+            index.setReadOnly(readOnly)
+
+            return index.readMovieKeys()
+        except (IOError, OSError) as e:
+            if e.errno == errno.ENOENT and not os.path.exists(fileName):
+                raise
+
+            self.__logger.warning('Could not read file "%s" through its index, reading it directly: %s', fileName, e)
+        except ValueError as e:
+            self.__logger.warning('Could not read file "%s" through its index, reading it directly: %s', fileName, e)
+
+        return None
+
+    def __parallelComparisonFor(self, compareWithMethod):
+        """returns the comparison the ParallelMovieFileReader uses like the
+           given compare method, or None if it has none"""
+
+        if compareWithMethod == self.__asExactString:
+            return 'exact'
+
+        if compareWithMethod == self.__asFuzzilyComparableString:
+            return 'fuzzy'
+
+        return None
+
+    def __iterateMoviesInFile(self, fileName):
+        """
+        Yields the movies contained in the given file one by one, like they
+        are returned by reading the whole file, removing trailing white space
+        and splitting it into lines. The file is mapped into memory and
+        decoded block by block, so only a block of movies is held as strings
+        """
+
+        with io.open(fileName, 'rb') as fileToRead:
+            fileSize = os.fstat(fileToRead.fileno()).st_size
+
+            if fileSize == 0:
+                yield u''
+                return
+
+            fileContent = mmap.mmap(fileToRead.fileno(), 0, access=mmap.ACCESS_READ)
+
+            try:
+                # white space only lines are movies only if a movie follows,
+                # the last movie of the file has its trailing white space removed
+                blankLinesPending = []
+                previousMovie = None
+                blockStart = 0
+
+                while blockStart < fileSize:
+                    blockEnd = fileContent.rfind('\n', blockStart, blockStart + self.__readBlockSize) + 1
+
+                    if blockEnd == 0:
+                        # the line is longer than a block or the last one
+                        blockEnd = fileContent.find('\n', blockStart) + 1 or fileSize
+
+                    block = fileContent[blockStart:blockEnd].decode('utf8')
+                    blockStart = blockEnd
+
+                    # like reading the file in text mode, line ends of "\r\n"
+                    # and "\r" are read as "\n"
+                    if u'\r' in block:
+                        block = block.replace(u'\r\n', u'\n').replace(u'\r', u'\n')
+
+                    if block.endswith(u'\n'):
+                        block = block[:-1]
+
+                    for eachLine in block.split(u'\n'):
+                        if eachLine == u'' or eachLine.isspace():
+                            blankLinesPending.append(eachLine)
+                            continue
+
+                        if previousMovie is not None:
+                            yield previousMovie
+
+                        if blankLinesPending:
+                            for eachBlankLine in blankLinesPending:
+                                yield eachBlankLine
+
+                            blankLinesPending = []
+
+                        previousMovie = eachLine
+
+                if previousMovie is None:
+                    yield u''
+                else:
+                    yield previousMovie.rstrip()
+            finally:
+                fileContent.close()
+
+    def __listArgument(self, listName):
+        """returns the list name given on the command line, if it is known"""
+
+        if not self.__isKnownList(listName):
+            raise argparse.ArgumentTypeError('unknown list "%s"' % listName)
+
+        return listName
 
     def __parseCommandLineArguments(self):
         """parses the command line arguments and ends the script on error"""
@@ -281,35 +4174,19 @@ class GoodMoviesRunner:
 
         parser.add_argument(
             '-li','--list',
-            help='the list to fetch, "imdb_top250" to fetch from the IMDB top 250 list, "imdb_<genre>" to fetch from the IMDB list with a special genre',
-            choices=["imdb_top250",
-                     "imdb_adventure",
-                     "imdb_action",
-                     "imdb_animation",
-                     "imdb_biography",
-                     "imdb_comedy",
-                     "imdb_crime",
-                     "imdb_drama",
-                     "imdb_family",
-                     "imdb_fantasy",
-                     "imdb_film_noir",
-                     "imdb_history",
-                     "imdb_horror",
-                     "imdb_music",
-                     "imdb_musical",
-                     "imdb_mystery",
-                     "imdb_romance",
-                     "imdb_sci_fi",
-                     "imdb_sport",
-                     "imdb_thriller",
-                     "imdb_war",
-                     "imdb_western" ],
-            default="imdb_top250")
+            help='the list to fetch, "imdb_top250" to fetch from the IMDB top 250 list, "imdb_<genre>" to fetch from the IMDB list with a special genre, "file_<name>" to read the record file <name>.jsonl, <name>.csv or <name>.columnar from the directory given by --sourcedir. Lists joined by "+" (e.g. "imdb_sci_fi+file_favorites") are fetched at the same time and merged by rank into a single list. May be given several times. Known lists: ' + scraperRegistry.describeLists(),
+            type=self.__listArgument,
+            action='append')
 
         parser.add_argument(
             '-la','--language',
-            help='specify the language to retrieve the films in (e.g. en-US, de-DE, fr-FR)',
-            default="en-US")
+            help='specify the language to retrieve the films in (e.g. en-US, de-DE, fr-FR), may be given several times',
+            action='append')
+
+        parser.add_argument(
+            '-jf','--jobfile',
+            help='optionally specify a file with a line "<list> <language> [<outputfile>]" per list to fetch, replacing --list, --language and --outputfile',
+            default='')
 
         parser.add_argument(
             '-of','--outputfile',
@@ -331,17 +4208,222 @@ class GoodMoviesRunner:
             help='optionally activate a fuzzy matching for the movies to ignore',
             action='store_true')
 
+        parser.add_argument(
+            '--fuzzythreshold',
+            help='the similarity between 0 and 1 movies must have to be ignored with --ignorefuzzy, at 1 they must be equal apart from spaces, signs, accents and case',
+            type=float,
+            default=1.0)
+
+        parser.add_argument(
+            '--metricsfile',
+            help='optionally specify a file the time per stage and the counters of the run are written to as JSON',
+            default='')
+
+        parser.add_argument(
+            '--prometheusfile',
+            help='optionally specify a file the metrics of the run are written to for the textfile collector of the Prometheus node exporter',
+            default='')
+
+        parser.add_argument(
+            '--profile',
+            help='optionally specify a file a cProfile profile of the run is written to',
+            default='')
+
+        parser.add_argument(
+            '--bloom',
+            help='optionally keep a Bloom filter of the movies of the output file and the ignore file next to them, so only the movies it may contain are looked up in the files, which are not held in memory',
+            action='store_true')
+
+        parser.add_argument(
+            '--processes',
+            help='the number of processes reading large output and ignore files, which are not read through an index',
+            type=int,
+            default=1)
+
+        parser.add_argument(
+            '--index',
+            help='optionally keep the movies of the output file in an index file next to it, so only the movies appended since the last run are read',
+            action='store_true')
+
+        parser.add_argument(
+            '--snapshotdir',
+            help='optionally specify a directory the movies of every list fetched are kept in, so the next run only checks the movies which entered the list since and skips lists whose sites did not change',
+            default='')
+
+        parser.add_argument(
+            '--deltafile',
+            help='optionally specify a file the movies which entered, left or moved within every list since the last run are written to as one JSON object per list, needs --snapshotdir',
+            default='')
+
+        parser.add_argument(
+            '--daemon',
+            help='keep running and execute the jobs every refresh interval, while the connections, the scrapers and the movies read from files are kept in memory. Other tools may send requests as JSON lines to the unix socket, e.g. {"command": "sync"}, {"command": "list", "list": "imdb_top250", "language": "en-US"}, {"command": "status"} or {"command": "stop"}',
+            action='store_true')
+
+        parser.add_argument(
+            '--socket',
+            help='the unix socket the daemon answers requests on',
+            default='goodmovies.sock')
+
+        parser.add_argument(
+            '--refresh',
+            help='the number of seconds between the executions of the jobs by the daemon, 0 to execute them only on request',
+            type=float,
+            default=3600)
+
+        parser.add_argument(
+            '--idletime',
+            help='the number of seconds after which the daemon forgets lists and files not used since',
+            type=float,
+            default=3 * 3600)
+
+        parser.add_argument(
+            '--exportfile',
+            help='optionally specify a file the rank, title, year, rating and imdb id of the movies of every list fetched are written to, the file is replaced by every run',
+            default='')
+
+        parser.add_argument(
+            '--exportformat',
+            help='the format of the export file, "jsonl" for a JSON object per movie, "csv" for a line of comma separated values per movie, "columnar" for a JSON object holding a list of values per field',
+            choices=MovieRecordFile.formats,
+            default='jsonl')
+
+        parser.add_argument(
+            '--dedupbyid',
+            help='additionally leave out movies whose imdb id was written to the output file before, even under another title (e.g. in another language). The ids are kept in a file next to the output file',
+            action='store_true')
+
+        parser.add_argument(
+            '--fsync',
+            help='optionally flush the movies added to the output file to the disk before the file is unlocked for other runs',
+            action='store_true')
+
+        parser.add_argument(
+            '--check',
+            help='only check with the cached sites and the output file, whether movies would be added, without fetching or writing anything, exits with 0 if not, 1 if so and 2 if a site is not fresh in the cache',
+            action='store_true')
+
         parser.add_argument(
             '-cn','--count',
             help='the number of films to write to the output file',
             type=int,
             default=100)
 
-        return parser.parse_args()
+        parser.add_argument(
+            '--concurrency',
+            help='the maximum number of result pages fetched from the internet site at the same time',
+            type=int,
+            default=1)
+
+        parser.add_argument(
+            '--maxpages',
+            help='the maximum number of result pages fetched for one list, fetching stops with the movies found so far when reached',
+            type=int,
+            default=100)
+
+        parser.add_argument(
+            '--parser',
+            help='the engine extracting the movie titles, "soup" to parse complete sites with BeautifulSoup, "stream" to parse sites while they are received',
+            choices=["soup", "stream"],
+            default="soup")
+
+        parser.add_argument(
+            '--timeout',
+            help='the number of seconds to wait for an internet site to answer',
+            type=float,
+            default=30)
+
+        parser.add_argument(
+            '--ratelimit',
+            help='the number of requests sent to the internet site per second on average, 0 for no limit',
+            type=float,
+            default=0)
+
+        parser.add_argument(
+            '--retries',
+            help='the number of times a request failing with a temporary error (e.g. status 429 or 503 or a timeout) is sent again',
+            type=int,
+            default=3)
+
+        parser.add_argument(
+            '--backoff',
+            help='the number of seconds the random delay before the first retry is drawn from, doubling with every further retry',
+            type=float,
+            default=1.0)
+
+        parser.add_argument(
+            '--maxretrydelay',
+            help='the maximum number of seconds to wait before a retry, a request is not sent again if the site asks to wait longer',
+            type=float,
+            default=60.0)
+
+        parser.add_argument(
+            '--imdburl',
+            help='the url the imdb sites are read from, e.g. to read from a local mirror',
+            default='http://www.imdb.com')
+
+        parser.add_argument(
+            '--sourcedir',
+            help='the directory the record files of the "file_<name>" lists are read from',
+            default='.')
+
+        parser.add_argument(
+            '--record',
+            help='optionally specify a directory the sites fetched are recorded in, so they can be replayed with --replay, the cache is not used then',
+            default='')
+
+        parser.add_argument(
+            '--replay',
+            help='optionally specify a directory with sites recorded by --record to read instead of the internet site',
+            default='')
+
+        parser.add_argument(
+            '--cachedir',
+            help='specify the directory the sites fetched from the internet are cached in, by default goodmovies in $XDG_CACHE_HOME or ~/.cache, it must belong to the user',
+            default=os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'goodmovies'))
+
+        parser.add_argument(
+            '--cachettl',
+            help='the number of seconds a cached site is used without asking the internet site, whether it changed',
+            type=int,
+            default=3600)
+
+        parser.add_argument(
+            '--cachesize',
+            help='the number of megabytes the cache may occupy',
+            type=int,
+            default=50)
+
+        parser.add_argument(
+            '--nocache',
+            help='optionally bypass the cache and always fetch the sites from the internet',
+            action='store_true')
+
+        commandLineArguments = parser.parse_args()
+
+        if not 0 < commandLineArguments.fuzzythreshold <= 1:
+            parser.error('argument --fuzzythreshold: must be greater than 0 and at most 1')
+
+        if commandLineArguments.check and (commandLineArguments.nocache
+                                           or commandLineArguments.record != ''
+                                           or commandLineArguments.replay != ''):
+            parser.error('argument --check: needs the cache, not allowed with --nocache, --record or --replay')
+
+        if commandLineArguments.deltafile != '' and commandLineArguments.snapshotdir == '':
+            parser.error('argument --deltafile: needs --snapshotdir')
+
+        if commandLineArguments.daemon and commandLineArguments.check:
+            parser.error('argument --daemon: not allowed with --check')
+
+        if commandLineArguments.dedupbyid and commandLineArguments.outputfile == '' and commandLineArguments.jobfile == '':
+            parser.error('argument --dedupbyid: needs --outputfile or --jobfile')
+
+        return commandLineArguments
 
 def main():
     goodMoviesRunner = GoodMoviesRunner()
-    goodMoviesRunner.execute()
+    sys.exit(goodMoviesRunner.execute())
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,18 @@ import subprocess
 import os
 import io
 import shutil
+import threading
+import time
+import gzip
+import zlib
+import hashlib
+import json
+import socket
+import urlparse
+import BaseHTTPServer
+import SocketServer
+
+import goodmovies
 
 class TestProgram(unittest.TestCase):
 
@@ -221,5 +233,1282 @@ class TestProgram(unittest.TestCase):
 
         return writtenLines
 
+class IMDBStandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """answers requests for imdb sites with canned pages, so the tests can
+       run without a connection to imdb.com"""
+
+    # keeps connections open between requests
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connectionsAccepted += 1
+
+    def do_GET(self):
+        self.server.requestStarted()
+        try:
+            time.sleep(self.server.latency)
+
+            fault = self.server.nextFault()
+
+            if fault is not None:
+                time.sleep(fault.get('delay', 0))
+
+                if 'status' not in fault:
+                    # the client stopped waiting for the slow answer
+                    self.close_connection = 1
+                    return
+
+                self.send_response(fault['status'])
+                if 'retryAfter' in fault:
+                    self.send_header('Retry-After', fault['retryAfter'])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            url = urlparse.urlparse(self.path)
+            parameters = urlparse.parse_qs(url.query)
+
+            if url.path == '/chart/top':
+                page = self.server.top250Page()
+            elif url.path == '/search/title':
+                page = self.server.searchResultPage(int(parameters['start'][0]),
+                                                    int(parameters.get('count', [self.server.pageSize])[0]))
+            else:
+                self.send_error(404)
+                return
+
+            self.server.requestedPaths.append(self.path)
+
+            etag = '"%s"' % hashlib.md5(page).hexdigest()
+
+            if self.headers.getheader('If-None-Match') == etag:
+                self.server.notModifiedResponses += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+
+            acceptedEncodings = self.headers.getheader('Accept-Encoding', '')
+
+            if self.server.contentEncoding == 'gzip' and 'gzip' in acceptedEncodings:
+                compressedPage = io.BytesIO()
+                gzipFile = gzip.GzipFile(fileobj=compressedPage, mode='wb')
+                gzipFile.write(page)
+                gzipFile.close()
+                page = compressedPage.getvalue()
+                self.send_header('Content-Encoding', 'gzip')
+            elif self.server.contentEncoding == 'deflate' and 'deflate' in acceptedEncodings:
+                page = zlib.compress(page)
+                self.send_header('Content-Encoding', 'deflate')
+            elif self.server.contentEncoding == 'raw deflate' and 'deflate' in acceptedEncodings:
+                compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+                page = compressor.compress(page) + compressor.flush()
+                self.send_header('Content-Encoding', 'deflate')
+
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+        finally:
+            self.server.requestFinished()
+
+    def log_message(self, format, *args):
+        """keeps the test output free of request logs"""
+        pass
+
+class IMDBStandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """a local stand-in for imdb.com serving numbered movie titles"""
+
+    daemon_threads = True
+
+    """the seconds every request is delayed"""
+    latency = 0.0
+
+    """the number of movies the search result contains"""
+    numberOfSearchResults = 1000
+
+    """the number of movies shown on one search result page"""
+    pageSize = 50
+
+    """the number of the movie shown first in the search result"""
+    firstMovie = 1
+
+    """whether a search result page shows the number of movies asked for by
+       its count parameter, otherwise the page size"""
+    honorsCount = True
+
+    """the text the titles of the movies start with, followed by their number"""
+    titlePrefix = 'Movie'
+
+    """the encoding pages are compressed with, if the client accepts it,
+       'raw deflate' sends deflate data without the zlib header"""
+    contentEncoding = 'gzip'
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), IMDBStandInHandler)
+        self.__lock = threading.Lock()
+        self.requestsInProgress = 0
+        self.maximumRequestsInProgress = 0
+        self.requestedPaths = []
+        self.notModifiedResponses = 0
+        self.connectionsAccepted = 0
+        self.requestTimes = []
+
+        # the faults the next requests are answered with instead of the
+        # site, e.g. {'status': 503, 'retryAfter': '1'} or {'delay': 2}
+        self.faults = []
+
+    def url(self):
+        """returns the base url of the server"""
+        return 'http://127.0.0.1:%i' % self.server_address[1]
+
+    def nextFault(self):
+        with self.__lock:
+            if len(self.faults) == 0:
+                return None
+
+            return self.faults.pop(0)
+
+    def requestStarted(self):
+        with self.__lock:
+            self.requestTimes.append(time.time())
+            self.requestsInProgress += 1
+            self.maximumRequestsInProgress = max(self.maximumRequestsInProgress, self.requestsInProgress)
+
+    def requestFinished(self):
+        with self.__lock:
+            self.requestsInProgress -= 1
+
+    def top250Page(self):
+        rows = ['<tr><td class="posterColumn"><span name="rk" data-value="%i"></span></td>'
+                '<td class="titleColumn">%i. <a href="/title/tt%07i/">%s %i</a> <span class="secondaryInfo">(%i)</span></td>'
+                '<td class="ratingColumn imdbRating">%s</td></tr>'
+                % (rank, rank, rank, self.titlePrefix, rank, self.yearOf(rank), self.__ratingElementOf(rank))
+                for rank in range(1, 251)]
+        return '<html><body><table>' + ''.join(rows) + '</table></body></html>'
+
+    def searchResultPage(self, start, count):
+        pageSize = min(count, self.pageSize) if self.honorsCount else self.pageSize
+        movies = range(start + self.firstMovie - 1, min(start + pageSize, self.numberOfSearchResults + 1) + self.firstMovie - 1)
+        rows = ['<div class="lister-item mode-simple"><div class="col-title"><span class="lister-item-header">'
+                '<span class="lister-item-index">%i.</span><span title="Director"><a href="/title/tt%07i/">%s %i</a></span>'
+                '<span class="lister-item-year text-muted">(%i)</span></span></div>'
+                '<div class="col-imdb-rating">%s</div></div>'
+                % (number - self.firstMovie + 1, number, self.titlePrefix, number, self.yearOf(number), self.__ratingElementOf(number))
+                for number in movies]
+        return '<html><body>' + ''.join(rows) + '</body></html>'
+
+    def yearOf(self, number):
+        """returns the year shown for the movie with the given number"""
+        return 1950 + number % 70
+
+    def ratingOf(self, number):
+        """returns the rating shown for the movie with the given number,
+           every seventh movie has none"""
+
+        if number % 7 == 0:
+            return None
+
+        return round(9.9 - number % 50 * 0.1, 1)
+
+    def __ratingElementOf(self, number):
+        if self.ratingOf(number) is None:
+            return ''
+
+        return '<strong title="%.1f based on 1,000 user ratings">%.1f</strong>' % (self.ratingOf(number), self.ratingOf(number))
+
+class TestFuzzyKeyNormalizer(unittest.TestCase):
+    """tests converting movies into their fuzzily comparable form"""
+
+    __movies = [u'Am\xe9lie', u'Se7en', u'the shawshank - Redemption', u'12   angry MEN,:?', u'', u'snake_case']
+
+    def test_convertsListsLikeSingleMovies(self):
+        """tests, that converting a list in batches gives the same result as
+           converting each movie"""
+
+        fuzzyKeyNormalizer = goodmovies.FuzzyKeyNormalizer()
+
+        self.assertEqual(list(fuzzyKeyNormalizer.normalizeAll(self.__movies)),
+                         [u'amelie', u'se7en', u'theshawshankredemption', u'12angrymen', u'', u'snakecase'])
+        self.assertEqual([fuzzyKeyNormalizer.normalize(eachMovie) for eachMovie in self.__movies],
+                         list(fuzzyKeyNormalizer.normalizeAll(self.__movies)))
+
+    def test_remembersMostRecentlyConvertedMovies(self):
+        """tests, that only the most recently converted movies are remembered"""
+
+        fuzzyKeyNormalizer = goodmovies.FuzzyKeyNormalizer(maximumSize=2)
+
+        for eachMovie in [u'Se7en', u'Up', u'Se7en', u'Heat', u'Up']:
+            fuzzyKeyNormalizer.normalize(eachMovie)
+
+        self.assertEqual(fuzzyKeyNormalizer.hits, 1)
+        self.assertEqual(fuzzyKeyNormalizer.misses, 4)
+
+class TestFuzzyMovieIndex(unittest.TestCase):
+    """tests finding movies approximately matching ignored movies"""
+
+    def test_findsMoviesWithinSimilarityThreshold(self):
+        """tests, that movies differing in a few characters relative to
+           their length are found, while others are not"""
+
+        fuzzyMovieIndex = goodmovies.FuzzyMovieIndex(set([u'se7en', u'thegodfather', u'alien']), 0.8)
+
+        self.assertIn(u'se7en', fuzzyMovieIndex)
+        self.assertIn(u'seven', fuzzyMovieIndex)
+        self.assertIn(u'thegodfathr', fuzzyMovieIndex)
+        self.assertIn(u'aliens', fuzzyMovieIndex)
+        self.assertNotIn(u'thegodfatherpartii', fuzzyMovieIndex)
+        self.assertNotIn(u'alienresurrection', fuzzyMovieIndex)
+        self.assertNotIn(u'up', fuzzyMovieIndex)
+
+    def test_findsOnlyEqualMoviesAtThresholdOne(self):
+        """tests, that a threshold of 1 only finds equal movies"""
+
+        fuzzyMovieIndex = goodmovies.FuzzyMovieIndex(set([u'se7en']), 1.0)
+
+        self.assertIn(u'se7en', fuzzyMovieIndex)
+        self.assertNotIn(u'seven', fuzzyMovieIndex)
+
+class TestParallelMovieFileReader(unittest.TestCase):
+    """tests reading the comparable movies of a file with several processes"""
+
+    __movieFilePath = 'testdata/parallel.txt'
+
+    def test_readsMoviesLikeReadingWholeFile(self):
+        """tests, that the movies read by any number of processes are the
+           ones read from the whole file, including its line ends, blank
+           lines and white space at its end"""
+
+        movieLines = [u'Am\xe9lie %i' % number if number % 7 else u'  ' for number in range(20000)]
+
+        for eachEnding in [u'\n', u'\r\n', u'\r', u' \u3000\n' * 30000]:
+            with io.open(self.__movieFilePath, 'w', encoding='utf8', newline='') as movieFile:
+                movieFile.write(u'\r\n'.join(movieLines[:100]) + u'\n' + u'\n'.join(movieLines[100:]) + eachEnding)
+
+            with io.open(self.__movieFilePath, 'r', encoding='utf8') as movieFile:
+                moviesInFile = set(movieFile.read().rstrip().split(u'\n'))
+
+            for eachNumberOfProcesses in [1, 2, 5]:
+                parallelMovieFileReader = goodmovies.ParallelMovieFileReader(self.__movieFilePath, eachNumberOfProcesses)
+
+                self.assertEqual(parallelMovieFileReader.readComparableMovies('exact'), moviesInFile)
+                self.assertEqual(parallelMovieFileReader.readComparableMovies('fuzzy'),
+                                 set(goodmovies.FuzzyKeyNormalizer().normalizeAll(moviesInFile)))
+
+    def test_readsFileWithoutMoviesAsEmptyMovie(self):
+        """tests, that a file containing only white space is read as a single
+           empty movie"""
+
+        with io.open(self.__movieFilePath, 'w', encoding='utf8') as movieFile:
+            movieFile.write(u' \n\n\t\n')
+
+        self.assertEqual(goodmovies.ParallelMovieFileReader(self.__movieFilePath, 3).readComparableMovies('exact'),
+                         set([u'']))
+
+    def tearDown(self):
+        os.unlink(self.__movieFilePath)
+
+class TestMovieFileBloomFilter(unittest.TestCase):
+    """tests the Bloom filter kept of the movies of a movie file"""
+
+    __movieFilePath = 'testdata/filtered.txt'
+
+    def test_containsEveryMovieOfFile(self):
+        """tests, that every movie read from the file is contained, also after
+           movies were appended, while most other movies are not"""
+
+        self.__writeMovieFile('w', u'Am\xe9lie\r\n  \nSe7en\rAlien\nHeat \n\n')
+        self.__assertContainsMoviesOfFile()
+
+        self.__writeMovieFile('a', u'\n'.join(u'Movie %i' % number for number in range(5000)) + u'\nUp  ')
+        self.__assertContainsMoviesOfFile()
+        self.assertTrue(os.path.isfile(self.__movieFilePath + '.bloom'))
+
+        bloomFilter = goodmovies.MovieFileBloomFilter(self.__movieFilePath)
+        bloomFilter.update()
+
+        self.assertTrue(len([number for number in range(10000) if u'Other movie %i' % number in bloomFilter]) < 300)
+
+    def tearDown(self):
+        for eachPath in [self.__movieFilePath, self.__movieFilePath + '.bloom']:
+            if os.path.exists(eachPath):
+                os.unlink(eachPath)
+
+    def __writeMovieFile(self, mode, content):
+        """writes the content to the movie file in the given mode"""
+        with io.open(self.__movieFilePath, mode, encoding='utf8', newline='') as movieFile:
+            movieFile.write(content)
+
+    def __assertContainsMoviesOfFile(self):
+        """asserts, that a filter brought up to date contains the movies read
+           from the whole file"""
+
+        with io.open(self.__movieFilePath, 'r', encoding='utf8') as movieFile:
+            moviesInFile = movieFile.read().rstrip().split(u'\n')
+
+        bloomFilter = goodmovies.MovieFileBloomFilter(self.__movieFilePath)
+        bloomFilter.update()
+
+        for eachMovie in moviesInFile:
+            self.assertIn(eachMovie, bloomFilter)
+
+class TestMovieFileIndex(unittest.TestCase):
+    """tests the index of hashes kept of the movies of a movie file"""
+
+    __movieFilePath = 'testdata/indexed.txt'
+
+    def test_containsExactlyMoviesOfFile(self):
+        """tests, that the index contains the movies read from the whole file,
+           also after movies were appended and after it was sorted again"""
+
+        self.__writeMovieFile('w', u'Am\xe9lie\r\n  \nSe7en\rAlien\nHeat \n\n')
+        self.__assertContainsExactlyMoviesOfFile()
+
+        self.__writeMovieFile('a', u'Up \n')
+        self.__assertContainsExactlyMoviesOfFile()
+
+        self.__writeMovieFile('a', u'\n'.join(u'Movie %i' % number for number in range(5000)) + u'\nUp  ')
+        self.__assertContainsExactlyMoviesOfFile()
+
+    def test_noticesMoviesReplacedInPlace(self):
+        """tests, that the index notices a movie replaced by another of the
+           same length in the middle of the file, which keeps its size"""
+
+        moviesInFile = [u'Movie %05i' % number for number in range(5000)]
+
+        self.__writeMovieFile('w', u'\n'.join(moviesInFile) + u'\n')
+        os.utime(self.__movieFilePath, (1000000000, 1000000000))
+        self.__assertContainsExactlyMoviesOfFile()
+
+        moviesInFile[2500] = u'Alien 02500'
+        self.__writeMovieFile('w', u'\n'.join(moviesInFile) + u'\n')
+        os.utime(self.__movieFilePath, (1000000060, 1000000060))
+        self.__assertContainsExactlyMoviesOfFile()
+
+        self.assertNotIn(u'Movie 02500', goodmovies.MovieFileIndex(self.__movieFilePath).readMovieKeys())
+
+    def test_storesHashesOfMovies(self):
+        """tests, that the index file holds a hash of fixed size per movie
+           instead of the movies"""
+
+        self.__writeMovieFile('w', u''.join(u'A rather long movie title %i\n' % number for number in range(10000)))
+        goodmovies.MovieFileIndex(self.__movieFilePath).readMovieKeys()
+
+        self.assertTrue(os.path.getsize(self.__movieFilePath + '.idx') <= 1024 + 10000 * 8)
+
+    def test_rebuildsIndexOfOtherKeySize(self):
+        """tests, that an index holding hashes of another size than 64 bits,
+           like indexes written on 32 bit platforms did, is built again"""
+
+        self.__writeMovieFile('w', u'Alien\nHeat\nUp\n')
+        goodmovies.MovieFileIndex(self.__movieFilePath).readMovieKeys()
+
+        with io.open(self.__movieFilePath + '.idx', 'rb') as indexFile:
+            header = json.loads(indexFile.read(512))
+
+        self.assertEqual(header['keySize'], 8)
+
+        header['keySize'] = 4
+        with io.open(self.__movieFilePath + '.idx', 'r+b') as indexFile:
+            indexFile.write(json.dumps(header).ljust(511) + '\n')
+
+        self.__assertContainsExactlyMoviesOfFile()
+
+        with io.open(self.__movieFilePath + '.idx', 'rb') as indexFile:
+            self.assertEqual(json.loads(indexFile.read(512))['keySize'], 8)
+
+    def tearDown(self):
+        for eachPath in [self.__movieFilePath, self.__movieFilePath + '.idx']:
+            if os.path.exists(eachPath):
+                os.unlink(eachPath)
+
+    def __writeMovieFile(self, mode, content):
+        """writes the content to the movie file in the given mode"""
+        with io.open(self.__movieFilePath, mode, encoding='utf8', newline='') as movieFile:
+            movieFile.write(content)
+
+    def __assertContainsExactlyMoviesOfFile(self):
+        """asserts, that an index brought up to date contains the movies read
+           from the whole file and no others"""
+
+        with io.open(self.__movieFilePath, 'r', encoding='utf8') as movieFile:
+            moviesInFile = movieFile.read().rstrip().split(u'\n')
+
+        movieKeys = goodmovies.MovieFileIndex(self.__movieFilePath).readMovieKeys()
+
+        for eachMovie in moviesInFile:
+            self.assertIn(eachMovie, movieKeys)
+
+        for eachMovie in [u'Heat', u'Heat ', u'Up', u'Up ', u'Movie 5000', u'Am\xe9lie ']:
+            if eachMovie not in moviesInFile:
+                self.assertNotIn(eachMovie, movieKeys)
+
+        self.assertEqual(len(movieKeys), len(set(moviesInFile)))
+
+class TestProgramOffline(unittest.TestCase):
+    """tests running goodmovies.py against a local stand-in for imdb.com"""
+
+    # the path the tests will create their data files in
+    __testDataDirectory = 'testdata/'
+
+    def setUp(self):
+        self.__clearTestDataDirectory()
+
+        self.__server = IMDBStandInServer()
+        serverThread = threading.Thread(target=self.__server.serve_forever)
+        serverThread.daemon = True
+        serverThread.start()
+
+    def tearDown(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def test_fetchesGenrePagesConcurrentlyInRankOrder(self):
+        """tests, that option --concurrency fetches several result pages at
+           the same time, while the movies keep their rank order"""
+
+        self.__server.latency = 0.2
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi",
+                                              "--count=180",
+                                              "--concurrency=4"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 181)])
+        self.assertEqual(self.__server.maximumRequestsInProgress, 4)
+
+    def test_stopsFetchingAtEmptyResultPage(self):
+        """tests, that fetching stops when the search result has no more
+           movies, even if fewer movies than requested were found"""
+
+        self.__server.numberOfSearchResults = 120
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi",
+                                              "--count=500",
+                                              "--concurrency=4"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 121)])
+
+    def test_fetchesOnlyMoviesNeededForCount(self):
+        """tests, that the last result page only asks for the movies still
+           missing and parsing stops when enough movies were found"""
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=51"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 52)])
+        self.assertEqual(len(self.__server.requestedPaths), 2)
+        self.assertIn("&start=51&count=1&", self.__server.requestedPaths[1])
+
+        # a site showing full pages anyway is only parsed up to the count
+        self.__server.honorsCount = False
+
+        for eachParser in ["soup", "stream"]:
+            consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=51", "--nocache",
+                                                  "--parser=" + eachParser,
+                                                  "--metricsfile=testdata/metrics.json"])
+            metrics = json.load(io.open("testdata/metrics.json", "r", encoding="utf8"))
+
+            self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 52)])
+            self.assertEqual(metrics['counters']['titlesParsed'], 51)
+
+    def test_stopsFetchingAtMaximumNumberOfPages(self):
+        """tests, that option --maxpages stops fetching result pages with the
+           movies found so far"""
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=500",
+                                              "--maxpages=3", "--concurrency=4"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 151)])
+        self.assertEqual(len(self.__server.requestedPaths), 3)
+
+    def test_retriesTemporaryErrorsAfterRequestedDelay(self):
+        """tests, that requests answered with a temporary error or timing out
+           are sent again, after the delay the site asks for if any"""
+
+        # the slow answer comes first, as the session itself sends a request
+        # timing out on a connection used before again once
+        self.__server.faults = [{'delay': 2},
+                                {'status': 503, 'retryAfter': '1'},
+                                {'status': 429}]
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_top250", "--count=5",
+                                              "--backoff=0.01", "--timeout=0.5",
+                                              "--metricsfile=testdata/metrics.json"])
+        metrics = json.load(io.open("testdata/metrics.json", "r", encoding="utf8"))
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 6)])
+        self.assertEqual(metrics['counters']['fetchRetries'], 3)
+        self.assertEqual(len(self.__server.requestedPaths), 1)
+        self.assertTrue(self.__server.requestTimes[2] - self.__server.requestTimes[1] >= 0.9)
+
+    def test_failsAfterMaximumNumberOfRetries(self):
+        """tests, that option --retries limits how often a failing request is
+           sent again"""
+
+        self.__server.faults = [{'status': 503}] * 3
+
+        with open(os.devnull, 'w') as devnull:
+            self.assertNotEqual(subprocess.call(["python", "goodmovies.py",
+                                                 "--imdburl=" + self.__server.url(),
+                                                 "--retries=2", "--backoff=0.01", "--nocache"],
+                                                stdout=devnull, stderr=devnull), 0)
+
+        self.assertEqual(len(self.__server.requestTimes), 3)
+
+    def test_limitsRateOfRequests(self):
+        """tests, that option --ratelimit spreads the requests over time, even
+           if they are fetched concurrently"""
+
+        self.__runGoodMovies(["--list=imdb_sci_fi", "--count=300",
+                              "--ratelimit=10", "--concurrency=2"])
+
+        requestTimes = sorted(self.__server.requestTimes)
+
+        # the first two requests may be sent at once
+        self.assertEqual(len(requestTimes), 6)
+        self.assertTrue(requestTimes[-1] - requestTimes[0] >= 0.35)
+
+    def test_reusesConnectionsAndCompressesSites(self):
+        """tests, that all pages are fetched over a single kept alive
+           connection and compressed sites are decompressed"""
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=150"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 151)])
+        self.assertEqual(len(self.__server.requestedPaths), 3)
+        self.assertEqual(self.__server.connectionsAccepted, 1)
+
+    def test_streamingParserFindsSameMoviesAsSoupParser(self):
+        """tests, that option --parser=stream extracts the same movies as
+           the default parser"""
+
+        for eachList in ["imdb_top250", "imdb_sci_fi"]:
+            soupOutput = self.__runGoodMovies(["--list=" + eachList, "--count=120", "--nocache"])
+            streamOutput = self.__runGoodMovies(["--list=" + eachList, "--count=120", "--nocache", "--parser=stream"])
+
+            self.assertEqual(len(streamOutput), 120)
+            self.assertEqual(streamOutput, soupOutput)
+
+    def test_decompressesDeflatedPagesWithAndWithoutHeader(self):
+        """tests, that pages sent with content encoding deflate are read with
+           and without the zlib header by both parsers"""
+
+        for eachEncoding in ["deflate", "raw deflate"]:
+            self.__server.contentEncoding = eachEncoding
+
+            for eachParser in ["soup", "stream"]:
+                consoleOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=60", "--nocache",
+                                                      "--parser=" + eachParser])
+
+                self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 61)])
+
+    def test_ignoresMoviesDifferingInAccents(self):
+        """tests, that option --ignorefuzzy ignores movies differing in
+           accents"""
+
+        self.__createFileWithLines('testdata/ignoremovies.txt', [u'M\xf6vi\xe9 3'])
+
+        consoleOutput = self.__runGoodMovies(["--count=10",
+                                              "--ignorefile=testdata/ignoremovies.txt",
+                                              "--ignorefuzzy"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 11) if rank != 3])
+
+    def test_indexesIgnoreFileOnceForAllJobs(self):
+        """tests, that the movies of the ignore file are indexed for
+           approximate matching once and used by every job"""
+
+        self.__createFileWithLines('testdata/ignoremovies.txt', [u'Movie 3x'])
+        self.__createFileWithLines('testdata/jobs.txt',
+                                   [u'imdb_top250 en-US testdata/top250.txt',
+                                    u'imdb_sci_fi en-US testdata/scifi.txt'])
+
+        self.__runGoodMovies(["--jobfile=testdata/jobs.txt", "--count=5",
+                              "--ignorefile=testdata/ignoremovies.txt",
+                              "--ignorefuzzy", "--fuzzythreshold=0.8",
+                              "--logfile=testdata/goodmovies.log"])
+
+        self.assertEqual(self.__readTestFile("testdata/top250.txt"), ["Movie 1", "Movie 2", "Movie 4", "Movie 5"])
+        self.assertEqual(self.__readTestFile("testdata/scifi.txt"), ["Movie 1", "Movie 2", "Movie 4", "Movie 5"])
+
+        indexingLines = [eachLine for eachLine in self.__readTestFile("testdata/goodmovies.log")
+                         if 'for approximate matching' in eachLine]
+
+        self.assertEqual(len(indexingLines), 1)
+
+    def test_replaysRecordedSites(self):
+        """tests, that sites recorded with option --record are read with
+           option --replay without asking the internet site"""
+
+        recordedOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=80",
+                                               "--record=testdata/fixtures"])
+        requestsWhileRecording = len(self.__server.requestedPaths)
+
+        replayedOutput = self.__runGoodMovies(["--list=imdb_sci_fi", "--count=80",
+                                               "--replay=testdata/fixtures"])
+
+        self.assertEqual(replayedOutput, recordedOutput)
+        self.assertEqual(len(recordedOutput), 80)
+        self.assertEqual(len(self.__server.requestedPaths), requestsWhileRecording)
+
+    def test_writesMetricsOfRun(self):
+        """tests, that options --metricsfile, --prometheusfile and --profile
+           write the metrics and the profile of the run"""
+
+        self.__runGoodMovies(["--list=imdb_sci_fi", "--count=60",
+                              "--outputfile=testdata/movies.txt",
+                              "--metricsfile=testdata/metrics.json",
+                              "--prometheusfile=testdata/goodmovies.prom",
+                              "--profile=testdata/goodmovies.profile"])
+
+        metricsFile = io.open("testdata/metrics.json", "r", encoding="utf8")
+        metrics = json.load(metricsFile)
+        metricsFile.close()
+
+        self.assertEqual(metrics['counters']['pagesFetched'], 2)
+        self.assertEqual(metrics['counters']['titlesParsed'], 60)
+        self.assertEqual(metrics['counters']['dedupComparisons'], 60)
+        self.assertEqual(metrics['counters']['moviesInserted'], 60)
+        self.assertTrue(metrics['stageSeconds']['fetch'] >= metrics['stageSeconds']['parse'] > 0)
+
+        self.assertIn('goodmovies_stage_seconds{stage="dedup"}', io.open("testdata/goodmovies.prom").read())
+        self.assertIn('goodmovies_pages_fetched 2\n', io.open("testdata/goodmovies.prom").read())
+        self.assertTrue(os.path.getsize("testdata/goodmovies.profile") > 0)
+
+    def test_usesCachedSitesOnRepeatedRuns(self):
+        """tests, that a repeated run reads the sites from the cache instead
+           of fetching them again"""
+
+        firstOutput = self.__runGoodMovies(["--list=imdb_top250", "--count=10"])
+        requestsOfFirstRun = len(self.__server.requestedPaths)
+
+        secondOutput = self.__runGoodMovies(["--list=imdb_top250", "--count=10"])
+
+        self.assertEqual(requestsOfFirstRun, 1)
+        self.assertEqual(len(self.__server.requestedPaths), 1)
+        self.assertEqual(secondOutput, firstOutput)
+
+    def test_revalidatesExpiredCachedSites(self):
+        """tests, that an expired cached site is revalidated with its ETag
+           and used again, when the site did not change"""
+
+        firstOutput = self.__runGoodMovies(["--list=imdb_top250", "--count=10", "--cachettl=0"])
+        secondOutput = self.__runGoodMovies(["--list=imdb_top250", "--count=10", "--cachettl=0"])
+
+        self.assertEqual(self.__server.notModifiedResponses, 1)
+        self.assertEqual(secondOutput, firstOutput)
+
+    def test_bypassesCacheWithOptionNoCache(self):
+        """tests, that option --nocache fetches the sites again"""
+
+        self.__runGoodMovies(["--list=imdb_top250", "--count=10"])
+        self.__runGoodMovies(["--list=imdb_top250", "--count=10", "--nocache"])
+
+        self.assertEqual(len(self.__server.requestedPaths), 2)
+
+    def test_cachesInDirectoryOfUser(self):
+        """tests, that sites are cached in a directory of the user accessible
+           by the user only, and that a directory of another user is refused"""
+
+        environment = dict(os.environ, XDG_CACHE_HOME=self.__testDataDirectory + 'xdg')
+
+        subprocess.check_output(["python", "goodmovies.py", "--imdburl=" + self.__server.url(),
+                                 "--list=imdb_top250", "--count=10"], env=environment)
+
+        cacheDirectoryStatus = os.stat(self.__testDataDirectory + 'xdg/goodmovies')
+
+        self.assertEqual(cacheDirectoryStatus.st_mode & 0777, 0700)
+        self.assertTrue(len(os.listdir(self.__testDataDirectory + 'xdg/goodmovies')) > 0)
+
+        # only root can give the directory to another user
+        if os.getuid() == 0:
+            os.chown(self.__testDataDirectory + 'xdg/goodmovies', 12345, 12345)
+
+            with self.assertRaises(subprocess.CalledProcessError):
+                self.__runGoodMovies(["--list=imdb_top250", "--count=10",
+                                      "--cachedir=" + self.__testDataDirectory + "xdg/goodmovies"])
+
+    def test_fetchesSeveralListsInOneRun(self):
+        """tests, that option --list can be given several times and each list
+           is written to the output file only once"""
+
+        self.__runGoodMovies(["--list=imdb_top250",
+                              "--list=imdb_sci_fi",
+                              "--list=imdb_top250",
+                              "--count=60",
+                              "--nocache",
+                              "--outputfile=testdata/batch.txt"])
+        writtenLines = self.__readTestFile("testdata/batch.txt")
+
+        # both lists contain the same numbered movies, so none is repeated
+        self.assertEqual(writtenLines, ["Movie %i" % rank for rank in range(1, 61)])
+
+        # the top 250 list was fetched once, the sci fi list needed two pages
+        self.assertEqual(len(self.__server.requestedPaths), 3)
+
+    def test_executesJobsOfJobFile(self):
+        """tests, that option --jobfile writes every list and language to the
+           output file given in the job file"""
+
+        self.__createFileWithLines('testdata/jobs.txt',
+                                   [u'# list language outputfile',
+                                    u'imdb_top250 en-US testdata/top250.txt',
+                                    u'',
+                                    u'imdb_sci_fi de-DE testdata/scifi.txt'])
+
+        self.__runGoodMovies(["--jobfile=testdata/jobs.txt", "--count=5"])
+
+        self.assertEqual(self.__readTestFile("testdata/top250.txt"), ["Movie %i" % rank for rank in range(1, 6)])
+        self.assertEqual(self.__readTestFile("testdata/scifi.txt"), ["Movie %i" % rank for rank in range(1, 6)])
+
+    def test_readsOutputFileThroughIndex(self):
+        """tests, that option --index keeps the movies of the output file in
+           an index, which notices movies appended and files edited in place"""
+
+        self.__createFileWithLines('testdata/indexed.txt', [u'Movie %i' % rank for rank in range(1, 6)])
+
+        self.__runGoodMovies(["--count=10", "--index", "--outputfile=testdata/indexed.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/indexed.txt"), ["Movie %i" % rank for rank in range(1, 11)])
+        self.assertTrue(os.path.isfile("testdata/indexed.txt.idx"))
+
+        # the movies appended by the run are read from the end of the file
+        self.__runGoodMovies(["--count=12", "--index", "--outputfile=testdata/indexed.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/indexed.txt"), ["Movie %i" % rank for rank in range(1, 13)])
+
+        # editing the file in place makes the index to be built again
+        self.__createFileWithLines('testdata/indexed.txt', [u'Movie 2', u'Movie 1'])
+
+        self.__runGoodMovies(["--count=3", "--index", "--outputfile=testdata/indexed.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/indexed.txt"), ["Movie 2", "Movie 1", "Movie 3"])
+
+    def test_looksUpMoviesPossiblyInFilesWithBloomFilter(self):
+        """tests, that option --bloom adds the same movies as reading the
+           output file and the ignore file"""
+
+        self.__createFileWithLines('testdata/filtered.txt', [u'Movie %i' % rank for rank in range(1, 6)])
+        self.__createFileWithLines('testdata/ignoremovies.txt', [u'Movie 7'])
+
+        for eachCount in [10, 12]:
+            self.__runGoodMovies(["--count=%i" % eachCount, "--bloom",
+                                  "--ignorefile=testdata/ignoremovies.txt",
+                                  "--outputfile=testdata/filtered.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/filtered.txt"),
+                         ["Movie %i" % rank for rank in range(1, 13) if rank != 7])
+        self.assertTrue(os.path.isfile("testdata/filtered.txt.bloom"))
+        self.assertTrue(os.path.isfile("testdata/ignoremovies.txt.bloom"))
+
+    def test_looksUpMoviesInFileIfBloomFilterIsNotUsable(self):
+        """tests, that movies are looked up in the file itself, if its Bloom
+           filter can not be read or written"""
+
+        self.__createFileWithLines('testdata/filtered.txt', [u'Movie %i' % rank for rank in range(1, 6)])
+        self.__createFileWithLines('testdata/filtered.txt.bloom', [u'{}'])
+
+        self.__runGoodMovies(["--count=7", "--bloom", "--outputfile=testdata/filtered.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/filtered.txt"), ["Movie %i" % rank for rank in range(1, 8)])
+
+        os.unlink('testdata/filtered.txt.bloom')
+        os.mkdir('testdata/filtered.txt.bloom')
+
+        self.__runGoodMovies(["--count=9", "--bloom", "--outputfile=testdata/filtered.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/filtered.txt"), ["Movie %i" % rank for rank in range(1, 10)])
+
+    def test_checksWithCacheWhetherMoviesWouldBeAdded(self):
+        """tests, that option --check tells by its exit status whether movies
+           would be added, without fetching sites or writing the output file"""
+
+        self.assertEqual(self.__checkGoodMovies(["--count=10", "--outputfile=testdata/checked.txt"]), 2)
+
+        self.__runGoodMovies(["--count=10", "--outputfile=testdata/checked.txt"])
+        requestsOfRun = len(self.__server.requestedPaths)
+
+        self.assertEqual(self.__checkGoodMovies(["--count=10", "--outputfile=testdata/checked.txt"]), 0)
+        self.assertEqual(self.__checkGoodMovies(["--count=12", "--outputfile=testdata/checked.txt"]), 1)
+
+        self.assertEqual(len(self.__server.requestedPaths), requestsOfRun)
+        self.assertEqual(self.__readTestFile("testdata/checked.txt"), ["Movie %i" % rank for rank in range(1, 11)])
+
+    def test_checksWithoutWritingFiles(self):
+        """tests, that option --check neither writes the delta file, the
+           index or the filter of the files it reads nor the cache"""
+
+        self.__createFileWithLines('testdata/ignore.txt', [u'Movie 3'])
+
+        options = ["--count=10", "--outputfile=testdata/checked.txt",
+                   "--ignorefile=testdata/ignore.txt",
+                   "--snapshotdir=testdata/snapshots",
+                   "--deltafile=testdata/delta.jsonl"]
+
+        self.__runGoodMovies(options)
+
+        # the movies parsed from a cached site are stored along with it
+        # again, when they are missing
+        for eachFileName in os.listdir('testdata/cache'):
+            if eachFileName.endswith('.meta'):
+                meta = json.load(io.open('testdata/cache/' + eachFileName, 'r', encoding='utf8'))
+                del meta['records']
+                io.open('testdata/cache/' + eachFileName, 'wb').write(json.dumps(meta))
+
+        filesOfRun = self.__listFilesWithContents('testdata')
+
+        self.assertEqual(self.__checkGoodMovies(options + ["--index"]), 0)
+        self.assertEqual(self.__checkGoodMovies(options + ["--bloom", "--count=12"]), 1)
+
+        self.assertEqual(self.__listFilesWithContents('testdata'), filesOfRun)
+
+    def test_checksOnlyMoviesEnteredListSinceLastRun(self):
+        """tests, that option --snapshotdir only checks the movies which
+           entered the list since the last run and option --deltafile
+           writes the changes of the list"""
+
+        options = ["--list=imdb_sci_fi", "--count=10", "--nocache",
+                   "--outputfile=testdata/snapshot.txt",
+                   "--snapshotdir=testdata/snapshots",
+                   "--deltafile=testdata/delta.jsonl",
+                   "--metricsfile=testdata/metrics.json"]
+
+        self.__runGoodMovies(options)
+        changes = self.__readJSONLines("testdata/delta.jsonl")
+
+        self.assertEqual(len(changes), 1)
+        self.assertFalse(changes[0]['unchanged'])
+        self.assertEqual(changes[0]['entered'], [{'rank': rank, 'title': 'Movie %i' % rank} for rank in range(1, 11)])
+
+        # the unchanged site is neither parsed nor compared with the file
+        self.__runGoodMovies(options)
+        changes = self.__readJSONLines("testdata/delta.jsonl")
+        metrics = json.load(io.open("testdata/metrics.json", "r", encoding="utf8"))
+
+        self.assertTrue(changes[0]['unchanged'])
+        self.assertEqual(changes[0]['entered'], [])
+        self.assertEqual(metrics['counters']['titlesParsed'], 0)
+        self.assertEqual(metrics['counters']['dedupComparisons'], 0)
+
+        # two movies drop out of the list, two others enter it
+        self.__server.firstMovie = 3
+
+        self.__runGoodMovies(options)
+        changes = self.__readJSONLines("testdata/delta.jsonl")
+        metrics = json.load(io.open("testdata/metrics.json", "r", encoding="utf8"))
+
+        self.assertFalse(changes[0]['unchanged'])
+        self.assertEqual(changes[0]['entered'], [{'rank': 9, 'title': 'Movie 11'}, {'rank': 10, 'title': 'Movie 12'}])
+        self.assertEqual(changes[0]['left'], [{'rank': 1, 'title': 'Movie 1'}, {'rank': 2, 'title': 'Movie 2'}])
+        self.assertEqual(changes[0]['moved'], [{'title': 'Movie %i' % rank, 'from': rank, 'to': rank - 2} for rank in range(3, 11)])
+        self.assertEqual(metrics['counters']['dedupComparisons'], 2)
+        self.assertEqual(self.__readTestFile("testdata/snapshot.txt"), ["Movie %i" % rank for rank in range(1, 13)])
+
+    def test_checksAllMoviesAfterIgnoredMoviesChanged(self):
+        """tests, that option --snapshotdir checks all movies of the list
+           again, when the ignore file or the options leaving out movies
+           changed since the last run"""
+
+        self.__createFileWithLines('testdata/ignore.txt', [u'Movie 3', u'movie-4'])
+
+        options = ["--list=imdb_sci_fi", "--count=5", "--nocache",
+                   "--outputfile=testdata/snapshot.txt",
+                   "--ignorefile=testdata/ignore.txt",
+                   "--snapshotdir=testdata/snapshots"]
+
+        self.__runGoodMovies(options)
+        self.assertEqual(self.__readTestFile("testdata/snapshot.txt"), ["Movie 1", "Movie 2", "Movie 4", "Movie 5"])
+
+        self.__runGoodMovies(options + ["--ignorefuzzy"])
+        self.assertEqual(self.__readTestFile("testdata/snapshot.txt"), ["Movie 1", "Movie 2", "Movie 4", "Movie 5"])
+
+        self.__createFileWithLines('testdata/ignore.txt', [u'movie-4'])
+
+        self.__runGoodMovies(options)
+        self.assertEqual(self.__readTestFile("testdata/snapshot.txt"), ["Movie 1", "Movie 2", "Movie 4", "Movie 5", "Movie 3"])
+
+    def test_keepsSnapshotPerOutputFile(self):
+        """tests, that jobs fetching the same list to different output files
+           keep a snapshot each"""
+
+        self.__createFileWithLines('testdata/jobs.txt',
+                                   [u'imdb_sci_fi en-US testdata/first.txt',
+                                    u'imdb_sci_fi en-US testdata/second.txt'])
+
+        options = ["--jobfile=testdata/jobs.txt", "--count=5", "--nocache",
+                   "--snapshotdir=testdata/snapshots",
+                   "--deltafile=testdata/delta.jsonl"]
+
+        self.__runGoodMovies(options)
+        self.__runGoodMovies(options)
+
+        self.assertEqual([eachChanges['unchanged'] for eachChanges in self.__readJSONLines("testdata/delta.jsonl")], [True, True])
+
+    def test_concurrentRunsAddEveryMovieOnce(self):
+        """tests, that runs writing to the same output file at the same time
+           add every movie once and do not mix their lines"""
+
+        self.__server.latency = 0.2
+
+        # reading a large file takes long enough for all runs to read it
+        # before the first one writes to it
+        self.__createFileWithLines('testdata/concurrent.txt', [u'Other movie %i' % number for number in range(200000)])
+
+        runs = [self.__startGoodMovies(["--list=imdb_sci_fi", "--count=100", "--nocache", "--fsync",
+                                        "--outputfile=testdata/concurrent.txt"])
+                for eachRun in range(8)]
+
+        for eachRun in runs:
+            self.assertEqual(eachRun.wait(), 0)
+
+        self.assertEqual(self.__readTestFile("testdata/concurrent.txt")[200000:], ["Movie %i" % rank for rank in range(1, 101)])
+
+    def test_concurrentRunsBuildingIndexAddEveryMovieOnce(self):
+        """tests, that runs building the index of the same output file at
+           the same time add no movie contained in it"""
+
+        self.__createFileWithLines('testdata/indexed.txt', [u'Other movie %i' % number for number in range(500000)]
+                                                           + [u'Movie %i' % rank for rank in range(1, 6)])
+
+        runs = [self.__startGoodMovies(["--list=imdb_sci_fi", "--count=10", "--index",
+                                        "--outputfile=testdata/indexed.txt"])
+                for eachRun in range(8)]
+
+        for eachRun in runs:
+            self.assertEqual(eachRun.wait(), 0)
+
+        self.assertEqual(self.__readTestFile("testdata/indexed.txt")[500000:], ["Movie %i" % rank for rank in range(1, 11)])
+
+    def test_concurrentRunsShareCache(self):
+        """tests, that runs filling the same cache and writing the same
+           metrics file at the same time all succeed"""
+
+        runs = [self.__startGoodMovies(["--list=imdb_sci_fi", "--count=100",
+                                        "--metricsfile=testdata/metrics.json",
+                                        "--outputfile=testdata/shared%i.txt" % eachRun])
+                for eachRun in range(12)]
+
+        for eachRun in runs:
+            self.assertEqual(eachRun.wait(), 0)
+
+        self.assertEqual([eachFileName for eachFileName in os.listdir("testdata/cache") if eachFileName.endswith('.tmp')], [])
+
+    def test_exportsRecordsOfFetchedLists(self):
+        """tests, that option --exportfile writes rank, title, year, rating and
+           imdb id of the movies of every list in every format with both parsers"""
+
+        expectedRecords = [(eachList, 'en-US', goodmovies.MovieRecord(rank, u'Movie %i' % rank,
+                                                                       self.__server.yearOf(rank),
+                                                                       self.__server.ratingOf(rank),
+                                                                       u'tt%07i' % rank))
+                           for eachList in ['imdb_top250', 'imdb_sci_fi']
+                           for rank in range(1, 61)]
+
+        for eachFormat in goodmovies.MovieRecordFile.formats:
+            for eachParser in ["soup", "stream"]:
+                exportFileName = "testdata/export." + eachFormat
+
+                self.__runGoodMovies(["--list=imdb_top250", "--list=imdb_sci_fi", "--count=60",
+                                      "--parser=" + eachParser,
+                                      "--exportfile=" + exportFileName,
+                                      "--exportformat=" + eachFormat])
+
+                self.assertEqual(goodmovies.MovieRecordFile(exportFileName, eachFormat).read(), expectedRecords)
+
+    def test_leavesOutMoviesWithKnownIDs(self):
+        """tests, that option --dedupbyid leaves out movies written to the
+           output file before under another title"""
+
+        self.__runGoodMovies(["--list=imdb_sci_fi", "--count=5", "--dedupbyid",
+                              "--outputfile=testdata/byid.txt"])
+
+        self.__server.titlePrefix = 'Film'
+
+        self.__runGoodMovies(["--list=imdb_sci_fi", "--count=7", "--dedupbyid", "--nocache",
+                              "--outputfile=testdata/byid.txt"])
+
+        self.assertEqual(self.__readTestFile("testdata/byid.txt"),
+                         ["Movie %i" % rank for rank in range(1, 6)] + ["Film 6", "Film 7"])
+        self.assertEqual(self.__readTestFile("testdata/byid.txt.ids"), ["tt%07i" % rank for rank in range(1, 8)])
+
+    def test_leavesOutMoviesByIDOnlyForOutputFiles(self):
+        """tests, that option --dedupbyid needs an output file and that jobs
+           writing to STDOUT leave out no movies by their id"""
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.__runGoodMovies(["--list=imdb_sci_fi", "--count=5", "--dedupbyid"])
+
+        self.__createFileWithLines('testdata/jobs.txt', [u'imdb_sci_fi en-US'])
+
+        # an id file of an output file without name must not be used
+        self.__createFileWithLines('.ids', [u'tt0000001'])
+
+        try:
+            consoleOutput = self.__runGoodMovies(["--jobfile=testdata/jobs.txt", "--count=5", "--dedupbyid"])
+        finally:
+            os.unlink('.ids')
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 6)])
+
+    def test_daemonAnswersRequestsFromMemory(self):
+        """tests, that option --daemon syncs the lists on request, answers
+           queries without fetching again, notices changed output files and
+           forgets idle lists and files"""
+
+        daemon = self.__startGoodMovies(["--daemon", "--socket=testdata/goodmovies.sock",
+                                         "--refresh=0", "--idletime=2",
+                                         "--list=imdb_sci_fi", "--count=10",
+                                         "--outputfile=testdata/daemon.txt"])
+
+        try:
+            for eachAttempt in range(100):
+                if os.path.exists("testdata/goodmovies.sock"):
+                    break
+                time.sleep(0.1)
+
+            answer = self.__requestDaemon({'command': 'sync'})
+            self.assertEqual([eachJob['moviesAdded'] for eachJob in answer['jobs']], [10])
+
+            requestsOfSync = len(self.__server.requestedPaths)
+
+            answer = self.__requestDaemon({'command': 'list', 'list': 'imdb_sci_fi', 'language': 'en-US'})
+            self.assertEqual(answer['movies'], ["Movie %i" % rank for rank in range(1, 11)])
+            self.assertEqual(len(self.__server.requestedPaths), requestsOfSync)
+
+            # a file written by others is read again
+            self.__createFileWithLines('testdata/daemon.txt', [u'Movie 2'])
+
+            answer = self.__requestDaemon({'command': 'sync', 'list': 'imdb_sci_fi'})
+            self.assertEqual([eachJob['moviesAdded'] for eachJob in answer['jobs']], [9])
+
+            answer = self.__requestDaemon({'command': 'status'})
+            self.assertEqual(answer['lists'], [['imdb_sci_fi', 'en-US']])
+            self.assertEqual(answer['files'], ['testdata/daemon.txt'])
+
+            time.sleep(3.5)
+
+            answer = self.__requestDaemon({'command': 'status'})
+            self.assertEqual(answer['lists'], [])
+            self.assertEqual(answer['files'], [])
+
+            self.assertEqual(self.__requestDaemon({'command': 'stop'})['status'], 'ok')
+            self.assertEqual(daemon.wait(), 0)
+        finally:
+            if daemon.poll() is None:
+                daemon.kill()
+
+        self.assertFalse(os.path.exists("testdata/goodmovies.sock"))
+        self.assertEqual(self.__readTestFile("testdata/daemon.txt"),
+                         ["Movie 2"] + ["Movie %i" % rank for rank in range(1, 11) if rank != 2])
+
+    def test_daemonForgetsIdleScrapersAndRejectsMissingRecordFiles(self):
+        """tests, that option --daemon forgets the scrapers of idle lists and
+           refuses lists of record files which do not exist"""
+
+        goodmovies.MovieRecordFile("testdata/favorites.jsonl").write(
+            [('file_favorites', 'en-US', [goodmovies.MovieRecord(1, u'Favorite A', None, None, None)])])
+
+        daemon = self.__startGoodMovies(["--daemon", "--socket=testdata/goodmovies.sock",
+                                         "--refresh=0", "--idletime=2",
+                                         "--sourcedir=testdata"])
+
+        try:
+            for eachAttempt in range(100):
+                if os.path.exists("testdata/goodmovies.sock"):
+                    break
+                time.sleep(0.1)
+
+            answer = self.__requestDaemon({'command': 'list', 'list': 'file_missing', 'language': 'en-US'})
+            self.assertEqual(answer['status'], 'error')
+
+            answer = self.__requestDaemon({'command': 'list', 'list': 'file_favorites', 'language': 'en-US'})
+            self.assertEqual(answer['movies'], ["Favorite A"])
+
+            answer = self.__requestDaemon({'command': 'status'})
+            self.assertEqual(answer['scrapers'], [['file_favorites', 'en-US']])
+
+            time.sleep(3.5)
+
+            answer = self.__requestDaemon({'command': 'status'})
+            self.assertEqual(answer['lists'], [])
+            self.assertEqual(answer['scrapers'], [])
+
+            self.assertEqual(self.__requestDaemon({'command': 'stop'})['status'], 'ok')
+            self.assertEqual(daemon.wait(), 0)
+        finally:
+            if daemon.poll() is None:
+                daemon.kill()
+
+    def test_aggregatesSourcesMergedByRank(self):
+        """tests, that lists joined by "+" are merged by rank, keeping a movie
+           given by several sources at its best rank, and that the time of
+           every source is reported"""
+
+        goodmovies.MovieRecordFile("testdata/favorites.jsonl").write(
+            [('file_favorites', 'en-US', [goodmovies.MovieRecord(1, u'Movie 2', None, None, u'tt0000002'),
+                                          goodmovies.MovieRecord(2, u'Favorite A', 1999, None, None),
+                                          goodmovies.MovieRecord(3, u'Renamed Movie 1', None, None, u'tt0000001'),
+                                          goodmovies.MovieRecord(4, u'Favorite B', None, None, None)])])
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_top250+file_favorites", "--count=6",
+                                              "--sourcedir=testdata",
+                                              "--metricsfile=testdata/metrics.json"])
+
+        self.assertEqual(consoleOutput, ["Movie 1", "Movie 2", "Favorite A", "Movie 3", "Movie 4", "Favorite B"])
+
+        metricsFile = io.open("testdata/metrics.json", "r", encoding="utf8")
+        metrics = json.load(metricsFile)
+        metricsFile.close()
+
+        self.assertEqual(sorted(metrics['sourceSeconds']), ['file_favorites', 'imdb_top250'])
+        self.assertTrue(metrics['sourceSeconds']['imdb_top250']['fetch'] >= metrics['sourceSeconds']['imdb_top250']['parse'] > 0)
+
+    def test_fetchesSourcesAtTheSameTime(self):
+        """tests, that the sources of an aggregated list are fetched at the
+           same time within the limit of option --concurrency"""
+
+        self.__server.latency = 0.3
+
+        consoleOutput = self.__runGoodMovies(["--list=imdb_action+imdb_comedy", "--count=10",
+                                              "--concurrency=2"])
+
+        self.assertEqual(consoleOutput, ["Movie %i" % rank for rank in range(1, 11)])
+        self.assertEqual(self.__server.maximumRequestsInProgress, 2)
+
+    def test_daemonReplacesOnlySocketsLeftBehind(self):
+        """tests, that option --daemon replaces a socket no daemon answers on,
+           but neither another file nor the socket of a running daemon"""
+
+        self.__createFileWithLines('testdata/goodmovies.sock', [u'Not a socket'])
+
+        self.assertNotEqual(self.__startGoodMovies(["--daemon", "--socket=testdata/goodmovies.sock", "--refresh=0"]).wait(), 0)
+        self.assertEqual(self.__readTestFile("testdata/goodmovies.sock"), ["Not a socket"])
+
+        os.unlink('testdata/goodmovies.sock')
+
+        leftBehindSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        leftBehindSocket.bind('testdata/goodmovies.sock')
+        leftBehindSocket.close()
+
+        daemon = self.__startGoodMovies(["--daemon", "--socket=testdata/goodmovies.sock", "--refresh=0"])
+
+        try:
+            for eachAttempt in range(100):
+                try:
+                    if self.__requestDaemon({'command': 'status'})['status'] == 'ok':
+                        break
+                except socket.error:
+                    time.sleep(0.1)
+
+            self.assertNotEqual(self.__startGoodMovies(["--daemon", "--socket=testdata/goodmovies.sock", "--refresh=0"]).wait(), 0)
+            self.assertEqual(self.__requestDaemon({'command': 'status'})['status'], 'ok')
+
+            self.assertEqual(self.__requestDaemon({'command': 'stop'})['status'], 'ok')
+            self.assertEqual(daemon.wait(), 0)
+        finally:
+            if daemon.poll() is None:
+                daemon.kill()
+
+    def __requestDaemon(self, request):
+        """sends the request to the daemon and returns its answer"""
+
+        daemonSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        daemonSocket.connect("testdata/goodmovies.sock")
+        daemonFile = daemonSocket.makefile('rwb')
+
+        daemonFile.write(json.dumps(request) + '\n')
+        daemonFile.flush()
+        answer = json.loads(daemonFile.readline())
+
+        daemonFile.close()
+        daemonSocket.close()
+
+        return answer
+
+    def __createFileWithLines(self, fileName, lines):
+        """creates a new file containing the given lines"""
+        createdFile = io.open(fileName, 'w', encoding='utf8')
+        createdFile.write(u"\n".join(lines) + u"\n")
+        createdFile.close()
+
+    def __readTestFile(self, fileName):
+        """reads the contents of the given file and returns
+           the lines as list"""
+
+        writtenFile = io.open(fileName, "r", encoding="utf8")
+        writtenLines = writtenFile.read().rstrip().split("\n")
+        writtenFile.close()
+
+        return writtenLines
+
+    def __clearTestDataDirectory(self):
+        """clears the files in test data directory, thereby only leaving
+           the .gitignore file"""
+
+        for eachFileInTestDataDirectory in os.listdir(self.__testDataDirectory):
+            if eachFileInTestDataDirectory == '.gitignore':
+                continue
+
+            filePath = os.path.join(self.__testDataDirectory, eachFileInTestDataDirectory)
+            if os.path.isdir(filePath):
+                shutil.rmtree(filePath)
+            else:
+                os.unlink(filePath)
+
+    def __readJSONLines(self, fileName):
+        """reads the JSON objects in the lines of the given file"""
+
+        with io.open(fileName, "r", encoding="utf8") as jsonFile:
+            return [json.loads(eachLine) for eachLine in jsonFile if eachLine.strip() != '']
+
+    def __runGoodMovies(self, options):
+        """executes the goodmovies.py script against the stand-in server
+           and returns the console output"""
+
+        callParameters = ["python", "goodmovies.py",
+                          "--imdburl=" + self.__server.url(),
+                          "--cachedir=" + self.__testDataDirectory + "cache"]
+        callParameters.extend(options)
+
+        outputOfGoodMovies = subprocess.check_output(callParameters)
+
+        return outputOfGoodMovies.rstrip().split('\n')
+
+    def __listFilesWithContents(self, directory):
+        """returns the paths of the files below the given directory together
+           with their modification times and the hashes of their contents"""
+
+        filePaths = [os.path.join(eachDirectory, eachFileName)
+                     for eachDirectory, directoryNames, fileNames in os.walk(directory)
+                     for eachFileName in fileNames]
+
+        return sorted((eachPath, os.path.getmtime(eachPath), hashlib.md5(io.open(eachPath, 'rb').read()).hexdigest())
+                      for eachPath in filePaths)
+
+    def __checkGoodMovies(self, options):
+        """executes the goodmovies.py script with option --check against the
+           stand-in server and returns its exit status"""
+
+        callParameters = ["python", "goodmovies.py",
+                          "--imdburl=" + self.__server.url(),
+                          "--cachedir=" + self.__testDataDirectory + "cache",
+                          "--check"]
+        callParameters.extend(options)
+
+        return subprocess.call(callParameters)
+
+    def __startGoodMovies(self, options):
+        """starts the goodmovies.py script against the stand-in server
+           without waiting for it and returns its process"""
+
+        callParameters = ["python", "goodmovies.py",
+                          "--imdburl=" + self.__server.url(),
+                          "--cachedir=" + self.__testDataDirectory + "cache"]
+        callParameters.extend(options)
+
+        return subprocess.Popen(callParameters)
+
 if __name__ == '__main__':
     unittest.main()